@@ -2,8 +2,18 @@
 API route definitions
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 import main
+from models import JobRequest
+from services.claim_cache import cache_stats as claim_cache_stats
+from services.claim_service import extraction_stats
+from services.evidence_cache import cache_stats as evidence_cache_stats
+from services.jobs import get_job, list_jobs, submit_job
+from services.knowledge_base import knowledge_base_stats, search_fact_checks
+from services.rate_limiter import rate_limit_stats
+from services.work_queue import PIPELINE_MODE, work_queue_stats, worker_rate_limit_stats
+import asyncio
 import json
 import os
 import glob
@@ -20,11 +30,15 @@ async def health_check():
 
 
 @router.get("/api/process-video")
-async def process_video_endpoint(video_url: str):
+async def process_video_endpoint(
+    video_url: str,
+    max_claims: Optional[int] = Query(None, ge=0),
+    max_spend: Optional[float] = Query(None, ge=0),
+):
     """
     Main endpoint: Process YouTube video for fact-checking
     
-    Input: GET /api/process-video?video_url=https://youtube.com/watch?v=...
+    Input: GET /api/process-video?video_url=https://youtube.com/watch?v=...[&max_claims=N][&max_spend=USD]
     Output: JSON with complete fact-checking results
     """
     import logging
@@ -34,7 +48,7 @@ async def process_video_endpoint(video_url: str):
     
     try:
         logger.info("📡 Starting video processing pipeline...")
-        result = await main.process_video(video_url)
+        result = await main.process_video(video_url, max_claims, max_spend)
         logger.info(f"✅ Video processing completed successfully! Found {result['total_claims']} claims")
         return result
     except Exception as e:
@@ -43,11 +57,15 @@ async def process_video_endpoint(video_url: str):
 
 
 @router.get("/api/process-video-save")
-async def process_video_save_endpoint(video_url: str):
+async def process_video_save_endpoint(
+    video_url: str,
+    max_claims: Optional[int] = Query(None, ge=0),
+    max_spend: Optional[float] = Query(None, ge=0),
+):
     """
     Process YouTube video and save result as JSON file in backend folder
     
-    Input: GET /api/process-video-save?video_url=https://youtube.com/watch?v=...
+    Input: GET /api/process-video-save?video_url=https://youtube.com/watch?v=...[&max_claims=N][&max_spend=USD]
     Output: JSON with file path and processing results
     """
     import logging
@@ -57,7 +75,7 @@ async def process_video_save_endpoint(video_url: str):
     
     try:
         logger.info("📡 Starting video processing pipeline...")
-        result = await main.process_video(video_url)
+        result = await main.process_video(video_url, max_claims, max_spend)
         logger.info(f"✅ Video processing completed successfully! Found {result['total_claims']} claims")
         
         # Generate filename with timestamp and video ID
@@ -180,3 +198,101 @@ async def get_cached_video(video_id: str):
     except Exception as e:
         logger.error(f"❌ Failed to load cached video {video_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/cache/claims")
+async def claim_cache_status():
+    """
+    Hit/miss counters for the claim-extraction cache
+    
+    Output: JSON with memory/disk hits, misses, hit rate and entry counts
+    """
+    return {"success": True, "claim_cache": claim_cache_stats()}
+
+
+@router.get("/api/cache/evidence")
+async def evidence_cache_status():
+    """
+    Hit/miss counters for the fact-check evidence cache
+    
+    Output: JSON with exact/similar hits, misses, expirations, hit rate and entry count
+    """
+    return {"success": True, "evidence_cache": evidence_cache_stats()}
+
+
+@router.get("/api/knowledge/search")
+async def knowledge_search(q: str, limit: int = 10):
+    """
+    Search verdicts stored in the cross-video knowledge base
+    
+    Input: GET /api/knowledge/search?q=vaccines cause autism&limit=10
+    Output: JSON with matches ranked by BM25, each with similarity, video ID and timestamp
+    """
+    results = await asyncio.to_thread(search_fact_checks, q, max(1, min(limit, 100)))
+    return {"success": True, "query": q, "results": results,
+            "stats": await asyncio.to_thread(knowledge_base_stats)}
+
+
+@router.get("/api/extraction/stats")
+async def extraction_status():
+    """
+    Latency estimates for RunPod claim extraction
+    
+    Output: JSON with EWMA/p95 latency per endpoint, hedge counts and heuristic fallbacks
+    """
+    return {"success": True, "extraction": extraction_stats()}
+
+
+@router.get("/api/rate-limits")
+async def rate_limit_status():
+    """
+    Provider rate limiter state
+    
+    Output: JSON per provider with bucket levels, queued calls per video, wait times, 429s and retries;
+    in worker mode also the same per worker process (each holds its share of the limits)
+    """
+    result = {"success": True, "providers": rate_limit_stats()}
+    if PIPELINE_MODE == "worker":
+        result["workers"] = await asyncio.to_thread(worker_rate_limit_stats)
+    return result
+
+
+@router.post("/api/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """
+    Submit a video for background processing
+    
+    Input: POST /api/jobs {"video_url": "...", "max_claims": N, "max_spend": USD}
+    Output: JSON with the job (id, status "queued"); poll GET /api/jobs/{id}
+    """
+    job = await submit_job(request.video_url, request.max_claims, request.max_spend)
+    return {"success": True, "job": job}
+
+
+@router.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    """
+    Job status, progress (0-100) and the result so far
+    
+    Output: JSON with the job and result.claim_responses for every claim checked yet
+    """
+    job = await asyncio.to_thread(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "job": job}
+
+
+@router.get("/api/jobs")
+async def jobs_list(limit: int = Query(50, ge=1, le=500), status: Optional[str] = None):
+    """Most recent jobs first, without results"""
+    return {"success": True, "jobs": await asyncio.to_thread(list_jobs, limit, status)}
+
+
+@router.get("/api/workers")
+async def worker_status():
+    """
+    Pipeline mode and worker queue state
+    
+    Output: JSON with the mode (inline/worker), runs per status and active workers with their running videos
+    """
+    return {"success": True, "workers": await asyncio.to_thread(work_queue_stats)}
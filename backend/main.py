@@ -10,20 +10,20 @@ load_dotenv()
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
-import asyncio
-from asyncio import Queue
 import os
 import json
 from datetime import datetime
 
 # Import services
 from services.endpoints_stream import router_stream
-from services.transcription_service import transcribe_from_url_streaming
-from services.claim_service import extract_claims_from_sentence
 from services.endpoints_sse import router_sse
-from services.fact_checking_service import fact_check_claim
+from services.jobs import start_job_workers, stop_job_workers
+from services.pipeline import DoneEvent, ErrorEvent, FactCheckEvent
+from services.providers import init_providers, close_providers
+from services.video_utils import extract_video_id
+from services.work_queue import new_pipeline
 from api.endpoints import router
 from models import ClaimResponse
 
@@ -64,6 +64,8 @@ app.include_router(router_sse)     # ✅ new SSE route
 
 @app.on_event("startup")
 async def startup_event():
+    await init_providers()
+    start_job_workers()
     logger.info("🚀 YouTube Fact-Checker API started successfully!")
     logger.info("📡 Ready to process videos at /api/process-video")
 
@@ -71,9 +73,11 @@ async def startup_event():
 @app.on_event("shutdown") 
 async def shutdown_event():
     logger.info("🛑 YouTube Fact-Checker API shutting down")
+    await stop_job_workers()
+    await close_providers()
 
 
-async def process_video(video_url: str) -> dict:
+async def process_video(video_url: str, max_claims: Optional[int] = None, max_spend_usd: Optional[float] = None) -> dict:
     """
     Complete video processing pipeline using all three services
     
@@ -82,76 +86,33 @@ async def process_video(video_url: str) -> dict:
     2. Extract claims from each sentence (RunPod Deep Cogito v2 70B)
     3. Fact-check each claim (ACI + OpenAI)
     4. Return structured JSON with ClaimResponse objects
+
+    The stages run concurrently in services.pipeline (shared with the SSE and
+    JSONL streams), in this process or a worker (PIPELINE_MODE); claim_responses
+    are returned in timestamp order.
+
+    With max_claims / max_spend_usd only the top-ranked claims are fact-checked;
+    the rest come back with status "skipped" and their priority score.
     """
     
     try:
-        logger.info(f"Processing video: {video_url}")
-        
-        # Queue for async processing
-        claim_queue = Queue()
-        fact_check_results = []
-        
-        # Producer: Stream sentences and extract claims
-        async def sentence_and_claim_worker():
-            claims_found = 0
-            sentences_processed = 0
-            
-            logger.info("🎵 Starting audio transcription...")
-            
-            # Stream sentences from transcription service
-            async for sentence in transcribe_from_url_streaming(video_url):
-                sentences_processed += 1
-                logger.info(f"📝 Sentence {sentences_processed}: '{sentence.text[:50]}...' (at {sentence.start}s)")
-                
-                # Extract claims from this sentence using RunPod
-                logger.info(f"🔍 Extracting claims from sentence {sentences_processed}...")
-                claims = await extract_claims_from_sentence(sentence)
-                
-                # Skip sentences with no claims
-                if not claims:
-                    logger.info(f"✅ No claims in sentence {sentences_processed} (expected for most sentences)")
-                    continue
-                
-                # Add each claim to queue for fact-checking
-                logger.info(f"🎯 Found {len(claims)} claims in sentence {sentences_processed}!")
-                for claim in claims:
-                    await claim_queue.put(claim)
-                    claims_found += 1
-                    logger.info(f"➕ Queued claim {claims_found}: '{claim.claim}' (at {claim.start}s)")
-            
-            # Signal that we're done adding claims
-            await claim_queue.put(None)
-            logger.info(f"🏁 Transcription complete! Processed {sentences_processed} sentences, found {claims_found} claims")
-        
-        # Consumer: Fact-check claims from queue
-        async def fact_check_worker():
-            fact_checks_completed = 0
-            
-            while True:
-                claim = await claim_queue.get()
-                
-                # Check for done signal
-                if claim is None:
-                    logger.info(f"🔚 Fact-checking complete! Processed {fact_checks_completed} claims")
-                    break
-                
-                fact_checks_completed += 1
-                logger.info(f"🔍 Fact-checking claim {fact_checks_completed}: '{claim.claim}' (at {claim.start}s)")
-                
-                # Fact-check the claim using ACI + OpenAI
-                logger.info(f"🌐 Gathering evidence for claim {fact_checks_completed}...")
-                fact_check_result = await fact_check_claim(claim)
-                fact_check_results.append(fact_check_result)
-                
-                logger.info(f"✅ Claim {fact_checks_completed} fact-checked: '{claim.claim}' -> {fact_check_result.status}")
-                logger.info(f"📊 Evidence found: {len(fact_check_result.evidence)} sources")
-        
-        # Run producer and consumer concurrently
-        await asyncio.gather(
-            sentence_and_claim_worker(),
-            fact_check_worker()
-        )
+        pipeline = new_pipeline(video_url, max_claims, max_spend_usd)
+        checked = []  # (timestamp, sentence, claim index) -> ClaimResponse
+        done = None
+        async for event in pipeline.events():
+            if isinstance(event, FactCheckEvent):
+                checked.append(((event.response.claim.start, event.sentence_id, event.index), event.response))
+            elif isinstance(event, ErrorEvent):
+                if event.scope == "pipeline":
+                    raise RuntimeError(event.message)
+                logger.warning(f"⚠️ {event.scope} error ignored in final result: {event.message}")
+            elif isinstance(event, DoneEvent):
+                done = event
+        if done is None:
+            raise RuntimeError("pipeline ended without a result")
         
+        # deterministic timestamp order regardless of which worker finished first
+        fact_check_results = [response for _, response in sorted(checked, key=lambda kr: kr[0])]
         logger.info(f"Video processing completed: {len(fact_check_results)} claims fact-checked")
 
         # Build result payload
@@ -161,6 +122,10 @@ async def process_video(video_url: str) -> dict:
             "title": "Processed Video",
             "total_claims": len(fact_check_results),
             "claim_responses": [result.dict() for result in fact_check_results],  # Full ClaimResponse objects
+            "transcript": done.transcript,  # source (cache/captions/whisper) and timings
+            "prefilter": done.prefilter,  # check-worthiness skip rate / savings
+            "budget": done.budget,  # per-video claim/spend cap and how many claims it skipped
+            "checkpoint": done.checkpoint,  # work reused from an interrupted earlier run
         }
 
         # Persist result JSON under repo root in /results
@@ -192,7 +157,7 @@ async def process_video(video_url: str) -> dict:
 
 def create_summary_from_responses(fact_check_results: List[ClaimResponse]) -> Dict[str, int]:
     """Create summary from ClaimResponse objects"""
-    summary = {"verified": 0, "false": 0, "disputed": 0, "inconclusive": 0}
+    summary = {"verified": 0, "false": 0, "disputed": 0, "inconclusive": 0, "skipped": 0}
     
     for result in fact_check_results:
         status = result.status  # Now just a string
@@ -200,15 +165,3 @@ def create_summary_from_responses(fact_check_results: List[ClaimResponse]) -> Di
             summary[status] += 1
     
     return summary
-
-
-def extract_video_id(video_url: str) -> str:
-    """Extract YouTube video ID from URL"""
-    try:
-        if "youtube.com/watch" in video_url:
-            return video_url.split("v=")[1].split("&")[0]
-        elif "youtu.be/" in video_url:
-            return video_url.split("youtu.be/")[1].split("?")[0]
-        return "unknown"
-    except:
-        return "unknown"
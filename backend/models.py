@@ -3,7 +3,7 @@ Pydantic data models for the YouTube Fact-Checker
 """
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from enum import Enum
 
@@ -16,6 +16,12 @@ class VideoRequest(BaseModel):
     video_url: str
 
 
+class JobRequest(VideoRequest):
+    """Request to process a video as a background job"""
+    max_claims: Optional[int] = Field(None, ge=0)  # per-video budget, see services/claim_budget.py
+    max_spend: Optional[float] = Field(None, ge=0)
+
+
 class Evidence(BaseModel):
     """Evidence for a fact-check"""
     source_url: str
@@ -35,13 +41,48 @@ class ClaimWithAllEvidence(BaseModel):
     evidence: List[Evidence] # list of all evidence for the claim; multiple sources
 
 
-class ClaimResponse(BaseModel):
-    """Final fact-check response with written summary"""
+class ClaimAnalysis(BaseModel):
+    """Fact-check verdict as returned by the analysis model (structured output schema)"""
     claim: Claim
-    status: str  # "verified", "false", "disputed", "inconclusive"
+    status: str  # "verified", "false", "disputed", "inconclusive" ("skipped" when over budget)
     written_summary: str  # Written explanation of the fact-check result
     evidence: List[Evidence]
 
+
+class IndexedClaimAnalysis(BaseModel):
+    """Verdict for one claim of a batched analysis, keyed by its position in the request"""
+    index: int
+    status: str  # "verified", "false", "disputed", "inconclusive"
+    written_summary: str
+    evidence: List[Evidence]
+
+
+class ClaimAnalysisBatch(BaseModel):
+    """Structured output schema for batched claim analysis"""
+    results: List[IndexedClaimAnalysis]
+
+
+class CacheInfo(BaseModel):
+    """Marks a fact-check served from the evidence cache or the knowledge base"""
+    source: str  # "exact", "similar" or "knowledge_base"
+    similarity: float
+    age_seconds: float
+    matched_claim: str  # claim text the cached verdict was computed for
+    video_id: Optional[str] = None  # video the verdict came from (knowledge base only)
+
+
+class ClaimResponse(ClaimAnalysis):
+    """Final fact-check response with written summary"""
+    cache: Optional[CacheInfo] = None  # set when the result came from the evidence cache or knowledge base
+    score: Optional[float] = None  # check-worthiness priority, set when a per-video budget is active
+
+class PlayheadUpdate(BaseModel):
+    """Viewer playback position reported by a client during a stream"""
+    position: float  # seconds into the video
+    playing: bool = True
+    rate: float = 1.0  # playback speed
+
+
 class Sentence(BaseModel):
     """A transcribed sentence with timestamp"""
     start: float  # Start time in seconds
@@ -0,0 +1,100 @@
+"""
+Evidence Strategy Benchmark - latency and cost per claim for each EVIDENCE_STRATEGY
+
+Runs gather_evidence_with_aci for every claim with both strategies (order
+alternates per claim so neither always hits a warm connection first) and prints
+one row per claim plus a summary.
+
+Usage (from backend/):
+    python scripts/benchmark_evidence.py --claims-file ../results/20250914T122533Z_khY9OYwoJek.json --limit 10
+    python scripts/benchmark_evidence.py "The Eiffel Tower is 330 metres tall."
+
+Cost = tool-selection tokens at GPT-4o prices + one EXA_AI call per claim.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Claim  # noqa: E402
+from services.fact_checking_service import EVIDENCE_FUNCTION, gather_evidence_with_aci  # noqa: E402
+from services.providers import close_providers, get_aci  # noqa: E402
+
+STRATEGIES = ("direct", "llm_tool")
+GPT4O_USD_PER_1M_INPUT = float(os.getenv("GPT4O_USD_PER_1M_INPUT", "2.50"))
+GPT4O_USD_PER_1M_OUTPUT = float(os.getenv("GPT4O_USD_PER_1M_OUTPUT", "10.00"))
+EXA_USD_PER_CALL = float(os.getenv("EXA_USD_PER_CALL", "0.005"))
+
+
+def load_claims(path: str, limit: int) -> list:
+    with open(path) as f:
+        data = json.load(f)
+    claims = [r["claim"]["claim"] for r in data.get("claim_responses", [])]
+    return claims[:limit]
+
+
+def cost_usd(usage: dict) -> float:
+    return (usage.get("prompt_tokens", 0) * GPT4O_USD_PER_1M_INPUT
+            + usage.get("completion_tokens", 0) * GPT4O_USD_PER_1M_OUTPUT) / 1e6 + EXA_USD_PER_CALL
+
+
+async def run(claims: list) -> dict:
+    # fetch the tool definition once so the first measured call doesn't pay for it
+    await get_aci().get_definition(EVIDENCE_FUNCTION)
+    rows = {s: [] for s in STRATEGIES}
+    print(f"{'#':>3}  {'strategy':<9} {'latency_s':>9} {'tokens':>7} {'cost_usd':>9} {'sources':>7}  claim")
+    for i, text in enumerate(claims):
+        order = STRATEGIES if i % 2 == 0 else tuple(reversed(STRATEGIES))
+        for strategy in order:
+            usage = {}
+            started = time.perf_counter()
+            result = await gather_evidence_with_aci(Claim(start=0.0, claim=text), strategy=strategy, usage=usage)
+            latency = time.perf_counter() - started
+            row = {"latency_s": latency, "tokens": sum(usage.values()), "cost_usd": cost_usd(usage),
+                   "sources": len(result.evidence)}
+            rows[strategy].append(row)
+            print(f"{i:>3}  {strategy:<9} {latency:>9.2f} {row['tokens']:>7} {row['cost_usd']:>9.5f} "
+                  f"{row['sources']:>7}  {text[:60]}")
+    return rows
+
+
+def summarize(rows: dict) -> None:
+    print()
+    print(f"{'strategy':<9} {'mean_s':>7} {'p50_s':>7} {'max_s':>7} {'mean_tokens':>11} {'mean_cost':>10} {'sources':>7}")
+    for strategy, results in rows.items():
+        if not results:
+            continue
+        latencies = [r["latency_s"] for r in results]
+        print(f"{strategy:<9} {statistics.mean(latencies):>7.2f} {statistics.median(latencies):>7.2f} "
+              f"{max(latencies):>7.2f} {statistics.mean(r['tokens'] for r in results):>11.0f} "
+              f"{statistics.mean(r['cost_usd'] for r in results):>10.5f} "
+              f"{statistics.mean(r['sources'] for r in results):>7.1f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare evidence search strategies per claim")
+    parser.add_argument("claims", nargs="*", help="claim texts to check")
+    parser.add_argument("--claims-file", help="result JSON with claim_responses (e.g. results/*.json)")
+    parser.add_argument("--limit", type=int, default=5, help="max claims taken from --claims-file")
+    args = parser.parse_args()
+
+    claims = list(args.claims)
+    if args.claims_file:
+        claims += load_claims(args.claims_file, args.limit)
+    if not claims:
+        parser.error("pass claim texts or --claims-file")
+
+    try:
+        summarize(await run(claims))
+    finally:
+        await close_providers()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
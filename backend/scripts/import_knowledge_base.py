@@ -0,0 +1,89 @@
+"""
+Knowledge Base Import - backfill stored verdicts from earlier result files
+
+Reads process-video payloads (video_id + claim_responses) and ingests every
+ClaimResponse into the knowledge base. Re-running is safe: entries already
+stored for the same video, timestamp and claim are skipped.
+
+Usage (from backend/):
+    python scripts/import_knowledge_base.py                 # results/, runs/, backend/video_analysis_*.json
+    python scripts/import_knowledge_base.py path/to/*.json  # specific files
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from models import ClaimResponse  # noqa: E402
+from services.knowledge_base import KNOWLEDGE_BASE_PATH, ingest_fact_check, knowledge_base_stats  # noqa: E402
+
+DEFAULT_PATTERNS = [
+    os.path.join(REPO_ROOT, "results", "*.json"),
+    os.path.join(REPO_ROOT, "runs", "*.json"),
+    os.path.join(BACKEND_DIR, "video_analysis_*.json"),
+]
+
+
+def file_timestamp(path: str) -> float:
+    """Run time from the file name (20250914T111621Z_..., ..._20250914-110407, ..._20250914_123611), else mtime."""
+    name = os.path.basename(path)
+    for pattern, fmt in ((r"(\d{8}T\d{6}Z)", "%Y%m%dT%H%M%SZ"), (r"(\d{8}-\d{6})", "%Y%m%d-%H%M%S"),
+                         (r"(\d{8}_\d{6})", "%Y%m%d_%H%M%S")):
+        match = re.search(pattern, name)
+        if match:
+            return datetime.strptime(match.group(1), fmt).replace(tzinfo=timezone.utc).timestamp()
+    return os.path.getmtime(path)
+
+
+def import_file(path: str) -> tuple:
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    video_id = payload.get("video_id") or "unknown"
+    created_at = file_timestamp(path)
+    added = skipped = 0
+    for raw in payload.get("claim_responses", []):
+        try:
+            response = ClaimResponse(**raw)
+        except Exception as e:
+            print(f"  ! skipping malformed claim response in {path}: {e}")
+            skipped += 1
+            continue
+        if ingest_fact_check(response, video_id, created_at):
+            added += 1
+        else:
+            skipped += 1
+    return added, skipped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill the fact-check knowledge base from result JSON files")
+    parser.add_argument("files", nargs="*", help="result files (default: results/, runs/, backend/video_analysis_*.json)")
+    args = parser.parse_args()
+
+    paths = args.files or sorted(p for pattern in DEFAULT_PATTERNS for p in glob.glob(pattern))
+    total_added = total_skipped = 0
+    for path in paths:
+        try:
+            added, skipped = import_file(path)
+        except (OSError, ValueError) as e:
+            print(f"! {path}: {e}")
+            continue
+        total_added += added
+        total_skipped += skipped
+        print(f"{os.path.relpath(path, REPO_ROOT)}: {added} added, {skipped} skipped")
+
+    stats = knowledge_base_stats()
+    print(f"\nImported {total_added} verdicts ({total_skipped} skipped) into {KNOWLEDGE_BASE_PATH}")
+    print(f"Knowledge base now holds {stats['entries']} verdicts from {stats['videos']} videos")
+
+
+if __name__ == "__main__":
+    main()
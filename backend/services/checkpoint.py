@@ -0,0 +1,228 @@
+"""
+Checkpoint - per-video stage checkpoints so an interrupted run resumes where it stopped
+
+While a video is processed, each stage appends its output to an append-only
+JSON-lines file, CHECKPOINT_DIR/<video_id>.jsonl:
+
+  {"kind": "window", ...}      raw Whisper result of one transcription window
+  {"kind": "claims", ...}      claims extracted from sentence N
+  {"kind": "fact_check", ...}  the finished ClaimResponse for claim i of sentence N
+
+If the process dies (crash, deploy, restart), the next run of the same video
+reads the file back. Whisper windows that were already transcribed are not sent
+again, sentences that were already extracted skip the LLM, and finished
+verdicts are replayed. Only the remaining work costs provider calls. A record
+is reused only if it matches the current input (window bounds, sentence
+timestamp and text, claim text); a record that cannot be parsed (torn line,
+missing field, invalid claim) is skipped and its work is redone. Skipped and technical-error results are not
+checkpointed, so they are retried. The file is deleted once the video
+completes; the transcript cache, evidence cache and knowledge base cover reuse
+after that.
+
+A checkpoint belongs to one run at a time. open_checkpoint() takes an exclusive
+lock on <video_id>.lock (flock, so it also holds across worker processes and is
+released if the process dies). A concurrent run of the same video gets no
+checkpoint and cannot append to or delete the owner's file. Taking the lock does
+not block; load() and the put_*/clear() writes are file I/O, which the pipeline
+runs through asyncio.to_thread.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: runs in other processes are not excluded
+    fcntl = None
+
+from models import Claim, ClaimResponse, Sentence
+from services.knowledge_base import is_error_result
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() in ("1", "true", "yes")
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "checkpoints"
+)
+
+# fields a record must have to be reused
+_RECORD_FIELDS = {
+    "window": ("index", "window", "segments", "words"),
+    "claims": ("sentence_id", "start", "text", "claims"),
+    "fact_check": ("sentence_id", "index", "response"),
+}
+
+_write_lock = threading.Lock()
+_held: Set[str] = set()  # video IDs whose checkpoint a run in this process owns
+
+
+class VideoCheckpoint:
+    def __init__(self, video_id: str):
+        safe_id = "".join(c for c in video_id if c.isalnum() or c in ("-", "_")) or "unknown"
+        self.safe_id = safe_id
+        self.path = os.path.join(CHECKPOINT_DIR, f"{safe_id}.jsonl")
+        self.lock_path = os.path.join(CHECKPOINT_DIR, f"{safe_id}.lock")
+        self._lock_fd: Optional[int] = None
+        self._windows: Dict[int, Dict[str, Any]] = {}
+        self._claims: Dict[int, Dict[str, Any]] = {}
+        self._fact_checks: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self.stats = {"windows": 0, "sentences": 0, "fact_checks": 0}
+
+    def acquire(self) -> bool:
+        """Become the only run that reads, appends to and clears this video's checkpoint."""
+        with _write_lock:
+            if self.safe_id in _held:
+                return False
+            if fcntl is not None:
+                os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+                fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    # the previous owner may have removed the lock file between our open and flock
+                    if os.fstat(fd).st_ino != os.stat(self.lock_path).st_ino:
+                        raise OSError("lock file replaced")
+                except OSError:
+                    os.close(fd)
+                    return False
+                self._lock_fd = fd
+            _held.add(self.safe_id)
+        return True
+
+    def release(self) -> None:
+        with _write_lock:
+            if self.safe_id not in _held:
+                return
+            _held.discard(self.safe_id)
+            if self._lock_fd is not None:
+                try:
+                    os.remove(self.lock_path)  # while still locked, so no one else holds the old inode
+                except OSError:
+                    pass
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def load(self) -> None:
+        """Read back what an interrupted run of this video saved."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            self._read()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Checkpoint read failed: {e}")
+
+    def _read(self) -> None:
+        skipped = 0
+        with open(self.path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    self._add_record(json.loads(line))
+                except (KeyError, TypeError, ValueError):
+                    skipped += 1  # torn last line from a crash mid-write, or a malformed record
+        logger.info(f"📌 Resuming from checkpoint {self.path}: {len(self._windows)} windows, "
+                    f"{len(self._claims)} sentences, {len(self._fact_checks)} fact-checks"
+                    + (f" ({skipped} unreadable records skipped)" if skipped else ""))
+
+    def _add_record(self, record: Dict[str, Any]) -> None:
+        """Index one record; raises KeyError/TypeError/ValueError if it is malformed."""
+        kind = record["kind"]
+        if kind not in _RECORD_FIELDS:
+            raise ValueError(f"unknown record kind {kind!r}")
+        missing = [name for name in _RECORD_FIELDS[kind] if name not in record]
+        if missing:
+            raise KeyError(missing[0])
+        if kind == "window":
+            self._windows[int(record["index"])] = record
+        elif kind == "claims":
+            record["claims"] = [Claim(**c) for c in record["claims"]]
+            self._claims[int(record["sentence_id"])] = record
+        else:
+            record["response"] = ClaimResponse(**record["response"])
+            self._fact_checks[(int(record["sentence_id"]), int(record["index"]))] = record
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with _write_lock:
+                os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            logger.warning(f"Checkpoint write failed: {e}")
+
+    # transcription windows (Whisper output shifted to the window start, before stitching)
+
+    def window(self, index: int, window: Tuple[float, float]) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        record = self._windows.get(index)
+        if record is None or [round(v, 3) for v in window] != record["window"]:
+            return None
+        self.stats["windows"] += 1
+        return record["segments"], record["words"]
+
+    def put_window(self, index: int, window: Tuple[float, float],
+                   segments: List[Dict[str, Any]], words: List[Dict[str, Any]]) -> None:
+        self._append({"kind": "window", "index": index, "window": [round(v, 3) for v in window],
+                      "segments": segments, "words": words})
+
+    # claims per sentence
+
+    def claims(self, sentence_id: int, sentence: Sentence) -> Optional[List[Claim]]:
+        record = self._claims.get(sentence_id)
+        if record is None or record["start"] != sentence.start or record["text"] != sentence.text:
+            return None
+        self.stats["sentences"] += 1
+        return list(record["claims"])
+
+    def put_claims(self, sentence_id: int, sentence: Sentence, claims: List[Claim]) -> None:
+        self._append({"kind": "claims", "sentence_id": sentence_id, "start": sentence.start,
+                      "text": sentence.text, "claims": [c.dict() for c in claims]})
+
+    # finished fact-checks
+
+    def fact_check(self, sentence_id: int, index: int, claim: Claim) -> Optional[ClaimResponse]:
+        record = self._fact_checks.get((sentence_id, index))
+        if record is None or record["response"].claim.claim != claim.claim:
+            return None
+        self.stats["fact_checks"] += 1
+        return record["response"]
+
+    def put_fact_check(self, sentence_id: int, index: int, response: ClaimResponse) -> None:
+        if response.status == "skipped" or is_error_result(response):
+            return
+        self._append({"kind": "fact_check", "sentence_id": sentence_id, "index": index,
+                      "response": response.dict()})
+
+    def clear(self) -> None:
+        """The video finished; drop its checkpoint."""
+        try:
+            with _write_lock:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"Checkpoint cleanup failed: {e}")
+
+    def report(self) -> Dict[str, int]:
+        """What this run reused from an earlier, interrupted one."""
+        return {f"resumed_{k}": v for k, v in self.stats.items()}
+
+
+def open_checkpoint(video_id: str) -> Optional[VideoCheckpoint]:
+    """
+    Lock the checkpoint for this video; call load() before using it and release()
+    when the run ends. None when disabled, when the video has no ID, or when
+    another run of the same video owns it.
+    """
+    if not CHECKPOINT_ENABLED or not video_id or video_id == "unknown":
+        return None
+    checkpoint = VideoCheckpoint(video_id)
+    try:
+        acquired = checkpoint.acquire()
+    except OSError as e:
+        logger.warning(f"Checkpoint lock failed: {e}")
+        return None
+    if not acquired:
+        logger.info(f"📌 Checkpoint for {video_id} is owned by another run; running without one")
+        return None
+    return checkpoint
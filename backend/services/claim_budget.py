@@ -0,0 +1,176 @@
+"""
+Claim Budget - per-video cap on fact-checks with top-k claim selection
+
+A budget is a maximum number of fact-checked claims, a maximum estimated
+spend (FACT_CHECK_USD_PER_CLAIM each), or both. Every claim gets a priority
+score built from check-worthiness (numerals, named entities, comparatives),
+specificity, and how often the video repeats it (near-duplicate frequency).
+
+Claims arrive while the video is still being transcribed, so selection runs
+online. A claim is checked right away if it ranks in the top-k of all claims
+seen so far and scores at least CLAIM_BUDGET_ADMIT_SCORE (so weak early claims
+don't use up the budget). Otherwise it is deferred. When the last claim is in, close()
+spends whatever budget is left on the best deferred claims, and everything
+else comes back as status "skipped" with its score. Verdicts already in the
+evidence cache or knowledge base cost nothing and never count against the
+budget. Verdicts restored from an interrupted run's checkpoint were paid for by
+that run, so fresh ones among them do count (reported as "resumed").
+"""
+
+import asyncio
+import logging
+import math
+import os
+import re
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from models import Claim, ClaimResponse
+from services.claim_service import check_worthiness_score
+from services.dedup_index import NearDupIndex, verdict_markers
+from services.fact_checking_service import CLAIM_DEDUP_THRESHOLD, lookup_known_fact_check
+
+logger = logging.getLogger(__name__)
+
+# Defaults for requests that don't set a budget; 0 means unlimited
+VIDEO_MAX_CLAIMS = int(os.getenv("VIDEO_MAX_CLAIMS", "0"))
+VIDEO_MAX_SPEND_USD = float(os.getenv("VIDEO_MAX_SPEND_USD", "0"))
+# Estimated cost of one fresh fact-check (GPT-4o analysis + EXA search, plus tool selection in llm_tool mode)
+FACT_CHECK_USD_PER_CLAIM = float(os.getenv("FACT_CHECK_USD_PER_CLAIM", "0.015"))
+# Claims scoring below this wait until the whole video is known before competing for the budget
+CLAIM_BUDGET_ADMIT_SCORE = float(os.getenv("CLAIM_BUDGET_ADMIT_SCORE", "0.5"))
+
+
+def specificity_score(text: str) -> float:
+    """Share of content words that are numerals, proper nouns or long (specific) words, in [0, 1]."""
+    words = re.findall(r"\b\w+\b", text)
+    if not words:
+        return 0.0
+    specific = sum(1 for i, w in enumerate(words)
+                   if any(ch.isdigit() for ch in w) or (i > 0 and w[0].isupper()) or len(w) >= 8)
+    return min(1.0, specific / len(words) * 2)
+
+
+def claim_priority_score(text: str, frequency: int = 1) -> float:
+    """Check-worthiness, specificity and repetition in the video, combined in [0, 1]."""
+    repetition = min(1.0, math.log2(max(1, frequency)) / 3)  # 8+ mentions saturate
+    return round(0.6 * check_worthiness_score(text) + 0.25 * specificity_score(text) + 0.15 * repetition, 4)
+
+
+class ClaimBudget:
+    def __init__(self, max_claims: Optional[int] = None, max_spend_usd: Optional[float] = None):
+        self.max_claims = VIDEO_MAX_CLAIMS if max_claims is None else max_claims
+        self.max_spend_usd = VIDEO_MAX_SPEND_USD if max_spend_usd is None else max_spend_usd
+        limits = []
+        if self.max_claims and self.max_claims > 0:
+            limits.append(self.max_claims)
+        if self.max_spend_usd and self.max_spend_usd > 0:
+            limits.append(int(self.max_spend_usd / FACT_CHECK_USD_PER_CLAIM))
+        self.limit: Optional[int] = min(limits) if limits else None
+        self._groups = NearDupIndex(threshold=CLAIM_DEDUP_THRESHOLD)
+        self._texts: List[str] = []
+        self._markers: List[Tuple[FrozenSet[str], FrozenSet[str]]] = []
+        self._frequency: List[int] = []
+        self._deferred: List[Tuple[int, asyncio.Future]] = []
+        self._closed = False
+        self.stats = {"checked": 0, "skipped": 0, "known": 0, "deferred": 0, "resumed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit is not None
+
+    def _group(self, claim: Claim) -> int:
+        # a negated or re-numbered variant is a different claim, not a repeat
+        markers = verdict_markers(claim.claim)
+        match = self._groups.query(claim.claim, accept=lambda g: self._markers[g] == markers)
+        if match:
+            return match[1]
+        group = len(self._texts)
+        self._groups.add(claim.claim, group)
+        self._texts.append(claim.claim)
+        self._markers.append(markers)
+        self._frequency.append(0)
+        return group
+
+    def observe(self, claim: Claim) -> None:
+        """Count every extracted claim (duplicates included) as soon as it is found."""
+        if self.enabled:
+            self._frequency[self._group(claim)] += 1
+
+    def _score(self, group: int) -> float:
+        return claim_priority_score(self._texts[group], self._frequency[group])
+
+    def _admit_now(self, group: int) -> bool:
+        mine = self._score(group)
+        if mine < CLAIM_BUDGET_ADMIT_SCORE:
+            return False
+        better = sum(1 for g in range(len(self._texts)) if g != group and self._score(g) > mine)
+        return better < self.limit
+
+    def _skipped(self, claim: Claim, score: float) -> ClaimResponse:
+        self.stats["skipped"] += 1
+        return ClaimResponse(
+            claim=claim,
+            status="skipped",
+            written_summary=f"Not fact-checked: outside this video's budget of {self.limit} claims "
+                            f"(priority score {score:.2f}).",
+            evidence=[],
+            score=score,
+        )
+
+    async def run(self, claim: Claim, fact_check: Callable[[Claim], Awaitable[ClaimResponse]]) -> ClaimResponse:
+        """Fact-check the claim if the budget allows it, possibly after deferring until close()."""
+        if not self.enabled:
+            return await fact_check(claim)
+        group = self._group(claim)
+
+        known = await lookup_known_fact_check(claim)
+        if known is not None:
+            self.stats["known"] += 1
+            return known.copy(update={"score": self._score(group)})
+
+        if self.stats["checked"] >= self.limit:
+            return self._skipped(claim, self._score(group))
+        if not self._closed and not self._admit_now(group):
+            self.stats["deferred"] += 1
+            fut = asyncio.get_running_loop().create_future()
+            self._deferred.append((group, fut))
+            if not await fut:
+                return self._skipped(claim, self._score(group))
+
+        self.stats["checked"] += 1
+        response = await fact_check(claim)
+        return response.copy(update={"score": self._score(group)})
+
+    def record_resumed(self, claim: Claim, response: ClaimResponse) -> ClaimResponse:
+        """Account for a verdict restored from a checkpoint instead of going through run()."""
+        self.stats["resumed"] += 1
+        if not self.enabled:
+            return response
+        if response.cache is None:
+            self.stats["checked"] += 1  # a fresh check the earlier run already spent budget on
+        else:
+            self.stats["known"] += 1
+        return response.copy(update={"score": self._score(self._group(claim))})
+
+    def close(self) -> None:
+        """All claims are known: spend the remaining budget on the best deferred claims, skip the rest."""
+        self._closed = True
+        if not self.enabled:
+            return
+        pending = sorted((d for d in self._deferred if not d[1].done()), key=lambda d: -self._score(d[0]))
+        remaining = max(0, self.limit - self.stats["checked"])
+        for i, (_, fut) in enumerate(pending):
+            fut.set_result(i < remaining)
+        self._deferred = []
+        logger.info(f"💰 Budget closed: {min(remaining, len(pending))} deferred claims released, "
+                    f"{max(0, len(pending) - remaining)} skipped")
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "limit": self.limit,
+            "max_claims": self.max_claims or None,
+            "max_spend_usd": self.max_spend_usd or None,
+            "usd_per_claim": FACT_CHECK_USD_PER_CLAIM,
+            "est_spend_usd": round(self.stats["checked"] * FACT_CHECK_USD_PER_CLAIM, 4),
+            **self.stats,
+        }
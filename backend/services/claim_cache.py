@@ -0,0 +1,134 @@
+"""
+Claim Cache - content-addressed cache for claim extraction results
+
+Keyed by a hash of the normalized sentence text plus the prompt/model version,
+so re-uploads, clips and reprocessing of the same speech never hit RunPod twice.
+Values are the already-filtered claim texts; callers re-attach Sentence.start.
+
+Two tiers: an in-memory LRU (CLAIM_CACHE_MEMORY_ENTRIES) in front of a
+persistent SQLite table (CLAIM_CACHE_PATH). The LRU is only touched on the
+event loop; the SQLite tier is read and written through asyncio.to_thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CLAIM_CACHE_ENABLED = os.getenv("CLAIM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CLAIM_CACHE_MEMORY_ENTRIES = int(os.getenv("CLAIM_CACHE_MEMORY_ENTRIES", "10000"))
+CLAIM_CACHE_PATH = os.getenv("CLAIM_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "claims.sqlite"
+)
+
+_memory: "OrderedDict[str, List[str]]" = OrderedDict()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+_db: Optional[sqlite3.Connection] = None
+_db_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def cache_key(text: str, version: str) -> str:
+    return hashlib.sha256(f"{version}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def _conn() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        os.makedirs(os.path.dirname(CLAIM_CACHE_PATH), exist_ok=True)
+        _db = sqlite3.connect(CLAIM_CACHE_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS claim_cache ("
+            " key TEXT PRIMARY KEY, claims TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        _db.commit()
+    return _db
+
+
+def _remember(key: str, claims: List[str]) -> None:
+    _memory[key] = claims
+    _memory.move_to_end(key)
+    while len(_memory) > CLAIM_CACHE_MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def _read_disk(key: str) -> Optional[List[str]]:
+    with _db_lock:
+        row = _conn().execute("SELECT claims FROM claim_cache WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _write_disk(key: str, claims: List[str]) -> None:
+    with _db_lock:
+        db = _conn()
+        db.execute(
+            "INSERT OR REPLACE INTO claim_cache (key, claims, created_at) VALUES (?, ?, ?)",
+            (key, json.dumps(claims, ensure_ascii=False), time.time()),
+        )
+        db.commit()
+
+
+async def get_cached_claims(text: str, version: str) -> Optional[List[str]]:
+    """Return cached claim texts for a sentence, or None on a miss."""
+    if not CLAIM_CACHE_ENABLED:
+        return None
+    key = cache_key(text, version)
+    claims = _memory.get(key)
+    if claims is not None:
+        _memory.move_to_end(key)
+        _stats["memory_hits"] += 1
+        return list(claims)
+
+    try:
+        claims = await asyncio.to_thread(_read_disk, key)
+    except Exception as e:
+        logger.warning(f"Claim cache lookup failed: {e}")
+        claims = None
+    if claims is None:
+        _stats["misses"] += 1
+        return None
+
+    _remember(key, claims)
+    _stats["disk_hits"] += 1
+    return list(claims)
+
+
+async def store_claims(text: str, version: str, claims: List[str]) -> None:
+    """Cache the filtered claim texts for a sentence (empty lists are cached too)."""
+    if not CLAIM_CACHE_ENABLED:
+        return
+    key = cache_key(text, version)
+    _remember(key, list(claims))
+    _stats["stores"] += 1
+    try:
+        await asyncio.to_thread(_write_disk, key, list(claims))
+    except Exception as e:
+        logger.warning(f"Claim cache store failed: {e}")
+
+
+def cache_stats() -> Dict[str, float]:
+    """Hit/miss counters and sizes for both tiers."""
+    lookups = _stats["memory_hits"] + _stats["disk_hits"] + _stats["misses"]
+    stats: Dict[str, float] = dict(_stats)
+    stats["lookups"] = lookups
+    stats["hit_rate"] = round((lookups - _stats["misses"]) / lookups, 4) if lookups else 0.0
+    stats["memory_entries"] = len(_memory)
+    try:
+        with _db_lock:
+            stats["disk_entries"] = _conn().execute("SELECT COUNT(*) FROM claim_cache").fetchone()[0]
+    except Exception:
+        stats["disk_entries"] = -1
+    return stats
@@ -4,13 +4,18 @@ Claim Extraction Service - RunPod Deep Cogito v2 70B Integration
 Extract factual claims from sentences using RunPod Deep Cogito v2 70B model.
 """
 
-from typing import List, Dict
+from typing import List, Optional
 import logging
 import os
 import json
-from openai import OpenAI
 from dotenv import load_dotenv
 from models import Claim, Sentence
+from services.claim_cache import get_cached_claims, store_claims
+from services.dedup_index import NearDupIndex
+from services.micro_batch import MicroBatcher
+from services.hedging import LatencyTracker, hedged_call
+from services.providers import get_runpod, get_runpod_hedge
+from services.rate_limiter import estimate_tokens, rate_limited
 import asyncio
 
 # Load environment variables
@@ -19,7 +24,6 @@ load_dotenv()
 
 # add near the top
 import re
-import string
 
 # ===== filters =====
 VAGUE = {"it","this","that","they","he","she","these","those"}
@@ -66,21 +70,17 @@ def _numeric_ok(claim: str, src: str) -> bool:
     nums = re.findall(r"\d[\d,.\-]*", claim)
     return all(n in src for n in nums)
 
-def _near_dup(s: str, kept: list) -> bool:
-    ta = set(_tokens(s))
-    for k in kept:
-        tb = set(_tokens(k))
-        if _jaccard(ta, tb) > 0.9:
-            return True
-    return False
-
 def _clean_end(s: str) -> str:
     s = s.strip()
     if s and s[-1].isalnum():
         s += "."
     return s
 
-def filter_claims(claims: list, source: str) -> list:
+NEAR_DUP_THRESHOLD = 0.9
+
+def filter_claims(claims: list, source: str, index: Optional[NearDupIndex] = None) -> list:
+    """Drop non-claims and ungrounded claims; near-duplicates are checked against `index` (per call by default)."""
+    index = index if index is not None else NearDupIndex(threshold=NEAR_DUP_THRESHOLD)
     out = []
     for c in claims:
         if _non_claim(c): continue
@@ -88,21 +88,160 @@ def filter_claims(claims: list, source: str) -> list:
         if _temporal_vague(c): continue
         if not _grounded(c, source): continue
         if not _numeric_ok(c, source): continue
-        if _near_dup(c, out): continue
+        if index.query(c): continue
+        index.add(c)
         out.append(_clean_end(c))
     return out
 
 
+# ===== check-worthiness prefilter =====
+# off: always call RunPod; shadow: call RunPod but record what would have been skipped; enforce: skip
+CLAIM_PREFILTER_MODE = os.getenv("CLAIM_PREFILTER_MODE", "shadow").lower()
+CLAIM_PREFILTER_THRESHOLD = float(os.getenv("CLAIM_PREFILTER_THRESHOLD", "0.35"))
+RUNPOD_USD_PER_1K_TOKENS = float(os.getenv("RUNPOD_USD_PER_1K_TOKENS", "0.001"))
+EXTRACTION_OVERHEAD_TOKENS = 240  # system prompt + instructions + max_tokens=150 reply
+
+COMPARATIVES = {"more","less","most","least","better","worse","best","worst","than","higher","lower",
+                "larger","smaller","bigger","fewer","increase","increased","decrease","decreased",
+                "percent","majority","minority","largest","smallest","fastest","oldest"}
+FILLER = ("hello","hi everyone","welcome","thank you","thanks for","subscribe","like and","let's get",
+          "i think","i feel","i believe","in my opinion","you know","okay so","alright")
+
+def check_worthiness_score(s: str) -> float:
+    """Cheap local score in [0, 1] for whether a sentence may contain a checkable claim."""
+    s = s.strip()
+    toks = _tokens(s)
+    low = s.lower()
+    if len(toks) < 3 or s.endswith("?"): return 0.0
+    if re.match(r"^\s*(please|do|make|tell|consider)\b", low): return 0.0
+    score = 0.4
+    score += 0.2 if _has_verb(toks) else -0.15
+    if re.search(r"\d", s) or set(toks) & {"hundred","thousand","million","billion","percent"}: score += 0.25
+    # capitalized words after the first token look like named entities
+    caps = sum(1 for w in re.findall(r"\b\w+", s)[1:] if w[0].isupper() and w.lower() not in VAGUE)
+    if caps: score += 0.15 + (0.05 if caps > 1 else 0.0)
+    if set(toks) & COMPARATIVES or any(t.endswith("est") and len(t) > 5 for t in toks): score += 0.1
+    if _ambiguous(s): score -= 0.25
+    if _temporal_vague(s): score -= 0.1
+    if any(low.startswith(f) or f" {f}" in low for f in FILLER): score -= 0.3
+    return max(0.0, min(1.0, score))
+
+def new_prefilter_stats() -> dict:
+    """
+    Per-video counters for the prefilter; pass to extract_claims_batched and report with prefilter_report.
+
+    llm_* and shadow_* count fresh model output only. Claims served from the claim
+    cache or by the heuristic fallback are counted under cache_* / heuristic_*, so
+    they don't skew the shadow recall used to decide on enforce mode.
+    """
+    return {"mode": CLAIM_PREFILTER_MODE, "threshold": CLAIM_PREFILTER_THRESHOLD, "sentences": 0,
+            "below_threshold": 0, "skipped": 0, "est_tokens_saved": 0,
+            "llm_sentences": 0, "llm_claims": 0, "shadow_missed_sentences": 0, "shadow_missed_claims": 0,
+            "cache_sentences": 0, "cache_claims": 0, "heuristic_sentences": 0, "heuristic_claims": 0}
+
+def prefilter_report(stats: dict) -> dict:
+    """Skip rate, estimated savings and (shadow mode) claim recall for one video."""
+    sentences = max(1, stats["sentences"])
+    report = dict(stats)
+    report["skip_rate"] = round(stats["below_threshold"] / sentences, 4)
+    report["est_cost_saved_usd"] = round(stats["est_tokens_saved"] / 1000.0 * RUNPOD_USD_PER_1K_TOKENS, 6)
+    if stats["mode"] == "shadow" and stats["llm_claims"]:
+        report["shadow_recall"] = round(1 - stats["shadow_missed_claims"] / stats["llm_claims"], 4)
+    return report
+
+
 
 logger = logging.getLogger(__name__)
 
+RUNPOD_MODEL = "deepcogito/cogito-v2-preview-llama-70B"
+CLAIM_SYSTEM_PROMPT = (
+    "You extract factual claims from text. A claim is any statement that can be verified as true or false. "
+    "Extract ALL factual statements, even controversial ones."
+)
+# Bump CLAIM_PROMPT_VERSION whenever the prompts or filter_claims change so cached results are not reused
+CLAIM_PROMPT_VERSION = "v1"
+CLAIM_CACHE_VERSION = f"{CLAIM_PROMPT_VERSION}:{RUNPOD_MODEL}"
+
+# ===== latency budget / hedging =====
+CLAIM_LATENCY_BUDGET_S = float(os.getenv("CLAIM_LATENCY_BUDGET_S", "8"))
+CLAIM_BATCH_LATENCY_BUDGET_S = float(os.getenv("CLAIM_BATCH_LATENCY_BUDGET_S", "15"))
+CLAIM_HEDGE_ENABLED = os.getenv("CLAIM_HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+extraction_latency = LatencyTracker(initial_seconds=float(os.getenv("CLAIM_HEDGE_INITIAL_DELAY_S", "3")))
+extraction_fallbacks = {"heuristic": 0}
+
+
+async def _runpod_hedged(request: dict, endpoint: str, budget: float):
+    """Send one RunPod chat completion, hedged against the backup endpoint after its p95 delay."""
+    tokens = estimate_tokens(request["messages"], request["max_tokens"])
+    attempts = [(endpoint, lambda: rate_limited(
+        "runpod", lambda: get_runpod().chat.completions.create(**request), tokens))]
+    if CLAIM_HEDGE_ENABLED:
+        attempts.append((f"{endpoint}-hedge", lambda: rate_limited(
+            "runpod", lambda: get_runpod_hedge().chat.completions.create(**request), tokens)))
+    return await hedged_call(attempts, budget, extraction_latency)
+
+
+def heuristic_extract_claims(sentence: Sentence) -> List[Claim]:
+    """
+    Local fallback when RunPod misses its latency budget: split the sentence into
+    clauses and keep the ones that pass check_worthiness_score and filter_claims.
+    """
+    text = sentence.text.strip()
+    clauses = [c.strip() for c in re.split(r"[;:]|,\s+(?:but|while|whereas|and)\s+", text) if c.strip()]
+    for candidates in (clauses, [text]):
+        worthy = [c for c in candidates if check_worthiness_score(c) >= CLAIM_PREFILTER_THRESHOLD]
+        claim_texts = filter_claims(worthy, text)
+        if claim_texts:
+            return [Claim(start=sentence.start, claim=c) for c in claim_texts]
+    return []
+
+
+def _fallback_claims(sentence: Sentence, error: Exception) -> List[Claim]:
+    extraction_fallbacks["heuristic"] += 1
+    claims = heuristic_extract_claims(sentence)
+    logger.warning(f"⏱️ RunPod extraction unavailable ({error or 'latency budget exhausted'}); "
+                   f"heuristic extractor found {len(claims)} claims at {sentence.start}s")
+    return claims
+
+
+def extraction_stats() -> dict:
+    """EWMA latency per RunPod endpoint plus hedge and fallback counters."""
+    return {**extraction_latency.snapshot(), "heuristic_fallbacks": extraction_fallbacks["heuristic"],
+            "budget_seconds": CLAIM_LATENCY_BUDGET_S, "hedge_enabled": CLAIM_HEDGE_ENABLED}
+
 
 async def extract_claims_from_sentence(sentence: Sentence) -> List[Claim]:
     """
-    Extract verifiable claims from a sentence using Deep Cogito v2 70B
+    Extract verifiable claims from a sentence using Deep Cogito v2 70B,
+    served from the claim cache when the same text was extracted before.
+    If RunPod fails or misses CLAIM_LATENCY_BUDGET_S, heuristic_extract_claims
+    answers instead (those results are not cached).
+    
+    Args:
+        sentence: Sentence object with start time and text
+        
+    Returns:
+        List[Claim]: List of Claim objects with start time and claim text
+    """
+    cached = await get_cached_claims(sentence.text, CLAIM_CACHE_VERSION)
+    if cached is not None:
+        return [Claim(start=sentence.start, claim=c) for c in cached]
+    try:
+        claims = await _extract_claims_uncached(sentence)
+    except Exception as e:
+        return _fallback_claims(sentence, e)
+    await store_claims(sentence.text, CLAIM_CACHE_VERSION, [c.claim for c in claims])
+    return claims
+
+
+async def _extract_claims_uncached(sentence: Sentence, budget: Optional[float] = None) -> List[Claim]:
+    """
+    Extract verifiable claims from a sentence using Deep Cogito v2 70B (one hedged RunPod call)
     
     Args:
         sentence: Sentence object with start time and text
+        budget: latency budget in seconds (default CLAIM_LATENCY_BUDGET_S)
         
     Returns:
         List[Claim]: List of Claim objects with start time and claim text
@@ -111,48 +250,35 @@ async def extract_claims_from_sentence(sentence: Sentence) -> List[Claim]:
     text = sentence.text
     
     try:
-        # RunPod OpenAI-compatible client (from docs)
-        client = OpenAI(
-            api_key=os.getenv("RUNPOD_API_KEY"),
-            base_url="https://api.runpod.ai/v2/deep-cogito-v2-llama-70b/openai/v1"
-        )
-        
-        # Call RunPod to extract claims with timeout off the event loop thread
-        def _runpod_call():
-            return client.chat.completions.create(
-                model="deepcogito/cogito-v2-preview-llama-70B",
-                messages=[
-                    {"role": "system", "content": "You extract factual claims from text. A claim is any statement that can be verified as true or false. Extract ALL factual statements, even controversial ones."},
-                    {"role": "user", "content": f"Extract factual claims from this text: '{text}'\n\nReturn JSON with claims array. Example: {{\"claims\": [\"vaccines cause autism\", \"the Earth is flat\"]}}"}
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "claims_extraction",
-                        "strict": True,
-                        "schema": {
-                            "type": "object",
-                            "properties": {
-                                "claims": {
-                                    "type": "array",
-                                    "items": {"type": "string"}
-                                }
-                            },
-                            "required": ["claims"],
-                            "additionalProperties": False
-                        }
+        request = dict(
+            model=RUNPOD_MODEL,
+            messages=[
+                {"role": "system", "content": CLAIM_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Extract factual claims from this text: '{text}'\n\nReturn JSON with claims array. Example: {{\"claims\": [\"vaccines cause autism\", \"the Earth is flat\"]}}"}
+            ],
+            response_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "claims_extraction",
+                    "strict": True,
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "claims": {
+                                "type": "array",
+                                "items": {"type": "string"}
+                            }
+                        },
+                        "required": ["claims"],
+                        "additionalProperties": False
                     }
-                },
-                max_tokens=150,
-                temperature=0.1,
-                timeout=2,
-            )
+                }
+            },
+            max_tokens=150,
+            temperature=0.1,
+        )
 
-        try:
-            response = await asyncio.wait_for(asyncio.to_thread(_runpod_call), timeout=25)
-        except asyncio.TimeoutError:
-            logger.error("RunPod extraction timed out; using mock extractor")
-            return mock_extract_claims(text, sentence.start)
+        response = await _runpod_hedged(request, "runpod", CLAIM_LATENCY_BUDGET_S if budget is None else budget)
         
         # Parse response and create Claim objects
         result_text = response.choices[0].message.content
@@ -174,6 +300,162 @@ async def extract_claims_from_sentence(sentence: Sentence) -> List[Claim]:
         return claims
         
     except Exception as e:
-        logger.error(f"RunPod extraction failed: {e}")
-        raise RuntimeError(f"RunPod extraction failed: {e}")
-        
\ No newline at end of file
+        logger.error(f"RunPod extraction failed: {e or type(e).__name__}")
+        raise RuntimeError(f"RunPod extraction failed: {e or type(e).__name__}")
+        
+
+# ===== micro-batching =====
+CLAIM_BATCH_SIZE = int(os.getenv("CLAIM_BATCH_SIZE", "8"))
+CLAIM_BATCH_MAX_WAIT_MS = float(os.getenv("CLAIM_BATCH_MAX_WAIT_MS", "300"))
+
+
+async def extract_claims_batch(sentences: List[Sentence]) -> list:
+    """
+    Extract claims for several sentences with one RunPod request.
+
+    The model returns claims per sentence index; each list is run through
+    filter_claims against its own sentence and mapped to that Sentence.start.
+    Sentences the model skipped are asked for again, concurrently, within what is
+    left of CLAIM_BATCH_LATENCY_BUDGET_S, so the whole batch stays within it.
+
+    Returns one entry per sentence: List[Claim], or an Exception for that sentence.
+    """
+    if len(sentences) == 1:
+        try:
+            return [await _extract_claims_uncached(sentences[0])]
+        except Exception as e:
+            return [e]
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + CLAIM_BATCH_LATENCY_BUDGET_S
+    numbered = "\n".join(f"{i}: '{s.text}'" for i, s in enumerate(sentences))
+
+    try:
+        request = dict(
+            model=RUNPOD_MODEL,
+            messages=[
+                {"role": "system", "content": CLAIM_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Extract factual claims from each numbered sentence:\n{numbered}\n\nReturn JSON with a results array holding one entry per sentence index. Example: {{\"results\": [{{\"index\": 0, \"claims\": [\"vaccines cause autism\"]}}, {{\"index\": 1, \"claims\": []}}]}}"}
+            ],
+            response_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "batched_claims_extraction",
+                    "strict": True,
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "results": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "index": {"type": "integer"},
+                                        "claims": {"type": "array", "items": {"type": "string"}}
+                                    },
+                                    "required": ["index", "claims"],
+                                    "additionalProperties": False
+                                }
+                            }
+                        },
+                        "required": ["results"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            max_tokens=150 * len(sentences),
+            temperature=0.1,
+        )
+
+        response = await _runpod_hedged(request, "runpod-batch", CLAIM_BATCH_LATENCY_BUDGET_S)
+        result = json.loads(response.choices[0].message.content)
+        logger.info(f"RunPod batch response for {len(sentences)} sentences: {result}")
+    except Exception as e:
+        logger.error(f"RunPod batch extraction failed: {e or type(e).__name__}")
+        return [RuntimeError(f"RunPod extraction failed: {e or type(e).__name__}")] * len(sentences)
+
+    by_index = {}
+    for entry in result.get("results", []):
+        idx = entry.get("index")
+        if isinstance(idx, int) and 0 <= idx < len(sentences):
+            by_index.setdefault(idx, []).extend(entry.get("claims", []))
+
+    missing = [i for i in range(len(sentences)) if i not in by_index]
+    retried = {}
+    if missing:
+        # the model skipped these sentences; ask for each on its own, all at once
+        remaining = min(CLAIM_LATENCY_BUDGET_S, deadline - loop.time())
+        if remaining > 0:
+            results = await asyncio.gather(*(_extract_claims_uncached(sentences[i], remaining) for i in missing),
+                                           return_exceptions=True)
+        else:
+            results = [RuntimeError("RunPod extraction failed: batch latency budget exhausted")] * len(missing)
+        retried = dict(zip(missing, results))
+
+    out = []
+    for i, sentence in enumerate(sentences):
+        if i in retried:
+            out.append(retried[i])
+            continue
+        claim_texts = filter_claims(by_index[i], sentence.text)
+        out.append([Claim(start=sentence.start, claim=c) for c in claim_texts])
+    logger.info(f"Batch extracted {sum(len(c) for c in out if isinstance(c, list))} claims from {len(sentences)} sentences")
+    return out
+
+
+_claim_batcher = MicroBatcher(
+    extract_claims_batch,
+    max_size=CLAIM_BATCH_SIZE,
+    max_wait=CLAIM_BATCH_MAX_WAIT_MS / 1000.0,
+    name="claim extraction",
+)
+
+
+async def extract_claims_batched(sentence: Sentence, stats: Optional[dict] = None) -> List[Claim]:
+    """
+    Drop-in replacement for extract_claims_from_sentence that coalesces concurrent
+    calls into batched RunPod requests (CLAIM_BATCH_SIZE / CLAIM_BATCH_MAX_WAIT_MS).
+
+    Sentences are scored with check_worthiness_score first. In "enforce" mode those
+    below CLAIM_PREFILTER_THRESHOLD never reach RunPod; in "shadow" mode they still do,
+    and `stats` records whether the skip would have lost claims.
+
+    RunPod failures and latency-budget misses fall back to heuristic_extract_claims.
+    """
+    below = False
+    if CLAIM_PREFILTER_MODE != "off":
+        below = check_worthiness_score(sentence.text) < CLAIM_PREFILTER_THRESHOLD
+        if stats is not None:
+            stats["sentences"] += 1
+            stats["below_threshold"] += int(below)
+        if below and CLAIM_PREFILTER_MODE == "enforce":
+            if stats is not None:
+                stats["skipped"] += 1
+                stats["est_tokens_saved"] += len(sentence.text) // 4 + EXTRACTION_OVERHEAD_TOKENS
+            logger.info(f"⏭️ Prefilter skipped sentence at {sentence.start}s: '{sentence.text[:50]}...'")
+            return []
+
+    cached = await get_cached_claims(sentence.text, CLAIM_CACHE_VERSION)
+    if cached is not None:
+        claims = [Claim(start=sentence.start, claim=c) for c in cached]
+        source = "cache"
+    else:
+        try:
+            if CLAIM_BATCH_SIZE <= 1:
+                claims = await _extract_claims_uncached(sentence)
+            else:
+                claims = await _claim_batcher.submit(sentence)
+        except Exception as e:
+            claims = _fallback_claims(sentence, e)
+            source = "heuristic"
+        else:
+            await store_claims(sentence.text, CLAIM_CACHE_VERSION, [c.claim for c in claims])
+            source = "llm"
+
+    if stats is not None:
+        stats[f"{source}_sentences"] += 1
+        stats[f"{source}_claims"] += len(claims)
+        if source == "llm" and below and claims:
+            stats["shadow_missed_sentences"] += 1
+            stats["shadow_missed_claims"] += len(claims)
+    return claims
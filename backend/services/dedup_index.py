@@ -0,0 +1,130 @@
+"""
+Near-Duplicate Index - MinHash + LSH banding over claim token sets (or token shingles)
+
+Replaces pairwise Jaccard scans: each stored text keeps its token set and a
+MinHash signature split into bands. A lookup only compares against texts that
+share at least one band bucket, so its cost stays roughly flat no matter how
+many claims are stored. Candidates are confirmed with exact Jaccard on the
+precomputed token sets.
+"""
+
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+NEGATIONS = {"not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "cannot"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def token_set(text: str) -> FrozenSet[str]:
+    return frozenset(re.findall(r"\w+", text.lower()))
+
+
+def shingle_set(text: str, size: int = 2) -> FrozenSet[str]:
+    """Overlapping word n-grams; unlike token_set, word order and adjacency count."""
+    tokens = re.findall(r"\w+", text.lower())
+    if len(tokens) <= size:
+        return frozenset([" ".join(tokens)])
+    return frozenset(" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+
+def verdict_markers(text: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Numbers and negations in a claim; near-duplicates that differ in these can have opposite verdicts."""
+    words = re.findall(r"[\w']+", text.lower().replace("’", "'"))
+    negations = frozenset("not" if w.endswith("n't") else w for w in words if w in NEGATIONS or w.endswith("n't"))
+    return frozenset(re.findall(r"\d[\d,.]*", text)), negations
+
+
+def _token_hash(token: str) -> int:
+    # stable across processes (unlike hash()), so signatures could be persisted
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class NearDupIndex:
+    """
+    Index of texts for near-duplicate lookup at a Jaccard `threshold`.
+
+    num_perm = bands * rows MinHash permutations; more bands (fewer rows) raise
+    recall for pairs below the threshold, at the cost of more candidates to verify.
+    shingle_size > 1 compares word n-grams instead of single tokens.
+    """
+
+    def __init__(self, threshold: float = 0.9, bands: int = 16, rows: int = 4, seed: int = 1,
+                 shingle_size: int = 1):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        num_perm = bands * rows
+        self._perms = [(rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+                       for _ in range(num_perm)]
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [defaultdict(list) for _ in range(bands)]
+        self._tokens: Dict[int, FrozenSet[str]] = {}
+        self._values: Dict[int, Any] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def _features(self, text: str) -> FrozenSet[str]:
+        return token_set(text) if self.shingle_size <= 1 else shingle_set(text, self.shingle_size)
+
+    def _signature(self, tokens: FrozenSet[str]) -> List[int]:
+        hashes = [_token_hash(t) for t in tokens] or [0]
+        return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, ...]]:
+        return [tuple(signature[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def query(self, text: str, accept: Optional[Callable[[Any], bool]] = None) -> Optional[Tuple[int, Any, float]]:
+        """
+        Best stored match with Jaccard >= threshold as (id, value, similarity), else None.
+        With `accept`, only entries whose value passes accept(value) are considered.
+        """
+        tokens = self._features(text)
+        candidates = set()
+        for band, key in enumerate(self._band_keys(self._signature(tokens))):
+            candidates.update(self._buckets[band].get(key, ()))
+        best = None
+        for idx in candidates:
+            other = self._tokens[idx]
+            sim = len(tokens & other) / max(1, len(tokens | other))
+            if sim < self.threshold or (best is not None and sim <= best[2]):
+                continue
+            if accept is None or accept(self._values[idx]):
+                best = (idx, self._values[idx], sim)
+        return best
+
+    def add(self, text: str, value: Any = None) -> int:
+        """Store a text (with an optional payload) and return its id."""
+        tokens = self._features(text)
+        idx = self._next_id
+        self._next_id += 1
+        self._tokens[idx] = tokens
+        self._values[idx] = value
+        for band, key in enumerate(self._band_keys(self._signature(tokens))):
+            self._buckets[band][key].append(idx)
+        return idx
+
+    def set_value(self, idx: int, value: Any) -> None:
+        self._values[idx] = value
+
+    def remove(self, idx: int) -> None:
+        """Forget a stored text; unknown ids are ignored."""
+        tokens = self._tokens.pop(idx, None)
+        if tokens is None:
+            return
+        self._values.pop(idx, None)
+        for band, key in enumerate(self._band_keys(self._signature(tokens))):
+            bucket = self._buckets[band].get(key)
+            if bucket is None:
+                continue
+            if idx in bucket:
+                bucket.remove(idx)
+            if not bucket:
+                del self._buckets[band][key]
@@ -1,11 +1,14 @@
 # services/endpoints_sse.py
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
-import asyncio, json, logging, itertools, hashlib
+import asyncio, json, logging
 
-from services.transcription_service import transcribe_from_url_streaming
-from services.claim_service import extract_claims_from_sentence
-from services.fact_checking_service import fact_check_claim
+from models import PlayheadUpdate
+from services.pipeline import event_payload
+from services.playhead_scheduler import get_stream_scheduler, register_stream, unregister_stream
+from services.single_flight import Flight, join_flight, leave_flight
+from services.video_utils import extract_video_id
+from services.work_queue import new_pipeline
 
 router_sse = APIRouter()
 logger = logging.getLogger(__name__)
@@ -19,104 +22,66 @@ def sse_pack(data: dict, event: str | None = None) -> bytes:
     lines.append("")
     return ("\n".join(lines)).encode("utf-8")
 
-def _make_claim_id(start: float, text: str) -> str:
-    raw = f"{start:.2f}::{text}"
-    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+async def _run_pipeline(url: str, flight: Flight, max_claims: int | None = None, max_spend: float | None = None):
+    """Run the pipeline for one video, publishing its events into the flight."""
+    pipeline = new_pipeline(url, max_claims, max_spend, playhead=True)
+    async for event in pipeline.events():
+        flight.publish(event_payload(event), event.type)
+
 
 @router_sse.get("/api/process-video/sse")
-async def process_video_sse(url: str = Query(..., alias="url")):
+async def process_video_sse(
+    url: str = Query(..., alias="url"),
+    max_claims: int | None = Query(None, ge=0, description="Fact-check at most this many claims (0 = unlimited)"),
+    max_spend: float | None = Query(None, ge=0, description="Estimated spend cap in USD (0 = unlimited)"),
+):
     """
     SSE stream:
       event: start/sentence/claim/fact_check/done/error
       data:  JSON payload
-    """
-    async def event_gen():
-        out_q: asyncio.Queue[bytes] = asyncio.Queue()
-        tasks = []
-        FC_CONCURRENCY = 3
-        fc_sema = asyncio.Semaphore(FC_CONCURRENCY)
-        sent_id_counter = itertools.count(1)
-
-        async def emit(ev: dict, event: str | None = None):
-            await out_q.put(sse_pack(ev, event))
 
-        async def do_fact_check(claim_id, claim):
-            try:
-                async with fc_sema:
-                    fc = await fact_check_claim(claim)
-                await emit({
-                    "type": "fact_check",
-                    "claim_id": claim_id,
-                    "start": getattr(fc.claim, "start", claim.start),
-                    "claim": getattr(fc.claim, "claim", claim.claim),
-                    "status": getattr(fc, "status", "inconclusive"),
-                    "summary": getattr(fc, "written_summary", "") or getattr(fc, "summary", ""),
-                    "evidence": [
-                        {
-                            "title": getattr(e, "source_title", ""),
-                            "url": getattr(e, "source_url", ""),
-                            "snippet": getattr(e, "snippet", "")
-                        } for e in (getattr(fc, "evidence", []) or [])
-                    ]
-                }, event="fact_check")
-            except Exception as e:
-                logger.exception("fact_check failed")
-                await emit({"type": "error", "scope": "fact_check", "message": str(e), "claim_id": claim_id}, event="error")
+    The start event carries a stream_id; POST the viewer's position to
+    /api/process-video/sse/{stream_id}/playhead to reprioritize pending fact-checks.
 
-        async def do_claims_for_sentence(sentence, sentence_id):
-            try:
-                claims = await extract_claims_from_sentence(sentence)
-                for claim in claims:
-                    claim_id = _make_claim_id(claim.start, claim.claim)
-                    await emit({
-                        "type": "claim",
-                        "claim_id": claim_id,
-                        "sentence_id": sentence_id,
-                        "start": claim.start,
-                        "claim": claim.claim,
-                        "status": "checking"
-                    }, event="claim")
-                    tasks.append(asyncio.create_task(do_fact_check(claim_id, claim)))
-            except Exception as e:
-                logger.exception("claims failed")
-                await emit({"type": "error", "scope": "claims", "message": str(e)}, event="error")
+    Concurrent requests for the same video share one pipeline run (single flight);
+    late viewers get a replay of the events so far, then the live stream. Every
+    viewer gets its own stream_id, and claims just ahead of any viewer go first.
 
-        async def producer():
-            await emit({"type": "start", "url": url}, event="start")
-            async for sentence in transcribe_from_url_streaming(url):
-                sentence_id = next(sent_id_counter)
-                await emit({
-                    "type": "sentence",
-                    "sentence_id": sentence_id,
-                    "start": sentence.start,
-                    "text": sentence.text
-                }, event="sentence")
-                tasks.append(asyncio.create_task(do_claims_for_sentence(sentence, sentence_id)))
-                await asyncio.sleep(0)
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
-            await emit({"type": "done"}, event="done")
-
-        prod_task = asyncio.create_task(producer())
+    max_claims / max_spend set a per-video budget: only the top-ranked claims
+    are fact-checked and the rest arrive with status "skipped" and their score.
+    """
+    video_id = extract_video_id(url)
+    flight_key = video_id if video_id != "unknown" else url
+    if max_claims is not None or max_spend is not None:
+        # a different budget gives different results, so it must not share a run
+        flight_key = f"{flight_key}|claims={max_claims}|spend={max_spend}"
 
+    async def event_gen():
+        flight, q = join_flight(flight_key, lambda f: _run_pipeline(url, f, max_claims, max_spend))
+        viewer_id = None
         try:
             while True:
-                if prod_task.done() and out_q.empty():
-                    break
                 try:
-                    item = await asyncio.wait_for(out_q.get(), timeout=0.5)
-                    # yield *bytes*, not str
-                    yield item
+                    item = await asyncio.wait_for(q.get(), timeout=0.5)
                 except asyncio.TimeoutError:
                     # Optionally send a comment heartbeat:
                     # yield b": keep-alive\n\n"
                     continue
+                if item is None:
+                    break
+                event, data = item
+                if event == "start" and viewer_id is None:
+                    # this viewer's own playhead channel on the flight's scheduler
+                    scheduler = get_stream_scheduler(data.get("stream_id") or "")
+                    if scheduler is not None:
+                        viewer_id = register_stream(scheduler)[0]
+                        data = {**data, "stream_id": viewer_id}
+                # yield *bytes*, not str
+                yield sse_pack(data, event)
         finally:
-            for t in tasks:
-                if not t.done():
-                    t.cancel()
-            if not prod_task.done():
-                prod_task.cancel()
+            if viewer_id:
+                unregister_stream(viewer_id)
+            leave_flight(flight, q)
 
     # Important headers for SSE
     headers = {
@@ -125,3 +90,19 @@ async def process_video_sse(url: str = Query(..., alias="url")):
         "X-Accel-Buffering": "no",  # helps if behind proxies (no buffering)
     }
     return StreamingResponse(event_gen(), media_type="text/event-stream", headers=headers)
+
+
+@router_sse.post("/api/process-video/sse/{stream_id}/playhead")
+async def update_playhead(stream_id: str, update: PlayheadUpdate):
+    """
+    Side channel for an SSE stream: report the viewer's playback position
+    (on seek, pause, rate change, or as a heartbeat) so claims just ahead
+    of it are fact-checked first.
+    """
+    scheduler = get_stream_scheduler(stream_id)
+    if scheduler is None:
+        raise HTTPException(status_code=404, detail="Unknown or finished stream")
+    scheduler.update_playhead(update.position, update.playing, update.rate, viewer=stream_id)
+    report = scheduler.report()
+    return {"success": True, "stream_id": stream_id, "playhead": round(scheduler.playhead(stream_id), 2),
+            "viewers": report["viewers"], "waiting": report["waiting"]}
@@ -1,13 +1,11 @@
 # --- add to an API file (e.g., api/endpoints_stream.py) or main, and include router if needed ---
 from fastapi import APIRouter, Body
 from fastapi.responses import StreamingResponse
-import asyncio
 import json
 import logging
 
-from services.transcription_service import transcribe_from_url_streaming  # yields Sentence(start, text)
-from services.claim_service import extract_claims_from_sentence
-from services.fact_checking_service import fact_check_claim
+from services.pipeline import event_payload
+from services.work_queue import new_pipeline
 
 router_stream = APIRouter()
 logger = logging.getLogger(__name__)
@@ -19,7 +17,11 @@ def _jsonl(obj: dict) -> str:
 async def process_video_stream(payload: dict = Body(...)):
     """
     Streams JSON lines as the pipeline progresses:
-    sentence -> claim(s) -> fact_check (per claim)
+    start -> sentence -> claim(s) -> fact_check (per claim) -> done
+
+    Fact-checks run concurrently, so fact_check lines can arrive out of claim
+    order; match them by claim_id. The start line carries a stream_id for
+    playhead updates (POST /api/process-video/sse/{stream_id}/playhead).
     """
     video_url = payload.get("url")
     if not video_url:
@@ -27,44 +29,9 @@ async def process_video_stream(payload: dict = Body(...)):
                                  media_type="application/jsonl")
 
     async def event_gen():
-        try:
-            # Tell client we started
-            yield _jsonl({"type": "start", "url": video_url})
-
-            async for sentence in transcribe_from_url_streaming(video_url):
-                # 1) Sentence
-                yield _jsonl({"type": "sentence", "start": sentence.start, "text": sentence.text})
-
-                # 2) Claims from sentence
-                claims = await extract_claims_from_sentence(sentence)
-                for claim in claims:
-                    yield _jsonl({"type": "claim", "start": claim.start, "claim": claim.claim})
-
-                    # 3) Fact-check claim (serial for now; see parallel note below)
-                    fc = await fact_check_claim(claim)
-                    out = {
-                        "type": "fact_check",
-                        "start": getattr(fc.claim, "start", claim.start),
-                        "claim": getattr(fc.claim, "claim", claim.claim),
-                        "status": getattr(fc, "status", "inconclusive"),
-                        "summary": getattr(fc, "written_summary", "") or getattr(fc, "summary", ""),
-                        "evidence": [
-                            {
-                                "title": getattr(e, "source_title", ""),
-                                "url": getattr(e, "source_url", ""),
-                                "snippet": getattr(e, "snippet", ""),
-                            } for e in getattr(fc, "evidence", []) or []
-                        ],
-                    }
-                    yield _jsonl(out)
-
-                # Give the event loop a chance to flush
-                await asyncio.sleep(0)
-
-            yield _jsonl({"type": "done"})
-        except Exception as e:
-            logger.exception("Streaming pipeline failed")
-            yield _jsonl({"type": "error", "message": str(e)})
+        pipeline = new_pipeline(video_url, playhead=True)
+        async for event in pipeline.events():
+            yield _jsonl(event_payload(event))
 
     return StreamingResponse(event_gen(), media_type="application/jsonl")
 
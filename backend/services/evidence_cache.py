@@ -0,0 +1,195 @@
+"""
+Evidence Cache - persistent cache in front of fact_check_claim
+
+Stores the gathered ClaimWithAllEvidence and the final ClaimResponse per claim
+in SQLite (EVIDENCE_CACHE_PATH), keyed by normalized claim text. Lookups first
+try the exact key, then the closest stored claim in a word-shingle
+NearDupIndex at EVIDENCE_CACHE_SIMILARITY. A near match is only reused when it
+mentions the same numbers and the same negation, since those flip verdicts.
+
+Entries expire after EVIDENCE_CACHE_TTL_HOURS so time-sensitive verdicts are
+re-checked. The similarity index keeps each claim's timestamp and only matches
+unexpired ones, and an expired entry is deleted when a lookup finds it.
+
+The functions here are synchronous; fact_check_claim runs them through asyncio.to_thread.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from models import CacheInfo, Claim, ClaimResponse, ClaimWithAllEvidence
+from services.dedup_index import NearDupIndex, verdict_markers
+
+logger = logging.getLogger(__name__)
+
+EVIDENCE_CACHE_ENABLED = os.getenv("EVIDENCE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EVIDENCE_CACHE_TTL_HOURS = float(os.getenv("EVIDENCE_CACHE_TTL_HOURS", "24"))
+EVIDENCE_CACHE_SIMILARITY = float(os.getenv("EVIDENCE_CACHE_SIMILARITY", "0.75"))
+EVIDENCE_CACHE_PATH = os.getenv("EVIDENCE_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "evidence.sqlite"
+)
+
+_stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "expired": 0, "stores": 0}
+_db: Optional[sqlite3.Connection] = None
+_index: Optional[NearDupIndex] = None  # values are (key, created_at, verdict_markers(claim))
+_index_ids: Dict[str, int] = {}  # key -> id in _index
+_db_lock = threading.Lock()
+
+
+def _key(claim_text: str) -> str:
+    # case, whitespace and punctuation do not change a claim
+    normalized = " ".join(re.findall(r"\w+", claim_text.lower()))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _ttl_seconds() -> float:
+    return EVIDENCE_CACHE_TTL_HOURS * 3600.0
+
+
+def _conn() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        os.makedirs(os.path.dirname(EVIDENCE_CACHE_PATH), exist_ok=True)
+        _db = sqlite3.connect(EVIDENCE_CACHE_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS evidence_cache ("
+            " key TEXT PRIMARY KEY, claim TEXT NOT NULL, evidence TEXT NOT NULL,"
+            " response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        _db.commit()
+    return _db
+
+
+def _similarity_index() -> NearDupIndex:
+    """Shingle index over unexpired claims; built from SQLite on first use (caller holds _db_lock)."""
+    global _index
+    if _index is None:
+        _index = NearDupIndex(threshold=EVIDENCE_CACHE_SIMILARITY, shingle_size=2)
+        _index_ids.clear()
+        db = _conn()
+        db.execute("DELETE FROM evidence_cache WHERE created_at < ?", (time.time() - _ttl_seconds(),))
+        db.commit()
+        for key, claim, created_at in db.execute("SELECT key, claim, created_at FROM evidence_cache"):
+            _index_ids[key] = _index.add(claim, (key, created_at, verdict_markers(claim)))
+        logger.info(f"🗄️ Evidence cache loaded {len(_index)} claims from {EVIDENCE_CACHE_PATH}")
+    return _index
+
+
+def _drop_expired(key: str) -> None:
+    """Forget an expired entry (caller holds _db_lock)."""
+    db = _conn()
+    db.execute("DELETE FROM evidence_cache WHERE key = ?", (key,))
+    db.commit()
+    if key in _index_ids:
+        _similarity_index().remove(_index_ids.pop(key))
+
+
+def get_cached_fact_check(claim: Claim) -> Optional[Tuple[ClaimWithAllEvidence, ClaimResponse]]:
+    """
+    Cached evidence and verdict for a claim (exact or similar), re-attached to this
+    claim and marked with CacheInfo; None on a miss.
+    """
+    if not EVIDENCE_CACHE_ENABLED:
+        return None
+    expired = False
+    try:
+        with _db_lock:
+            db = _conn()
+            select = "SELECT claim, evidence, response, created_at FROM evidence_cache WHERE key = ?"
+            source, similarity = "exact", 1.0
+            key = _key(claim.claim)
+            row = db.execute(select, (key,)).fetchone()
+            if row is not None and time.time() - row[3] > _ttl_seconds():
+                _drop_expired(key)
+                row, expired = None, True
+            if row is None:
+                cutoff = time.time() - _ttl_seconds()
+                markers = verdict_markers(claim.claim)
+                stale = []
+
+                def usable(value) -> bool:
+                    # only unexpired entries with the same numbers and negations can match
+                    if value[1] < cutoff:
+                        stale.append(value[0])
+                        return False
+                    return value[2] == markers
+
+                match = _similarity_index().query(claim.claim, accept=usable)
+                for stale_key in stale:
+                    _drop_expired(stale_key)
+                if match:
+                    source, similarity, row = "similar", match[2], db.execute(select, (match[1][0],)).fetchone()
+    except Exception as e:
+        logger.warning(f"Evidence cache lookup failed: {e}")
+        row = None
+
+    if row is None:
+        if expired:
+            _stats["expired"] += 1
+        _stats["misses"] += 1
+        return None
+    matched_claim, evidence_json, response_json, created_at = row
+    age = time.time() - created_at
+
+    _stats[f"{source}_hits"] += 1
+    evidence = ClaimWithAllEvidence(**json.loads(evidence_json))
+    evidence = evidence.copy(update={"start": claim.start, "claim": claim})
+    response = ClaimResponse(**json.loads(response_json))
+    response = response.copy(update={
+        "claim": claim,
+        "cache": CacheInfo(source=source, similarity=round(similarity, 4),
+                           age_seconds=round(age, 1), matched_claim=matched_claim),
+    })
+    logger.info(f"🗄️ Evidence cache {source} hit for '{claim.claim}' (similarity {similarity:.2f}, age {age:.0f}s)")
+    return evidence, response
+
+
+def store_fact_check(evidence: ClaimWithAllEvidence, response: ClaimResponse) -> None:
+    """Cache the evidence and verdict for evidence.claim (replaces an older entry for the same text)."""
+    if not EVIDENCE_CACHE_ENABLED:
+        return
+    claim_text = evidence.claim.claim
+    key = _key(claim_text)
+    try:
+        with _db_lock:
+            db = _conn()
+            index = _similarity_index()
+            now = time.time()
+            db.execute(
+                "INSERT OR REPLACE INTO evidence_cache (key, claim, evidence, response, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, claim_text, evidence.json(), response.copy(update={"cache": None}).json(), now),
+            )
+            db.commit()
+            value = (key, now, verdict_markers(claim_text))
+            if key in _index_ids:
+                index.set_value(_index_ids[key], value)
+            else:
+                _index_ids[key] = index.add(claim_text, value)
+        _stats["stores"] += 1
+    except Exception as e:
+        logger.warning(f"Evidence cache store failed: {e}")
+
+
+def cache_stats() -> Dict[str, float]:
+    """Hit/miss counters and entry count."""
+    lookups = _stats["exact_hits"] + _stats["similar_hits"] + _stats["misses"]
+    stats: Dict[str, float] = dict(_stats)
+    stats["lookups"] = lookups
+    stats["hit_rate"] = round((lookups - _stats["misses"]) / lookups, 4) if lookups else 0.0
+    stats["ttl_hours"] = EVIDENCE_CACHE_TTL_HOURS
+    stats["similarity_threshold"] = EVIDENCE_CACHE_SIMILARITY
+    try:
+        with _db_lock:
+            stats["entries"] = _conn().execute("SELECT COUNT(*) FROM evidence_cache").fetchone()[0]
+    except Exception:
+        stats["entries"] = -1
+    return stats
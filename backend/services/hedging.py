@@ -0,0 +1,120 @@
+"""
+Hedged Requests - latency-budgeted calls with a backup request for slow tails
+
+LatencyTracker keeps an exponentially weighted mean/variance of successful call
+latency per endpoint. hedged_call() starts the primary attempt, fires the next
+attempt once the primary has run longer than its estimated p95, returns the first
+success, cancels the losers and gives up when the overall budget is spent.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    def __init__(self, alpha: float = 0.2, initial_seconds: float = 3.0, min_hedge_seconds: float = 0.5):
+        self.alpha = alpha
+        self.initial_seconds = initial_seconds
+        self.min_hedge_seconds = min_hedge_seconds
+        self._mean: Dict[str, float] = {}
+        self._var: Dict[str, float] = {}
+        self._count: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {"calls": 0, "hedges": 0, "hedge_wins": 0, "budget_exhausted": 0}
+
+    def observe(self, endpoint: str, seconds: float) -> None:
+        if endpoint not in self._mean:
+            self._mean[endpoint], self._var[endpoint] = seconds, 0.0
+        else:
+            diff = seconds - self._mean[endpoint]
+            incr = self.alpha * diff
+            self._mean[endpoint] += incr
+            self._var[endpoint] = (1 - self.alpha) * (self._var[endpoint] + diff * incr)
+        self._count[endpoint] = self._count.get(endpoint, 0) + 1
+
+    def p95(self, endpoint: str) -> float:
+        if endpoint not in self._mean:
+            return self.initial_seconds
+        return self._mean[endpoint] + 1.645 * math.sqrt(self._var[endpoint])
+
+    def hedge_delay(self, endpoint: str) -> float:
+        return max(self.min_hedge_seconds, self.p95(endpoint))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "endpoints": {
+                name: {
+                    "ewma_seconds": round(self._mean[name], 3),
+                    "p95_seconds": round(self.p95(name), 3),
+                    "samples": self._count.get(name, 0),
+                }
+                for name in self._mean
+            },
+            **self.counters,
+        }
+
+
+async def hedged_call(attempts: List[Tuple[str, Callable[[], Awaitable[Any]]]],
+                      budget: float, tracker: LatencyTracker) -> Any:
+    """
+    Run attempts[0]; launch each following (endpoint, factory) attempt when the
+    previous one exceeds its p95 estimate (or fails). First success wins.
+
+    Raises asyncio.TimeoutError when `budget` seconds pass without a success, or the
+    last error if every attempt failed.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget
+    tasks: Dict[asyncio.Task, int] = {}
+    errors: List[BaseException] = []
+    next_attempt = 0
+    tracker.counters["calls"] += 1
+
+    async def timed(endpoint: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        result = await factory()
+        tracker.observe(endpoint, time.monotonic() - started)
+        return result
+
+    def launch() -> float:
+        nonlocal next_attempt
+        endpoint, factory = attempts[next_attempt]
+        if next_attempt > 0:
+            tracker.counters["hedges"] += 1
+            logger.info(f"🪃 Hedging request to {endpoint}")
+        tasks[asyncio.create_task(timed(endpoint, factory))] = next_attempt
+        next_attempt += 1
+        return loop.time() + tracker.hedge_delay(endpoint)
+
+    try:
+        hedge_at = launch()
+        while True:
+            now = loop.time()
+            if now >= deadline:
+                tracker.counters["budget_exhausted"] += 1
+                raise asyncio.TimeoutError(f"latency budget of {budget:.1f}s exhausted")
+            can_hedge = next_attempt < len(attempts)
+            if not tasks:
+                if not can_hedge:
+                    raise errors[-1]
+                hedge_at = launch()
+                continue
+            wait_until = min(deadline, hedge_at) if can_hedge else deadline
+            done, _ = await asyncio.wait(tasks, timeout=max(0.0, wait_until - now),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = tasks.pop(task)
+                if task.exception() is None:
+                    tracker.counters["hedge_wins"] += int(index > 0)
+                    return task.result()
+                errors.append(task.exception())
+                logger.warning(f"Attempt on {attempts[index][0]} failed: {task.exception()}")
+            if not done and can_hedge and loop.time() >= hedge_at:
+                hedge_at = launch()
+    finally:
+        for task in tasks:
+            task.cancel()
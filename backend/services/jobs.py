@@ -0,0 +1,305 @@
+"""
+Jobs - submit/poll video processing on a bounded background worker pool
+
+POST /api/jobs stores a job and returns its ID right away; JOB_WORKERS background
+workers run the pipeline for queued jobs in submission order, so the server
+decides how many videos are processed at once and clients may disconnect.
+
+Job state lives in SQLite (JOBS_DB_PATH) in a processing_jobs table with the
+columns of supabase/migrations (status queued/in_progress/completed/failed,
+progress 0-100, error_message, metadata JSON, started_at/completed_at/created_at).
+video_id holds the YouTube ID since there is no local videos table. Each
+verdict is appended to job_results as it arrives, so a poll returns partial
+results. Jobs that were in progress when the server stopped are queued again on
+startup. A run that ends without a DoneEvent is marked failed.
+
+The database functions are synchronous; async code (the workers and the
+endpoints) calls them through asyncio.to_thread so SQLite never blocks the
+event loop.
+
+Progress is an estimate, since the video length is unknown until transcription
+ends. Transcription accounts for up to 45%, approaching it as sentences arrive,
+and fact-checks for 50% as the share of found claims already checked. Progress
+never goes down.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.pipeline import ClaimEvent, DoneEvent, ErrorEvent, FactCheckEvent, SentenceEvent, StageEvent
+from services.video_utils import extract_video_id
+from services.work_queue import new_pipeline
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = max(1, int(os.getenv("JOB_WORKERS", "2")))
+JOB_PROGRESS_INTERVAL_S = float(os.getenv("JOB_PROGRESS_INTERVAL_S", "1"))
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "jobs.sqlite"
+)
+
+JOB_TYPE = "process_video"
+ACTIVE_STATUSES = ("queued", "in_progress")
+
+_db: Optional[sqlite3.Connection] = None
+_db_lock = threading.Lock()
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _conn() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        os.makedirs(os.path.dirname(JOBS_DB_PATH), exist_ok=True)
+        _db = sqlite3.connect(JOBS_DB_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS processing_jobs ("
+            " id TEXT PRIMARY KEY, video_id TEXT, job_type TEXT NOT NULL,"
+            " status TEXT DEFAULT 'queued' CHECK (status IN ('queued', 'in_progress', 'completed', 'failed')),"
+            " progress INTEGER DEFAULT 0 CHECK (progress >= 0 AND progress <= 100),"
+            " error_message TEXT, metadata TEXT DEFAULT '{}',"
+            " started_at TEXT, completed_at TEXT, created_at TEXT NOT NULL)"
+        )
+        _db.execute("CREATE INDEX IF NOT EXISTS idx_processing_jobs_video_status ON processing_jobs(video_id, status)")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS job_results ("
+            " job_id TEXT NOT NULL REFERENCES processing_jobs(id) ON DELETE CASCADE,"
+            " claim_id TEXT NOT NULL, start REAL NOT NULL, sentence_id INTEGER NOT NULL, idx INTEGER NOT NULL,"
+            " response TEXT NOT NULL, PRIMARY KEY (job_id, sentence_id, idx))"
+        )
+        _db.commit()
+    return _db
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job_id, video_id, job_type, status, progress, error, metadata, started, completed, created = row
+    return {"id": job_id, "video_id": video_id, "job_type": job_type, "status": status, "progress": progress,
+            "error_message": error, "metadata": json.loads(metadata or "{}"),
+            "started_at": started, "completed_at": completed, "created_at": created}
+
+
+def _fetch_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with _db_lock:
+        row = _conn().execute("SELECT * FROM processing_jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def _update_job(job_id: str, **fields: Any) -> None:
+    if "metadata" in fields:
+        fields["metadata"] = json.dumps(fields["metadata"], ensure_ascii=False)
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    with _db_lock:
+        db = _conn()
+        db.execute(f"UPDATE processing_jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+        db.commit()
+
+
+def _store_result(job_id: str, event: FactCheckEvent) -> None:
+    with _db_lock:
+        db = _conn()
+        db.execute(
+            "INSERT OR REPLACE INTO job_results (job_id, claim_id, start, sentence_id, idx, response)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, event.claim_id, event.response.claim.start, event.sentence_id, event.index,
+             json.dumps(event.response.dict(), ensure_ascii=False)),
+        )
+        db.commit()
+
+
+def _job_results(job_id: str) -> List[Dict[str, Any]]:
+    with _db_lock:
+        rows = _conn().execute(
+            "SELECT response FROM job_results WHERE job_id = ? ORDER BY start, sentence_id, idx", (job_id,)
+        ).fetchall()
+    return [json.loads(response) for (response,) in rows]
+
+
+def _insert_job(params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+    """(job, created): an identical active job if there is one, else a newly stored one."""
+    video_id = extract_video_id(params["video_url"])
+    with _db_lock:
+        db = _conn()
+        for row in db.execute(
+            "SELECT * FROM processing_jobs WHERE video_id = ? AND status IN (?, ?) ORDER BY created_at",
+            (video_id, *ACTIVE_STATUSES),
+        ).fetchall():
+            job = _row_to_job(row)
+            if job["metadata"].get("params") == params:
+                logger.info(f"🔁 Reusing active job {job['id']} for {video_id}")
+                return job, False
+        job_id = str(uuid.uuid4())
+        db.execute(
+            "INSERT INTO processing_jobs (id, video_id, job_type, metadata, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, video_id, JOB_TYPE, json.dumps({"params": params}), _now()),
+        )
+        db.commit()
+    return _fetch_job(job_id), True
+
+
+async def submit_job(video_url: str, max_claims: Optional[int] = None,
+                     max_spend: Optional[float] = None) -> Dict[str, Any]:
+    """Queue a video; an identical job that is still queued or running is returned instead of a new one."""
+    params = {"video_url": video_url, "max_claims": max_claims, "max_spend": max_spend}
+    job, created = await asyncio.to_thread(_insert_job, params)
+    if created:
+        if _queue is not None:
+            _queue.put_nowait(job["id"])
+        logger.info(f"📥 Queued job {job['id']} for {video_url}")
+    return job
+
+
+def get_job(job_id: str, include_results: bool = True) -> Optional[Dict[str, Any]]:
+    """Job state plus the result so far (claim_responses in timestamp order)."""
+    job = _fetch_job(job_id)
+    if job is None or not include_results:
+        return job
+    claim_responses = _job_results(job_id)
+    summary = job["metadata"].get("summary", {})
+    job["result"] = {
+        "video_id": job["video_id"],
+        "video_url": job["metadata"]["params"]["video_url"],
+        "title": "Processed Video",
+        "total_claims": len(claim_responses),
+        "claim_responses": claim_responses,
+        **summary,
+    }
+    return job
+
+
+def list_jobs(limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    query, params = "SELECT * FROM processing_jobs", []
+    if status:
+        query += " WHERE status = ?"
+        params.append(status)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    with _db_lock:
+        rows = _conn().execute(query, (*params, limit)).fetchall()
+    return [_row_to_job(row) for row in rows]
+
+
+class _Progress:
+    """Monotonic progress estimate from the pipeline events seen so far."""
+
+    def __init__(self):
+        self.sentences = 0
+        self.claims = 0
+        self.checked = 0
+        self.transcribed = False
+        self.value = 1
+
+    def observe(self, event) -> int:
+        if isinstance(event, SentenceEvent):
+            self.sentences += 1
+        elif isinstance(event, ClaimEvent):
+            self.claims += 1
+        elif isinstance(event, FactCheckEvent):
+            self.checked += 1
+        elif isinstance(event, StageEvent) and event.stage == "transcription":
+            self.transcribed = True
+        transcript = 1.0 if self.transcribed else 1 - math.exp(-self.sentences / 150)
+        checks = self.checked / self.claims if self.claims else 0.0
+        self.value = max(self.value, min(99, int(1 + 45 * transcript + 50 * checks)))
+        return self.value
+
+
+def _start_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Mark a queued job in progress and drop results left over from an interrupted run; None if not queued."""
+    job = _fetch_job(job_id)
+    if job is None or job["status"] != "queued":
+        return None
+    with _db_lock:
+        db = _conn()
+        db.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+        db.commit()
+    _update_job(job_id, status="in_progress", progress=1, started_at=_now(), error_message=None)
+    return job
+
+
+async def _run_job(job_id: str) -> None:
+    job = await asyncio.to_thread(_start_job, job_id)
+    if job is None:
+        return
+    params = job["metadata"]["params"]
+    logger.info(f"🏃 Job {job_id} started for {params['video_url']}")
+
+    progress = _Progress()
+    last_write = 0.0
+    failed = None
+    done = False
+    pipeline = new_pipeline(params["video_url"], params.get("max_claims"), params.get("max_spend"))
+    async for event in pipeline.events():
+        value = progress.observe(event)
+        if isinstance(event, FactCheckEvent):
+            await asyncio.to_thread(_store_result, job_id, event)
+        elif isinstance(event, ErrorEvent) and event.scope == "pipeline":
+            failed = event.message
+        elif isinstance(event, DoneEvent):
+            done = True
+            job["metadata"]["summary"] = {"transcript": event.transcript, "prefilter": event.prefilter,
+                                          "budget": event.budget, "checkpoint": event.checkpoint}
+        if time.monotonic() - last_write >= JOB_PROGRESS_INTERVAL_S:
+            await asyncio.to_thread(_update_job, job_id, progress=value)
+            last_write = time.monotonic()
+
+    if failed is None and not done:
+        failed = "pipeline ended without a result"
+    if failed is not None:
+        await asyncio.to_thread(_update_job, job_id, status="failed", error_message=failed, completed_at=_now())
+        logger.error(f"❌ Job {job_id} failed: {failed}")
+    else:
+        await asyncio.to_thread(_update_job, job_id, status="completed", progress=100,
+                                metadata=job["metadata"], completed_at=_now())
+        logger.info(f"✅ Job {job_id} completed ({progress.checked} claims)")
+
+
+async def _worker() -> None:
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _run_job(job_id)
+        except asyncio.CancelledError:
+            # server shutting down: leave it for the next start
+            await asyncio.to_thread(_update_job, job_id, status="queued", progress=0)
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job_id} crashed")
+            await asyncio.to_thread(_update_job, job_id, status="failed", error_message=str(e),
+                                    completed_at=_now())
+
+
+def start_job_workers() -> None:
+    """Start the worker pool and queue every unfinished job (interrupted ones start over)."""
+    global _queue
+    _queue = asyncio.Queue()
+    with _db_lock:
+        db = _conn()
+        interrupted = db.execute("UPDATE processing_jobs SET status = 'queued', progress = 0"
+                                 " WHERE status = 'in_progress'").rowcount
+        db.commit()
+        pending = [job_id for (job_id,) in db.execute(
+            "SELECT id FROM processing_jobs WHERE status = 'queued' ORDER BY created_at").fetchall()]
+    for job_id in pending:
+        _queue.put_nowait(job_id)
+    _workers[:] = [asyncio.create_task(_worker()) for _ in range(JOB_WORKERS)]
+    logger.info(f"👷 {JOB_WORKERS} job workers started ({len(pending)} queued, {interrupted} resumed)")
+
+
+async def stop_job_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
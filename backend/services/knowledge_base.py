@@ -0,0 +1,176 @@
+"""
+Knowledge Base - cross-video store of fact-check verdicts with full-text search
+
+Every fresh ClaimResponse is ingested with its evidence, video ID and timestamp
+into SQLite (KNOWLEDGE_BASE_PATH), and the claim text is indexed with FTS5.
+fact_check_claim consults it before any ACI/OpenAI call: BM25 ranks the
+candidates, then the best one is reused only if its token Jaccard similarity is
+at least KNOWLEDGE_BASE_MIN_SIMILARITY and it has the same numbers and
+negations.
+
+Unlike the evidence cache it keeps verdicts indefinitely for search
+(KNOWLEDGE_BASE_MAX_AGE_DAYS=0), but fact_check_claim only reuses verdicts
+younger than EVIDENCE_CACHE_TTL_HOURS, so a time-sensitive verdict that expired
+from the cache is checked again. Existing result files are loaded with
+scripts/import_knowledge_base.py.
+
+The functions here are synchronous; async callers run them through asyncio.to_thread.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from models import CacheInfo, Claim, ClaimResponse
+from services.dedup_index import token_set, verdict_markers
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_BASE_ENABLED = os.getenv("KNOWLEDGE_BASE_ENABLED", "true").lower() in ("1", "true", "yes")
+KNOWLEDGE_BASE_MIN_SIMILARITY = float(os.getenv("KNOWLEDGE_BASE_MIN_SIMILARITY", "0.75"))
+KNOWLEDGE_BASE_MAX_AGE_DAYS = float(os.getenv("KNOWLEDGE_BASE_MAX_AGE_DAYS", "0"))  # 0 = keep forever (search)
+KNOWLEDGE_BASE_CANDIDATES = 20
+KNOWLEDGE_BASE_PATH = os.getenv("KNOWLEDGE_BASE_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "knowledge.sqlite"
+)
+
+STOPWORDS = {"the", "a", "an", "of", "and", "or", "to", "in", "on", "for", "is", "are", "was", "were",
+             "be", "by", "with", "that", "this", "it", "as", "at", "from"}
+
+_stats = {"lookups": 0, "hits": 0, "ingested": 0}
+_db: Optional[sqlite3.Connection] = None
+_db_lock = threading.Lock()
+
+
+def _conn() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        os.makedirs(os.path.dirname(KNOWLEDGE_BASE_PATH), exist_ok=True)
+        _db = sqlite3.connect(KNOWLEDGE_BASE_PATH, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS fact_checks ("
+            " id INTEGER PRIMARY KEY, claim TEXT NOT NULL, status TEXT NOT NULL,"
+            " written_summary TEXT NOT NULL, evidence TEXT NOT NULL, video_id TEXT NOT NULL,"
+            " start REAL NOT NULL, created_at REAL NOT NULL, UNIQUE (video_id, start, claim))"
+        )
+        _db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS fact_checks_fts USING fts5(claim, content='fact_checks', content_rowid='id')")
+        _db.commit()
+    return _db
+
+
+def is_error_result(response: ClaimResponse) -> bool:
+    # "Could not fact-check/analyze this claim due to technical error." carries no verdict
+    return response.written_summary.startswith("Could not") and "technical error" in response.written_summary
+
+
+def _match_query(text: str) -> Optional[str]:
+    tokens = [t for t in dict.fromkeys(re.findall(r"\w+", text.lower())) if t not in STOPWORDS]
+    return " OR ".join(f'"{t}"' for t in tokens) or None
+
+
+def ingest_fact_check(response: ClaimResponse, video_id: str, created_at: Optional[float] = None) -> bool:
+    """Store one verdict; returns False when it was skipped, a technical error or already stored."""
+    if not KNOWLEDGE_BASE_ENABLED or response.status == "skipped" or is_error_result(response):
+        return False
+    try:
+        with _db_lock:
+            db = _conn()
+            cur = db.execute(
+                "INSERT OR IGNORE INTO fact_checks"
+                " (claim, status, written_summary, evidence, video_id, start, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (response.claim.claim, response.status, response.written_summary,
+                 json.dumps([e.dict() for e in response.evidence], ensure_ascii=False),
+                 video_id or "unknown", float(response.claim.start), created_at or time.time()),
+            )
+            if cur.rowcount == 0:
+                return False
+            db.execute("INSERT INTO fact_checks_fts (rowid, claim) VALUES (?, ?)",
+                       (cur.lastrowid, response.claim.claim))
+            db.commit()
+        _stats["ingested"] += 1
+        return True
+    except Exception as e:
+        logger.warning(f"Knowledge base ingest failed: {e}")
+        return False
+
+
+def search_fact_checks(text: str, limit: int = 10, max_age_s: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Stored verdicts ranked by BM25 against `text`, each with its token similarity."""
+    query = _match_query(text)
+    if not KNOWLEDGE_BASE_ENABLED or query is None:
+        return []
+    where, params = "fact_checks_fts MATCH ?", [query]
+    ages = [age for age in (KNOWLEDGE_BASE_MAX_AGE_DAYS * 86400, max_age_s) if age and age > 0]
+    if ages:
+        where += " AND f.created_at >= ?"
+        params.append(time.time() - min(ages))
+    try:
+        with _db_lock:
+            rows = _conn().execute(
+                "SELECT f.claim, f.status, f.written_summary, f.evidence, f.video_id, f.start, f.created_at,"
+                " bm25(fact_checks_fts) AS rank"
+                " FROM fact_checks_fts JOIN fact_checks f ON f.id = fact_checks_fts.rowid"
+                f" WHERE {where} ORDER BY rank LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+    except Exception as e:
+        logger.warning(f"Knowledge base search failed: {e}")
+        return []
+
+    tokens = token_set(text)
+    results = []
+    for claim, status, summary, evidence, video_id, start, created_at, rank in rows:
+        other = token_set(claim)
+        results.append({
+            "claim": claim, "status": status, "written_summary": summary, "evidence": json.loads(evidence),
+            "video_id": video_id, "start": start, "created_at": created_at, "bm25": round(rank, 4),
+            "similarity": round(len(tokens & other) / max(1, len(tokens | other)), 4),
+        })
+    return results
+
+
+def lookup_fact_check(claim: Claim, max_age_s: Optional[float] = None) -> Optional[ClaimResponse]:
+    """
+    Reusable verdict for this claim from any earlier video, marked with CacheInfo; None on a miss.
+    With max_age_s, older verdicts are not reused.
+    """
+    if not KNOWLEDGE_BASE_ENABLED:
+        return None
+    _stats["lookups"] += 1
+    markers = verdict_markers(claim.claim)
+    candidates = [r for r in search_fact_checks(claim.claim, KNOWLEDGE_BASE_CANDIDATES, max_age_s)
+                  if r["similarity"] >= KNOWLEDGE_BASE_MIN_SIMILARITY and verdict_markers(r["claim"]) == markers]
+    if not candidates:
+        return None
+    best = max(candidates, key=lambda r: (r["similarity"], r["created_at"]))
+    _stats["hits"] += 1
+    logger.info(f"📚 Knowledge base verdict for '{claim.claim}' from video {best['video_id']} "
+                f"(similarity {best['similarity']:.2f})")
+    return ClaimResponse(
+        claim=claim,
+        status=best["status"],
+        written_summary=best["written_summary"],
+        evidence=best["evidence"],
+        cache=CacheInfo(source="knowledge_base", similarity=best["similarity"],
+                        age_seconds=round(time.time() - best["created_at"], 1),
+                        matched_claim=best["claim"], video_id=best["video_id"]),
+    )
+
+
+def knowledge_base_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = dict(_stats)
+    stats["hit_rate"] = round(_stats["hits"] / _stats["lookups"], 4) if _stats["lookups"] else 0.0
+    try:
+        with _db_lock:
+            stats["entries"], stats["videos"] = _conn().execute(
+                "SELECT COUNT(*), COUNT(DISTINCT video_id) FROM fact_checks").fetchone()
+    except Exception:
+        stats["entries"] = stats["videos"] = -1
+    return stats
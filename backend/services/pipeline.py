@@ -0,0 +1,287 @@
+"""
+Pipeline - the transcription -> claim extraction -> fact-check engine behind every endpoint
+
+VideoPipeline runs one video and yields typed events (StartEvent, SentenceEvent,
+ClaimEvent, FactCheckEvent, StageEvent, ErrorEvent, DoneEvent). The REST, SSE and JSONL
+endpoints only adapt these events: collect them into a payload, publish them
+to a single flight, or write them as JSON lines. event_payload() gives the wire
+format that SSE and JSONL share.
+
+Concurrency and caching policy live here, so every endpoint gets the same:
+- transcription feeds a sentence queue bounded at PIPELINE_QUEUE_SIZE, drained by
+  PIPELINE_EXTRACTION_WORKERS extraction workers (batched through the claim batcher)
+- near-duplicates wait for the first verdict; evidence cache and knowledge base
+  verdicts are reused; the optional per-video budget picks the claims worth checking
+- fresh fact-checks run PIPELINE_FACT_CHECK_WORKERS at a time, nearest to the
+  viewer's playhead first (timeline order without playhead updates)
+- fresh verdicts are ingested into the knowledge base
+- each stage's output is checkpointed per video, so an interrupted run of the same
+  video resumes instead of starting over (services/checkpoint.py)
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel
+
+from models import Claim, ClaimResponse, Sentence
+from services.checkpoint import open_checkpoint
+from services.claim_budget import ClaimBudget
+from services.claim_service import extract_claims_batched, new_prefilter_stats, prefilter_report
+from services.fact_checking_service import fact_check_claim, new_fact_check_deduper
+from services.knowledge_base import ingest_fact_check
+from services.playhead_scheduler import PlayheadScheduler, register_stream, unregister_stream
+from services.rate_limiter import rate_limit_key
+from services.transcription_service import transcribe_from_url_streaming
+from services.video_utils import extract_video_id
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_EXTRACTION_WORKERS = max(1, int(os.getenv("PIPELINE_EXTRACTION_WORKERS", "8")))
+PIPELINE_FACT_CHECK_WORKERS = max(1, int(os.getenv("PIPELINE_FACT_CHECK_WORKERS", "8")))
+PIPELINE_QUEUE_SIZE = max(1, int(os.getenv("PIPELINE_QUEUE_SIZE", "32")))
+
+
+class StartEvent(BaseModel):
+    type: Literal["start"] = "start"
+    url: str
+    video_id: str
+    stream_id: Optional[str] = None
+
+
+class SentenceEvent(BaseModel):
+    type: Literal["sentence"] = "sentence"
+    sentence_id: int
+    sentence: Sentence
+
+
+class ClaimEvent(BaseModel):
+    type: Literal["claim"] = "claim"
+    claim_id: str
+    sentence_id: int
+    index: int  # position of the claim within its sentence
+    claim: Claim
+
+
+class FactCheckEvent(BaseModel):
+    type: Literal["fact_check"] = "fact_check"
+    claim_id: str
+    sentence_id: int
+    index: int
+    response: ClaimResponse
+
+
+class StageEvent(BaseModel):
+    type: Literal["stage"] = "stage"
+    stage: Literal["transcription", "extraction"]  # the stage that just finished
+    sentences: int
+    claims: int
+
+
+class ErrorEvent(BaseModel):
+    type: Literal["error"] = "error"
+    scope: str  # "claims", "fact_check" or "pipeline"
+    message: str
+    claim_id: Optional[str] = None
+
+
+class DoneEvent(BaseModel):
+    type: Literal["done"] = "done"
+    transcript: Dict[str, Any]
+    prefilter: Dict[str, Any]
+    budget: Dict[str, Any]
+    scheduler: Dict[str, Any]
+    checkpoint: Optional[Dict[str, int]] = None
+
+
+PipelineEvent = Union[StartEvent, SentenceEvent, ClaimEvent, FactCheckEvent, StageEvent, ErrorEvent, DoneEvent]
+EVENT_TYPES = {"start": StartEvent, "sentence": SentenceEvent, "claim": ClaimEvent, "fact_check": FactCheckEvent,
+               "stage": StageEvent, "error": ErrorEvent, "done": DoneEvent}
+
+
+def make_claim_id(start: float, text: str) -> str:
+    raw = f"{start:.2f}::{text}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_event(data: Dict[str, Any]) -> PipelineEvent:
+    """Rebuild a typed event from event.dict(), e.g. one published by a worker process."""
+    return EVENT_TYPES[data["type"]](**data)
+
+
+def event_payload(event: PipelineEvent) -> Dict[str, Any]:
+    """Wire format shared by the SSE and JSONL streams."""
+    if isinstance(event, StartEvent):
+        return {"type": "start", "url": event.url, "stream_id": event.stream_id}
+    if isinstance(event, SentenceEvent):
+        return {"type": "sentence", "sentence_id": event.sentence_id,
+                "start": event.sentence.start, "text": event.sentence.text}
+    if isinstance(event, ClaimEvent):
+        return {"type": "claim", "claim_id": event.claim_id, "sentence_id": event.sentence_id,
+                "start": event.claim.start, "claim": event.claim.claim, "status": "checking"}
+    if isinstance(event, FactCheckEvent):
+        fc = event.response
+        return {
+            "type": "fact_check",
+            "claim_id": event.claim_id,
+            "start": fc.claim.start,
+            "claim": fc.claim.claim,
+            "status": fc.status,
+            "summary": fc.written_summary,
+            "evidence": [
+                {"title": e.source_title, "url": e.source_url, "snippet": e.snippet}
+                for e in fc.evidence
+            ],
+            "cache": fc.cache.dict() if fc.cache else None,
+            "score": fc.score,
+        }
+    return event.dict(exclude_none=True)
+
+
+class VideoPipeline:
+    """
+    One run of the pipeline for one video. With playhead=True the run registers
+    its scheduler under a stream_id (sent in the StartEvent) for playhead updates.
+    """
+
+    def __init__(self, url: str, max_claims: Optional[int] = None, max_spend_usd: Optional[float] = None,
+                 playhead: bool = False):
+        self.url = url
+        self.video_id = extract_video_id(url)
+        self.budget = ClaimBudget(max_claims, max_spend_usd)
+        self.scheduler = PlayheadScheduler(PIPELINE_FACT_CHECK_WORKERS)
+        self.stream_id = register_stream(self.scheduler)[0] if playhead else None
+        self.transcript_report: Dict[str, Any] = {}
+        self.prefilter_stats = new_prefilter_stats()
+        self._deduper = new_fact_check_deduper()
+        self.checkpoint = None  # opened (and locked) for the duration of _run
+
+    async def events(self) -> AsyncIterator[PipelineEvent]:
+        """
+        Run the pipeline, yielding events as they happen. A failed run ends with an
+        ErrorEvent(scope="pipeline") instead of a DoneEvent; closing the iterator
+        cancels the run.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        runner = asyncio.create_task(self._run(queue.put_nowait))
+        runner.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            runner.cancel()
+            if self.stream_id:
+                unregister_stream(self.stream_id)
+
+    async def _run(self, emit) -> None:
+        try:
+            self.checkpoint = open_checkpoint(self.video_id)
+            if self.checkpoint:
+                await asyncio.to_thread(self.checkpoint.load)
+            await self._run_stages(emit)
+        except Exception as e:
+            # every run ends with a DoneEvent or a pipeline ErrorEvent
+            logger.exception("Pipeline failed")
+            emit(ErrorEvent(scope="pipeline", message=str(e)))
+        finally:
+            if self.checkpoint:
+                self.checkpoint.release()
+
+    async def _run_stages(self, emit) -> None:
+        # provider calls made for this video queue fairly against other videos
+        rate_limit_key.set(self.video_id)
+        sentence_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        sentences = 0
+        stage_tasks: List[asyncio.Task] = []
+        claim_tasks: List[asyncio.Task] = []
+
+        async def fact_check(claim_id: str, sentence_id: int, index: int, claim: Claim):
+            try:
+                fc = self.checkpoint.fact_check(sentence_id, index, claim) if self.checkpoint else None
+                if fc is not None:
+                    fc = self.budget.record_resumed(claim, fc)
+                else:
+                    # near-duplicates wait for the first verdict; budget-deferred claims hold no worker
+                    fc = await self._deduper.check(
+                        claim, lambda c: self.budget.run(c, lambda c2: self.scheduler.run(c2, fact_check_claim)))
+                    if fc.cache is None:
+                        await asyncio.to_thread(ingest_fact_check, fc, self.video_id)
+                    if self.checkpoint:
+                        await asyncio.to_thread(self.checkpoint.put_fact_check, sentence_id, index, fc)
+                logger.info(f"✅ Fact-checked: '{claim.claim}' -> {fc.status}")
+                emit(FactCheckEvent(claim_id=claim_id, sentence_id=sentence_id, index=index, response=fc))
+            except Exception as e:
+                logger.exception("fact_check failed")
+                emit(ErrorEvent(scope="fact_check", message=str(e), claim_id=claim_id))
+
+        async def extraction_worker():
+            while True:
+                item = await sentence_queue.get()
+                if item is None:
+                    break
+                sentence_id, sentence = item
+                try:
+                    claims = self.checkpoint.claims(sentence_id, sentence) if self.checkpoint else None
+                    if claims is None:
+                        claims = await extract_claims_batched(sentence, self.prefilter_stats)
+                        if self.checkpoint:
+                            await asyncio.to_thread(self.checkpoint.put_claims, sentence_id, sentence, claims)
+                except Exception as e:
+                    logger.exception("claims failed")
+                    emit(ErrorEvent(scope="claims", message=str(e)))
+                    continue
+                if claims:
+                    logger.info(f"🎯 Found {len(claims)} claims in sentence {sentence_id}")
+                for claim in claims:
+                    self.budget.observe(claim)
+                for index, claim in enumerate(claims):
+                    claim_id = make_claim_id(claim.start, claim.claim)
+                    emit(ClaimEvent(claim_id=claim_id, sentence_id=sentence_id, index=index, claim=claim))
+                    claim_tasks.append(asyncio.create_task(fact_check(claim_id, sentence_id, index, claim)))
+
+        async def transcription_stage():
+            nonlocal sentences
+            async for sentence in transcribe_from_url_streaming(self.url, self.transcript_report, self.checkpoint):
+                sentences += 1
+                emit(SentenceEvent(sentence_id=sentences, sentence=sentence))
+                await sentence_queue.put((sentences, sentence))
+            emit(StageEvent(stage="transcription", sentences=sentences, claims=len(claim_tasks)))
+            for _ in range(PIPELINE_EXTRACTION_WORKERS):
+                await sentence_queue.put(None)
+
+        logger.info(f"Processing video: {self.url}")
+        emit(StartEvent(url=self.url, video_id=self.video_id, stream_id=self.stream_id))
+        try:
+            stage_tasks.append(asyncio.create_task(transcription_stage()))
+            stage_tasks.extend(asyncio.create_task(extraction_worker())
+                               for _ in range(PIPELINE_EXTRACTION_WORKERS))
+            await asyncio.gather(*stage_tasks)
+            emit(StageEvent(stage="extraction", sentences=sentences, claims=len(claim_tasks)))
+            # every claim is known now; the budget can release its deferred claims
+            self.budget.close()
+            await asyncio.gather(*claim_tasks)
+        except Exception as e:
+            logger.exception("Pipeline failed")
+            emit(ErrorEvent(scope="pipeline", message=str(e)))
+            return
+        finally:
+            for task in stage_tasks + claim_tasks:
+                task.cancel()
+
+        logger.info(f"🔚 Pipeline complete: {len(claim_tasks)} claims")
+        checkpoint_report = self.checkpoint.report() if self.checkpoint else None
+        if self.checkpoint and "error" not in self.transcript_report:
+            await asyncio.to_thread(self.checkpoint.clear)  # a transcription error keeps it for the next attempt
+        emit(DoneEvent(
+            transcript=self.transcript_report,
+            prefilter=prefilter_report(self.prefilter_stats),
+            budget=self.budget.report(),
+            scheduler=self.scheduler.report(),
+            checkpoint=checkpoint_report,
+        ))
@@ -0,0 +1,145 @@
+"""
+Playhead Scheduler - fact-check claims in order of how soon the viewer reaches them
+
+Each pipeline run gets a PlayheadScheduler that admits at most `concurrency`
+fact-checks at a time (the pipeline's PIPELINE_FACT_CHECK_WORKERS). Waiting claims are picked by
+distance ahead of the viewer's estimated playhead: the nearest upcoming claim
+first, then the ones just behind the playhead (PLAYHEAD_BEHIND_GRACE_SECONDS),
+and everything the viewer has already passed last, in timeline order.
+
+The playhead is extrapolated from the last update (position, playing, rate), so
+a client only needs to report on seek, pause and rate changes plus an occasional
+heartbeat. Without updates it stays at 0, which means timeline order.
+
+Several viewers can watch one run (a shared SSE flight). Each one reports its own
+playhead under its own stream_id, and a claim's priority is its best priority
+for any of them, so every viewer gets the claims just ahead of it. A viewer's
+playhead is dropped when its stream unregisters.
+
+Streams register under a stream_id so the SSE side-channel POST can find them.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models import Claim
+
+logger = logging.getLogger(__name__)
+
+PLAYHEAD_BEHIND_GRACE_SECONDS = float(os.getenv("PLAYHEAD_BEHIND_GRACE_SECONDS", "5"))
+
+
+class PlayheadScheduler:
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self._viewers: Dict[str, Dict[str, Any]] = {}  # viewer -> position, playing, rate, updated
+        self._active = 0
+        self._pending: List[Tuple[Claim, asyncio.Future]] = []
+        self.stats = {"scheduled": 0, "ready_in_time": 0, "late": 0, "playhead_updates": 0}
+
+    @staticmethod
+    def _estimate(viewer: Dict[str, Any]) -> float:
+        if not viewer["playing"]:
+            return viewer["position"]
+        return viewer["position"] + (time.monotonic() - viewer["updated"]) * viewer["rate"]
+
+    def playheads(self) -> List[float]:
+        """Estimated playback position of every viewer in seconds ([0.0] before any update)."""
+        return [self._estimate(v) for v in self._viewers.values()] or [0.0]
+
+    def playhead(self, viewer: Optional[str] = None) -> float:
+        """Estimated position of one viewer, or of the viewer furthest behind."""
+        if viewer is not None and viewer in self._viewers:
+            return self._estimate(self._viewers[viewer])
+        return min(self.playheads())
+
+    def viewer_state(self, viewer: str) -> Optional[Dict[str, Any]]:
+        return self._viewers.get(viewer)
+
+    def update_playhead(self, position: float, playing: bool = True, rate: float = 1.0,
+                        viewer: str = "default") -> None:
+        self._viewers[viewer] = {"position": max(0.0, float(position)), "playing": bool(playing),
+                                 "rate": max(0.0, float(rate)), "updated": time.monotonic()}
+        self.stats["playhead_updates"] += 1
+        logger.info(f"⏯️ Playhead of {viewer} at {float(position):.1f}s ({'playing' if playing else 'paused'}), "
+                    f"{len(self._viewers)} viewers, {len(self._pending)} claims waiting")
+
+    def remove_viewer(self, viewer: str) -> None:
+        self._viewers.pop(viewer, None)
+
+    def _priority(self, claim: Claim, playheads: List[float]) -> Tuple[int, float]:
+        best = (3, 0.0)
+        for playhead in playheads:
+            ahead = claim.start - playhead
+            if ahead >= 0:
+                rank = (0, ahead)
+            elif ahead >= -PLAYHEAD_BEHIND_GRACE_SECONDS:
+                rank = (1, -ahead)
+            else:
+                rank = (2, claim.start)
+            best = min(best, rank)
+        return best
+
+    def _admit(self) -> None:
+        self._pending = [(c, f) for c, f in self._pending if not f.done()]
+        playheads = self.playheads()
+        while self._active < self.concurrency and self._pending:
+            best = min(range(len(self._pending)), key=lambda i: self._priority(self._pending[i][0], playheads))
+            _, fut = self._pending.pop(best)
+            self._active += 1
+            fut.set_result(None)
+
+    async def run(self, claim: Claim, fact_check: Callable[[Claim], Awaitable[Any]]) -> Any:
+        """Wait for this claim's turn, then run fact_check(claim)."""
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((claim, fut))
+        self.stats["scheduled"] += 1
+        self._admit()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # admitted just as the caller went away; hand the slot on
+                self._active -= 1
+                self._admit()
+            raise
+        try:
+            return await fact_check(claim)
+        finally:
+            self._active -= 1
+            # late if any viewer has already passed the claim
+            self.stats["ready_in_time" if max(self.playheads()) <= claim.start else "late"] += 1
+            self._admit()
+
+    def report(self) -> Dict[str, Any]:
+        done = self.stats["ready_in_time"] + self.stats["late"]
+        return {
+            **self.stats,
+            "playhead": round(self.playhead(), 2),
+            "viewers": len(self._viewers),
+            "waiting": len(self._pending),
+            "ready_in_time_rate": round(self.stats["ready_in_time"] / done, 4) if done else None,
+        }
+
+
+_streams: Dict[str, PlayheadScheduler] = {}
+
+
+def register_stream(scheduler: PlayheadScheduler) -> Tuple[str, PlayheadScheduler]:
+    stream_id = uuid.uuid4().hex[:12]
+    _streams[stream_id] = scheduler
+    return stream_id, scheduler
+
+
+def get_stream_scheduler(stream_id: str) -> Optional[PlayheadScheduler]:
+    return _streams.get(stream_id)
+
+
+def unregister_stream(stream_id: str) -> None:
+    scheduler = _streams.pop(stream_id, None)
+    if scheduler is not None:
+        scheduler.remove_viewer(stream_id)
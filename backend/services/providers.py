@@ -0,0 +1,157 @@
+"""
+Provider Clients - long-lived async HTTP clients shared by all services
+
+One AsyncOpenAI client for OpenAI (Whisper + GPT-4o), one for RunPod's
+OpenAI-compatible endpoint and one async ACI client. Each keeps its own
+keep-alive connection pool, sized per provider, so requests reuse TLS
+connections instead of handshaking per call and never need a worker thread.
+
+init_providers() runs at app startup and close_providers() at shutdown; the
+getters create the clients lazily for scripts that don't go through FastAPI.
+"""
+
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RUNPOD_BASE_URL = "https://api.runpod.ai/v2/deep-cogito-v2-llama-70b/openai/v1"
+# Optional second RunPod endpoint for hedged claim extraction (defaults to the primary)
+RUNPOD_HEDGE_BASE_URL = os.getenv("RUNPOD_HEDGE_BASE_URL", "")
+ACI_BASE_URL = os.getenv("ACI_SERVER_URL", "https://api.aci.dev/v1/")
+
+# Connection pool sizes per provider
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+RUNPOD_MAX_CONNECTIONS = int(os.getenv("RUNPOD_MAX_CONNECTIONS", "16"))
+ACI_MAX_CONNECTIONS = int(os.getenv("ACI_MAX_CONNECTIONS", "10"))
+PROVIDER_KEEPALIVE_SECONDS = float(os.getenv("PROVIDER_KEEPALIVE_SECONDS", "60"))
+
+
+def _limits(max_connections: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=PROVIDER_KEEPALIVE_SECONDS,
+    )
+
+
+class AsyncACI:
+    """
+    Minimal async counterpart of aci.ACI for the calls this app makes.
+
+    Uses the same REST endpoints and returns the same shapes as the SDK:
+    get_definition() -> function definition dict, handle_function_call() ->
+    {"success": bool, "data": ..., "error": ...} (None values dropped).
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: str, max_connections: int):
+        if not base_url.endswith("/"):
+            base_url += "/"
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Content-Type": "application/json", "x-api-key": api_key or ""},
+            limits=_limits(max_connections),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+        self._definitions: Dict[str, dict] = {}
+
+    async def get_definition(self, function_name: str, format: str = "openai") -> dict:
+        # definitions are static; fetch each one once per process
+        key = f"{function_name}:{format}"
+        if key not in self._definitions:
+            response = await self._client.get(f"functions/{function_name}/definition", params={"format": format})
+            response.raise_for_status()
+            self._definitions[key] = response.json()
+        return self._definitions[key]
+
+    async def handle_function_call(self, function_name: str, function_arguments: dict,
+                                   linked_account_owner_id: str) -> Dict[str, Any]:
+        response = await self._client.post(
+            f"functions/{function_name}/execute",
+            json={"function_input": function_arguments, "linked_account_owner_id": linked_account_owner_id},
+        )
+        response.raise_for_status()
+        result = response.json() if response.content else {}
+        return {k: v for k, v in result.items() if v is not None}
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_openai: Optional[AsyncOpenAI] = None
+_runpod: Optional[AsyncOpenAI] = None
+_runpod_hedge: Optional[AsyncOpenAI] = None
+_aci: Optional[AsyncACI] = None
+
+
+def get_openai() -> AsyncOpenAI:
+    global _openai
+    if _openai is None:
+        _openai = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            max_retries=0,  # retries and backoff are handled by services.rate_limiter
+            http_client=DefaultAsyncHttpxClient(limits=_limits(OPENAI_MAX_CONNECTIONS)),
+        )
+    return _openai
+
+
+def get_runpod() -> AsyncOpenAI:
+    global _runpod
+    if _runpod is None:
+        _runpod = AsyncOpenAI(
+            api_key=os.getenv("RUNPOD_API_KEY"),
+            base_url=RUNPOD_BASE_URL,
+            max_retries=0,  # retries and backoff are handled by services.rate_limiter
+            http_client=DefaultAsyncHttpxClient(limits=_limits(RUNPOD_MAX_CONNECTIONS)),
+        )
+    return _runpod
+
+
+def get_runpod_hedge() -> AsyncOpenAI:
+    """Client for hedged RunPod requests; the primary client unless RUNPOD_HEDGE_BASE_URL is set."""
+    global _runpod_hedge
+    if not RUNPOD_HEDGE_BASE_URL:
+        return get_runpod()
+    if _runpod_hedge is None:
+        _runpod_hedge = AsyncOpenAI(
+            api_key=os.getenv("RUNPOD_HEDGE_API_KEY") or os.getenv("RUNPOD_API_KEY"),
+            base_url=RUNPOD_HEDGE_BASE_URL,
+            max_retries=0,  # retries and backoff are handled by services.rate_limiter
+            http_client=DefaultAsyncHttpxClient(limits=_limits(RUNPOD_MAX_CONNECTIONS)),
+        )
+    return _runpod_hedge
+
+
+def get_aci() -> AsyncACI:
+    global _aci
+    if _aci is None:
+        _aci = AsyncACI(os.getenv("ACI_API_KEY"), ACI_BASE_URL, ACI_MAX_CONNECTIONS)
+    return _aci
+
+
+async def init_providers() -> None:
+    """Create all provider clients up front (called from the FastAPI startup hook)."""
+    get_openai()
+    get_runpod()
+    get_aci()
+    logger.info(f"🔌 Provider clients ready (pools: openai={OPENAI_MAX_CONNECTIONS}, "
+                f"runpod={RUNPOD_MAX_CONNECTIONS}, aci={ACI_MAX_CONNECTIONS})")
+
+
+async def close_providers() -> None:
+    """Close all pooled connections (called from the FastAPI shutdown hook)."""
+    global _openai, _runpod, _runpod_hedge, _aci
+    for client in (_openai, _runpod, _runpod_hedge):
+        if client is not None:
+            await client.close()
+    if _aci is not None:
+        await _aci.aclose()
+    _openai = _runpod = _runpod_hedge = _aci = None
+    logger.info("🔌 Provider clients closed")
@@ -0,0 +1,259 @@
+"""
+Rate Limiter - process-wide token buckets and retry scheduling per provider
+
+Every OpenAI, Whisper, RunPod and ACI call goes through rate_limited(). Each
+provider has a request-rate bucket and (optionally) a token-rate bucket refilled
+continuously from <PROVIDER>_RPM / <PROVIDER>_TPM. Waiting callers are queued per
+video (the rate_limit_key context variable) and served round-robin, so one long
+video cannot starve the others.
+
+429 and 5xx responses are retried with jittered exponential backoff, at least as
+long as the provider's Retry-After. A 429 also pauses the whole provider for
+that time. The OpenAI SDK's own retries are disabled (see providers.py) so
+backoff happens only here.
+
+Buckets live in one process. `python worker.py` runs several processes against
+the same provider accounts, so it calls set_process_share() and each process
+gets 1/N of every limit. rate_limit_stats() reports bucket levels, queue depths
+and wait times; in worker mode the workers publish theirs to the work queue
+(services/work_queue.py).
+"""
+
+import asyncio
+import contextvars
+import email.utils
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+RATE_LIMIT_BACKOFF_BASE_S = float(os.getenv("RATE_LIMIT_BACKOFF_BASE_S", "1"))
+RATE_LIMIT_BACKOFF_MAX_S = float(os.getenv("RATE_LIMIT_BACKOFF_MAX_S", "30"))
+# Buckets hold this many seconds of capacity, which bounds bursts
+RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "10"))
+
+# requests / tokens per minute per provider; 0 disables that bucket
+PROVIDER_LIMITS = {
+    "openai": (float(os.getenv("OPENAI_RPM", "500")), float(os.getenv("OPENAI_TPM", "30000"))),
+    "whisper": (float(os.getenv("WHISPER_RPM", "50")), 0.0),
+    "runpod": (float(os.getenv("RUNPOD_RPM", "600")), float(os.getenv("RUNPOD_TPM", "0"))),
+    "aci": (float(os.getenv("ACI_RPM", "120")), 0.0),
+}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Share of PROVIDER_LIMITS this process may use (1 / worker processes in worker mode)
+_limit_share = 1.0
+
+# Fairness key for queued calls; pipelines set it to the video id
+rate_limit_key: contextvars.ContextVar[str] = contextvars.ContextVar("rate_limit_key", default="default")
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * RATE_LIMIT_BURST_SECONDS)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Consume `amount`; negative adjustments refund, and the level may go into debt."""
+        if self.unlimited:
+            return
+        self._refill()
+        self.level = min(self.capacity, self.level - min(amount, self.capacity))
+
+
+class ProviderLimiter:
+    """Request/token buckets for one provider plus a round-robin queue of waiting callers."""
+
+    def __init__(self, name: str, rpm: float, tpm: float):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self._queues: Dict[str, Deque[Tuple[float, asyncio.Future, float]]] = {}
+        self._order: Deque[str] = deque()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.stats = {"served": 0, "waited": 0, "total_wait_s": 0.0, "max_wait_s": 0.0,
+                      "rate_limited": 0, "retries": 0, "failures": 0}
+
+    async def acquire(self, tokens: float = 0.0) -> None:
+        loop = asyncio.get_running_loop()
+        key = rate_limit_key.get()
+        fut = loop.create_future()
+        if key not in self._queues:
+            self._queues[key] = deque()
+            self._order.append(key)
+        self._queues[key].append((tokens, fut, time.monotonic()))
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            self._dispatcher = loop.create_task(self._dispatch())
+        await fut
+
+    def _next_key(self) -> Optional[str]:
+        while self._order:
+            key = self._order[0]
+            queue = self._queues[key]
+            while queue and queue[0][1].done():  # caller cancelled while waiting
+                queue.popleft()
+            if queue:
+                return key
+            self._order.popleft()
+            del self._queues[key]
+        return None
+
+    async def _dispatch(self) -> None:
+        while True:
+            key = self._next_key()
+            if key is None:
+                return
+            tokens, fut, enqueued = self._queues[key][0]
+            delay = max(self.cooldown_until - time.monotonic(),
+                        self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            self._queues[key].popleft()
+            self._order.rotate(-1)  # next video gets the following slot
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            waited = time.monotonic() - enqueued
+            self.stats["served"] += 1
+            self.stats["total_wait_s"] += waited
+            self.stats["max_wait_s"] = max(self.stats["max_wait_s"], waited)
+            if waited > 0.05:
+                self.stats["waited"] += 1
+            fut.set_result(None)
+
+    def pause(self, seconds: float) -> None:
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        served = self.stats["served"]
+        levels = {}
+        for label, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            if not bucket.unlimited:
+                bucket.wait_time(0)  # refill before reporting
+            levels[f"{label}_level"] = None if bucket.unlimited else round(bucket.level, 2)
+            levels[f"{label}_capacity"] = None if bucket.unlimited else round(bucket.capacity, 2)
+        return {
+            **levels,
+            "cooldown_remaining_s": round(max(0.0, self.cooldown_until - time.monotonic()), 2),
+            "queued": {key: len(q) for key, q in self._queues.items() if q},
+            "avg_wait_s": round(self.stats["total_wait_s"] / served, 3) if served else 0.0,
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()},
+        }
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    if provider not in _limiters:
+        rpm, tpm = PROVIDER_LIMITS.get(provider, (0.0, 0.0))
+        _limiters[provider] = ProviderLimiter(provider, rpm * _limit_share, tpm * _limit_share)
+    return _limiters[provider]
+
+
+def set_process_share(processes: int) -> None:
+    """Split every provider limit evenly across `processes` processes that share the same accounts."""
+    global _limit_share
+    _limit_share = 1.0 / max(1, processes)
+    _limiters.clear()
+    if processes > 1:
+        logger.info(f"🚦 Provider rate limits split across {processes} processes")
+
+
+def estimate_tokens(messages: list, max_tokens: int = 500) -> int:
+    """Rough prompt + completion size for the token bucket (~4 characters per token)."""
+    return len(json.dumps(messages, ensure_ascii=False)) // 4 + max_tokens
+
+
+def _retry_info(error: Exception) -> Tuple[Optional[int], Optional[float]]:
+    """(HTTP status, Retry-After seconds) for provider errors worth retrying, else (None, None)."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    if status not in RETRYABLE_STATUS:
+        return None, None
+    retry_after = None
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        try:
+            retry_after = float(headers["retry-after-ms"]) / 1000.0
+        except ValueError:
+            pass
+    elif headers.get("retry-after"):
+        value = headers["retry-after"]
+        try:
+            retry_after = float(value)
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(value) if value else None
+            if parsed is not None:
+                retry_after = max(0.0, parsed.timestamp() - time.time())
+    return status, retry_after
+
+
+async def rate_limited(provider: str, call: Callable[[], Awaitable[Any]], tokens: float = 0.0) -> Any:
+    """
+    Run `call` once the provider's buckets allow it, retrying 429/5xx with jittered
+    exponential backoff. `tokens` is the estimated size; when the response reports
+    usage.total_tokens the bucket is corrected to the real figure.
+    """
+    limiter = get_limiter(provider)
+    attempt = 0
+    while True:
+        await limiter.acquire(tokens)
+        try:
+            result = await call()
+        except Exception as e:
+            status, retry_after = _retry_info(e)
+            if status is None or attempt >= RATE_LIMIT_MAX_RETRIES:
+                if status is not None:
+                    limiter.stats["failures"] += 1
+                raise
+            backoff = min(RATE_LIMIT_BACKOFF_MAX_S, RATE_LIMIT_BACKOFF_BASE_S * 2 ** attempt)
+            delay = max(retry_after or 0.0, random.uniform(backoff / 2, backoff))
+            if status == 429:
+                limiter.stats["rate_limited"] += 1
+                limiter.pause(delay)
+            limiter.stats["retries"] += 1
+            attempt += 1
+            logger.warning(f"⏳ {provider} returned {status}; retry {attempt}/{RATE_LIMIT_MAX_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        usage = getattr(result, "usage", None)
+        used = getattr(usage, "total_tokens", None)
+        if isinstance(used, (int, float)) and tokens:
+            limiter.tokens.take(used - tokens)
+        return result
+
+
+def rate_limit_stats() -> Dict[str, Any]:
+    """Bucket levels, queue depths and wait/retry counters for every provider."""
+    return {name: {**get_limiter(name).snapshot(), "share": round(_limit_share, 4)} for name in PROVIDER_LIMITS}
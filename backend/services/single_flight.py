@@ -0,0 +1,101 @@
+"""
+Single-flight registry - one pipeline run per video, shared by every viewer
+
+The first request for a video starts the pipeline; later requests for the same
+video attach to the running flight. Each subscriber first receives a replay of
+every event published so far and then follows the live stream. The run is
+cancelled once its last subscriber disconnects.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (event name, payload); None marks the end of the stream
+FlightEvent = Tuple[Optional[str], Dict[str, Any]]
+
+
+class Flight:
+    """A running pipeline plus the log of events it has published."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.events: List[FlightEvent] = []
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.done = False
+
+    def publish(self, data: Dict[str, Any], event: Optional[str] = None) -> None:
+        item = (event, data)
+        self.events.append(item)
+        for q in self.subscribers:
+            q.put_nowait(item)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Return a queue pre-filled with the replay, then fed with live events."""
+        q: asyncio.Queue = asyncio.Queue()
+        for item in self.events:
+            q.put_nowait(item)
+        if self.done:
+            q.put_nowait(None)
+        self.subscribers.add(q)
+        return q
+
+    def _finish(self) -> None:
+        self.done = True
+        for q in self.subscribers:
+            q.put_nowait(None)
+
+
+_flights: Dict[str, Flight] = {}
+
+
+def join_flight(key: str, run: Callable[[Flight], Awaitable[None]]) -> Tuple[Flight, asyncio.Queue]:
+    """
+    Attach to the flight for `key`, starting `run(flight)` if none is in progress.
+
+    Returns the flight and this subscriber's event queue; call leave_flight() when
+    the subscriber goes away.
+    """
+    flight = _flights.get(key)
+    if flight is None or flight.done:
+        flight = Flight(key)
+        _flights[key] = flight
+
+        async def runner():
+            try:
+                await run(flight)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.exception(f"Pipeline flight for {key} failed")
+                flight.publish({"type": "error", "scope": "pipeline", "message": str(e)}, event="error")
+            finally:
+                flight._finish()
+                if _flights.get(key) is flight:
+                    del _flights[key]
+
+        flight.task = asyncio.create_task(runner())
+        logger.info(f"🛫 Started pipeline flight for {key}")
+    else:
+        logger.info(f"🔗 Attached viewer to running flight for {key} "
+                    f"(replaying {len(flight.events)} events, {len(flight.subscribers) + 1} viewers)")
+
+    return flight, flight.subscribe()
+
+
+def leave_flight(flight: Flight, q: asyncio.Queue) -> None:
+    """Detach a subscriber; cancels the run when nobody is listening any more."""
+    flight.subscribers.discard(q)
+    if not flight.subscribers and not flight.done and flight.task and not flight.task.done():
+        logger.info(f"🛬 Last viewer left flight for {flight.key}; cancelling pipeline")
+        flight.task.cancel()
+        if _flights.get(flight.key) is flight:
+            del _flights[flight.key]
+
+
+def active_flights() -> Dict[str, int]:
+    """Map of video key -> number of attached viewers, for observability."""
+    return {key: len(f.subscribers) for key, f in _flights.items()}
@@ -0,0 +1,103 @@
+"""
+Transcript Cache - persistent transcript store keyed by YouTube video ID
+
+One JSON file per video holds the Whisper segments plus word timings, so a video
+that was already transcribed skips yt-dlp, ffmpeg and Whisper entirely.
+Entries are evicted least-recently-used once the store grows past
+TRANSCRIPT_CACHE_MAX_MB (file mtime is bumped on every hit).
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "transcripts"
+)
+TRANSCRIPT_CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "200"))
+
+
+def _entry_path(video_id: str) -> Optional[str]:
+    safe_id = "".join(c for c in video_id if c.isalnum() or c in ("-", "_"))
+    if not safe_id or safe_id == "unknown":
+        return None
+    return os.path.join(TRANSCRIPT_CACHE_DIR, f"{safe_id}.json")
+
+
+def get_transcript(video_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a cached transcript.
+
+    Returns {"video_id", "segments", "words", "source", "created_at"} or None on a miss.
+    """
+    if not TRANSCRIPT_CACHE_ENABLED:
+        return None
+    path = _entry_path(video_id)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path, None)  # mark as recently used
+        return entry
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable transcript cache entry '{path}': {e}")
+        return None
+
+
+def put_transcript(video_id: str, segments: List[Dict[str, Any]], words: List[Dict[str, Any]],
+                   source: str = "whisper") -> None:
+    """Store a complete transcript and evict old entries if the store is over budget."""
+    if not TRANSCRIPT_CACHE_ENABLED or not segments:
+        return
+    path = _entry_path(video_id)
+    if not path:
+        return
+    try:
+        os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
+        entry = {
+            "video_id": video_id,
+            "source": source,
+            "created_at": time.time(),
+            "segments": segments,
+            "words": words,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logger.info(f"💾 Cached transcript for {video_id}: {len(segments)} segments, {len(words)} words")
+        _evict()
+    except Exception as e:
+        logger.warning(f"Unable to cache transcript for {video_id}: {e}")
+
+
+def _evict() -> None:
+    """Delete least-recently-used entries until the store fits TRANSCRIPT_CACHE_MAX_MB."""
+    max_bytes = TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024
+    entries = []
+    for name in os.listdir(TRANSCRIPT_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(TRANSCRIPT_CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            logger.info(f"🗑️ Evicted cached transcript: {os.path.basename(path)}")
+        except OSError as e:
+            logger.warning(f"Failed to evict transcript cache entry '{path}': {e}")
@@ -48,20 +48,55 @@ ERROR HANDLING:
 - Clean up temp files even on error
 """
 
-from typing import List, Dict, AsyncGenerator, Any
+from typing import List, Dict, AsyncGenerator, Any, Iterable, Iterator, Optional, Tuple
+from xml.etree import ElementTree
+import asyncio
+import bisect
+import hashlib
+import html
 import logging
+import re
 import yt_dlp
-import openai
 import tempfile
 import os
 import subprocess
+import sys
+import time
+import uuid
 from dotenv import load_dotenv
 from models import Sentence
+from services.providers import get_openai
+from services.rate_limiter import rate_limited
+from services.transcript_cache import get_transcript, put_transcript
+from services.video_utils import extract_video_id
 
 # Load environment variables
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Chunked mode: split the transcoded audio into overlapping windows and transcribe them in parallel
+TRANSCRIBE_CHUNKED = os.getenv("TRANSCRIBE_CHUNKED", "true").lower() in ("1", "true", "yes")
+TRANSCRIBE_WINDOW_SECONDS = float(os.getenv("TRANSCRIBE_WINDOW_SECONDS", "120"))
+TRANSCRIBE_OVERLAP_SECONDS = float(os.getenv("TRANSCRIBE_OVERLAP_SECONDS", "4"))
+TRANSCRIBE_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))
+
+# Caption-first mode: use creator/auto captions when available and skip audio + Whisper
+TRANSCRIBE_CAPTIONS_FIRST = os.getenv("TRANSCRIBE_CAPTIONS_FIRST", "true").lower() in ("1", "true", "yes")
+CAPTION_LANGUAGES = os.getenv("CAPTION_LANGUAGES", "en,en-US,en-GB")
+CAPTION_FORMATS = ("vtt", "srv3", "srv1")
+CAPTION_MAX_SENTENCE_WORDS = int(os.getenv("CAPTION_MAX_SENTENCE_WORDS", "40"))
+
+# Cap on concurrent yt-dlp -> ffmpeg pipelines per process
+TRANSCODE_CONCURRENCY = int(os.getenv("TRANSCODE_CONCURRENCY", "2"))
+_transcode_sema = asyncio.Semaphore(max(1, TRANSCODE_CONCURRENCY))
+
+# Optional VAD stage: cut silence/non-speech out before upload, keep an offset map for timestamps
+VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() in ("1", "true", "yes")
+VAD_NOISE_DB = float(os.getenv("VAD_NOISE_DB", "-35"))
+VAD_MIN_SILENCE_SECONDS = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "0.8"))
+VAD_PADDING_SECONDS = float(os.getenv("VAD_PADDING_SECONDS", "0.2"))
+VAD_MIN_DROP_RATIO = float(os.getenv("VAD_MIN_DROP_RATIO", "0.02"))
+
 # ---------- Helpers ----------
 
 def chunk_segments_into_sentences(segments) -> List[Dict[str, Any]]:
@@ -118,51 +153,82 @@ def chunk_segments_into_sentences(segments) -> List[Dict[str, Any]]:
     return sentences
 
 
+def chunk_caption_cues_into_sentences(cues: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Group caption cues into sentences as they arrive.
+
+    Like chunk_segments_into_sentences, but auto captions usually lack punctuation,
+    so a sentence is also closed after CAPTION_MAX_SENTENCE_WORDS words.
+    """
+    buffer: List[Dict[str, Any]] = []
+    word_count = 0
+    for cue in cues:
+        buffer.append(cue)
+        word_count += len(cue["text"].split())
+        if cue["text"].endswith(('.', '!', '?')) or word_count >= CAPTION_MAX_SENTENCE_WORDS:
+            yield from chunk_segments_into_sentences(buffer)
+            buffer, word_count = [], 0
+    yield from chunk_segments_into_sentences(buffer)
+
+
+def _take_complete_sentences(segments: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split stitched segments into finished sentences and a trailing fragment.
+
+    Returns (sentences, remainder). The remainder holds the segments of a sentence that
+    is not terminated yet, so the next window can complete it.
+    """
+    last_end = -1
+    for i, seg in enumerate(segments):
+        if (seg.get("text") or "").strip().endswith(('.', '!', '?')):
+            last_end = i
+    if last_end < 0:
+        return [], list(segments)
+    return chunk_segments_into_sentences(segments[:last_end + 1]), list(segments[last_end + 1:])
+
+
+def _to_sentence(s: Dict[str, Any]) -> Sentence:
+    sent = Sentence(start=float(s["start"]), text=str(s["text"]))
+    logger.info(f"Streaming sentence at {sent.start:.2f}s: {sent.text[:80]!r}")
+    return sent
+
+
 async def download_audio_from_youtube(video_url: str) -> str:
     """
-    Download best audio via yt-dlp, then transcode to **mono WebM (Opus, 24 kbps, 16 kHz)**.
-    Returns the path to the resulting .mono.webm file.
+    Stream best audio from yt-dlp straight into ffmpeg and transcode to
+    **mono WebM (Opus, 24 kbps, 16 kHz)**. Returns the path to the resulting .mono.webm file.
 
-    Cleanup: removes the original download and leaves only the compact WebM.
+    Both tools run as asyncio subprocesses joined by an OS pipe, so the event loop is
+    never blocked and the raw download is never written to disk. At most
+    TRANSCODE_CONCURRENCY downloads/transcodes run at the same time.
     """
-    raw_download_path = None
     webm_path = None
+    procs = []
 
     try:
         temp_dir = tempfile.gettempdir()
-        base = os.path.join(temp_dir, f"yt_{abs(hash(video_url))}")
+        video_id = extract_video_id(video_url)
+        if video_id == "unknown":
+            video_id = hashlib.sha1(video_url.encode("utf-8")).hexdigest()[:16]
+        base = os.path.join(temp_dir, f"yt_{video_id}_{uuid.uuid4().hex[:8]}")
         webm_path = base + ".mono.webm"
 
-        # 1) Download bestaudio (container/codec may vary). No postprocessors here.
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "outtmpl": base + ".%(ext)s",
-            "noplaylist": True,
-            "quiet": True,
-            "no_warnings": True,
-            "retries": 3,
-            "fragment_retries": 3,
-            "postprocessors": [],
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=True)
-            raw_download_path = (
-                info.get("requested_downloads", [{}])[0].get("filepath")
-                or base + f".{info.get('ext','m4a')}"
-            )
-
-        if not raw_download_path or not os.path.exists(raw_download_path):
-            raise FileNotFoundError("yt-dlp did not produce a downloadable audio file.")
-
-        # avoid accidental same-path overwrite (paranoia)
-        if os.path.abspath(raw_download_path) == os.path.abspath(webm_path):
-            webm_path = base + ".transcoded.mono.webm"
-
-        # 2) Transcode to compact mono WebM/Opus @16 kHz, ~24 kbps
+        # 1) yt-dlp writes bestaudio (container/codec may vary) to stdout
+        ytdlp_cmd = [
+            sys.executable, "-m", "yt_dlp",
+            "--format", "bestaudio[ext=webm]/bestaudio/best",
+            "--no-playlist",
+            "--quiet",
+            "--no-warnings",
+            "--retries", "3",
+            "--fragment-retries", "3",
+            "--output", "-",
+            video_url,
+        ]
+        # 2) ffmpeg reads it from stdin and transcodes to compact mono WebM/Opus @16 kHz, ~24 kbps
         ffmpeg_cmd = [
-            "ffmpeg", "-hide_banner", "-nostdin", "-y",
-            "-i", raw_download_path,
+            "ffmpeg", "-hide_banner", "-y",
+            "-i", "pipe:0",
             "-ac", "1",
             "-ar", "16000",
             "-c:a", "libopus",
@@ -171,22 +237,46 @@ async def download_audio_from_youtube(video_url: str) -> str:
             "-vn",
             webm_path,
         ]
-        proc = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if proc.returncode != 0 or not os.path.exists(webm_path):
-            raise RuntimeError(f"ffmpeg failed: {proc.stderr.decode('utf-8', errors='ignore')}")
+
+        async with _transcode_sema:
+            read_fd, write_fd = os.pipe()
+            try:
+                ytdlp = await asyncio.create_subprocess_exec(
+                    *ytdlp_cmd, stdout=write_fd, stderr=asyncio.subprocess.PIPE)
+                procs.append(ytdlp)
+                ffmpeg = await asyncio.create_subprocess_exec(
+                    *ffmpeg_cmd, stdin=read_fd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+                procs.append(ffmpeg)
+            finally:
+                # the children own the pipe ends now
+                os.close(read_fd)
+                os.close(write_fd)
+
+            (_, ytdlp_err), (_, ffmpeg_err) = await asyncio.gather(ytdlp.communicate(), ffmpeg.communicate())
+
+        if ytdlp.returncode != 0:
+            raise RuntimeError(f"yt-dlp failed: {ytdlp_err.decode('utf-8', errors='ignore')}")
+        if ffmpeg.returncode != 0 or not os.path.exists(webm_path):
+            raise RuntimeError(f"ffmpeg failed: {ffmpeg_err.decode('utf-8', errors='ignore')}")
 
         return webm_path
 
-    except Exception as e:
-        logger.error(f"Failed to download/transcode audio from {video_url}: {e}")
+    except BaseException as e:
+        if not isinstance(e, asyncio.CancelledError):
+            logger.error(f"Failed to download/transcode audio from {video_url}: {e}")
+        for proc in procs:
+            if proc.returncode is None:
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+        # keep no partial output around
+        if webm_path and os.path.exists(webm_path):
+            try:
+                os.remove(webm_path)
+            except Exception as ce:
+                logger.warning(f"Failed to remove partial audio file '{webm_path}': {ce}")
         raise
-    finally:
-        # Always remove the raw original; keep the compact .mono.webm
-        try:
-            if raw_download_path and os.path.exists(raw_download_path):
-                os.remove(raw_download_path)
-        except Exception as ce:
-            logger.warning(f"Failed to remove temp raw file '{raw_download_path}': {ce}")
 
 
 # ---------- Whisper calls ----------
@@ -222,6 +312,534 @@ def _segments_to_dict_list(segments) -> List[Dict[str, Any]]:
     return out
 
 
+def _words_to_dict_list(words) -> List[Dict[str, Any]]:
+    """
+    Convert Whisper word timings to [{"word": str, "start": float, "end": float}, ...]
+    """
+    out: List[Dict[str, Any]] = []
+    for w in words or []:
+        word = getattr(w, "word", None)
+        start = getattr(w, "start", None)
+        end = getattr(w, "end", None)
+        if word is None and hasattr(w, 'get'):
+            word = w.get("word", "")
+        if start is None and hasattr(w, 'get'):
+            start = w.get("start", 0.0)
+        if end is None and hasattr(w, 'get'):
+            end = w.get("end", 0.0)
+        out.append({"word": str(word or ""), "start": float(start or 0.0), "end": float(end or 0.0)})
+    return out
+
+
+async def _whisper_transcribe_file(audio_path: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Whisper call for one audio file on the shared async OpenAI client
+    (rate-limited and retried as provider "whisper").
+    Returns (segments, words) as dict lists.
+    """
+    async def _call():
+        # reopened per attempt so a retry uploads the file from the start
+        with open(audio_path, "rb") as audio_file:
+            return await get_openai().audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+                response_format="verbose_json",
+                # keep segment and word timings available; we only return segments here,
+                # but word timing can be useful for downstream features/logging.
+                timestamp_granularities=["segment", "word"],
+            )
+
+    transcript = await rate_limited("whisper", _call)
+
+    segs = getattr(transcript, "segments", None)
+    words = getattr(transcript, "words", None)
+    if segs is None and hasattr(transcript, 'get'):
+        segs = transcript.get("segments", [])
+    if words is None and hasattr(transcript, 'get'):
+        words = transcript.get("words", [])
+    return _segments_to_dict_list(segs or []), _words_to_dict_list(words)
+
+
+# ---------- Non-speech trimming (VAD) ----------
+
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def _speech_intervals(silences: List[Tuple[float, float]], duration: float,
+                      padding: float) -> List[Tuple[float, float]]:
+    """Invert silence regions into padded speech intervals within [0, duration]."""
+    intervals: List[Tuple[float, float]] = []
+    cursor = 0.0
+    for s_start, s_end in silences:
+        # keep `padding` seconds of context next to speech (not at the file edges)
+        cut_start = s_start + padding if s_start > 0 else 0.0
+        cut_end = s_end - padding if s_end < duration else duration
+        if cut_end <= cut_start:
+            continue
+        if cut_start > cursor:
+            intervals.append((cursor, cut_start))
+        cursor = max(cursor, cut_end)
+    if cursor < duration:
+        intervals.append((cursor, duration))
+    return intervals
+
+
+def _build_offset_map(intervals: List[Tuple[float, float]]) -> List[Tuple[float, float, float]]:
+    """Return [(trimmed_start, original_start, length), ...] for the kept intervals."""
+    offset_map = []
+    trimmed = 0.0
+    for start, end in intervals:
+        offset_map.append((trimmed, start, end - start))
+        trimmed += end - start
+    return offset_map
+
+
+def to_original_time(t: float, offset_map: List[Tuple[float, float, float]], is_end: bool = False) -> float:
+    """Map a timestamp in the trimmed audio back to the original video time."""
+    if not offset_map:
+        return t
+    starts = [entry[0] for entry in offset_map]
+    # an end timestamp sitting exactly on a boundary belongs to the interval before it
+    idx = (bisect.bisect_left(starts, t) if is_end else bisect.bisect_right(starts, t)) - 1
+    trimmed_start, original_start, length = offset_map[max(0, idx)]
+    return original_start + min(max(t - trimmed_start, 0.0), length)
+
+
+def _remap_to_original(segments: List[Dict[str, Any]], words: List[Dict[str, Any]],
+                       offset_map: Optional[List[Tuple[float, float, float]]]) -> None:
+    """Shift segment and word timestamps from trimmed time to original time (in place)."""
+    if not offset_map:
+        return
+    for item in list(segments) + list(words):
+        item["start"] = to_original_time(item["start"], offset_map)
+        item["end"] = to_original_time(item["end"], offset_map, is_end=True)
+
+
+async def _detect_silences(audio_path: str) -> Tuple[List[Tuple[float, float]], float]:
+    """Run ffmpeg silencedetect; returns (silence regions, audio duration)."""
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-nostdin",
+        "-i", audio_path,
+        "-af", f"silencedetect=noise={VAD_NOISE_DB}dB:d={VAD_MIN_SILENCE_SECONDS}",
+        "-f", "null", "-",
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg silencedetect failed: {stderr.decode('utf-8', errors='ignore')}")
+
+    duration = await asyncio.to_thread(_probe_duration, audio_path)
+    silences: List[Tuple[float, float]] = []
+    open_start = None
+    for line in stderr.decode("utf-8", errors="ignore").splitlines():
+        m = _SILENCE_START_RE.search(line)
+        if m:
+            open_start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END_RE.search(line)
+        if m and open_start is not None:
+            silences.append((open_start, float(m.group(1))))
+            open_start = None
+    if open_start is not None and duration > open_start:
+        silences.append((open_start, duration))
+    return silences, duration
+
+
+async def trim_non_speech(audio_path: str, report: Optional[Dict[str, Any]] = None
+                          ) -> Tuple[str, Optional[List[Tuple[float, float, float]]]]:
+    """
+    Cut silence / non-speech regions out of the compact WebM before it goes to Whisper.
+
+    Returns (path, offset_map). The offset map translates trimmed timestamps back to
+    original video time (see to_original_time); it is None when nothing was cut, in
+    which case the original path is returned. The input file is replaced on success.
+    `report["vad"]` records how much audio was dropped.
+    """
+    silences, duration = await _detect_silences(audio_path)
+    intervals = _speech_intervals(silences, duration, VAD_PADDING_SECONDS)
+    kept = sum(end - start for start, end in intervals)
+    dropped = max(0.0, duration - kept)
+    stats = {
+        "original_s": round(duration, 2),
+        "kept_s": round(kept, 2),
+        "dropped_s": round(dropped, 2),
+        "dropped_ratio": round(dropped / duration, 4) if duration else 0.0,
+        "regions_removed": len(silences),
+        "bytes_before": os.path.getsize(audio_path),
+    }
+    if report is not None:
+        report["vad"] = stats
+
+    if not intervals or duration <= 0 or stats["dropped_ratio"] < VAD_MIN_DROP_RATIO:
+        logger.info(f"VAD: keeping full audio (dropped ratio {stats['dropped_ratio']:.1%})")
+        stats["bytes_after"] = stats["bytes_before"]
+        return audio_path, None
+
+    trimmed_path = audio_path.replace(".mono.webm", "") + ".speech.mono.webm"
+    filter_path = trimmed_path + ".filter"
+    select = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in intervals)
+    try:
+        with open(filter_path, "w", encoding="utf-8") as f:
+            f.write(f"aselect='{select}',asetpts=N/SR/TB")
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-nostdin", "-y",
+            "-i", audio_path,
+            "-filter_script:a", filter_path,
+            "-ac", "1",
+            "-ar", "16000",
+            "-c:a", "libopus",
+            "-b:a", "24k",
+            "-application", "voip",
+            trimmed_path,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0 or not os.path.exists(trimmed_path):
+            raise RuntimeError(f"ffmpeg trim failed: {stderr.decode('utf-8', errors='ignore')}")
+    except BaseException:
+        if os.path.exists(trimmed_path):
+            os.remove(trimmed_path)
+        raise
+    finally:
+        if os.path.exists(filter_path):
+            os.remove(filter_path)
+
+    os.remove(audio_path)
+    stats["bytes_after"] = os.path.getsize(trimmed_path)
+    logger.info(f"✂️ VAD dropped {dropped:.1f}s of {duration:.1f}s ({stats['dropped_ratio']:.1%}), "
+                f"{stats['bytes_before']} -> {stats['bytes_after']} bytes")
+    return trimmed_path, _build_offset_map(intervals)
+
+
+async def _maybe_trim_non_speech(audio_path: str, report: Optional[Dict[str, Any]] = None
+                                 ) -> Tuple[str, Optional[List[Tuple[float, float, float]]]]:
+    """Apply trim_non_speech when VAD_ENABLED; any VAD failure falls back to the full audio."""
+    if not VAD_ENABLED:
+        return audio_path, None
+    try:
+        return await trim_non_speech(audio_path, report)
+    except Exception as e:
+        logger.warning(f"VAD trimming failed, sending full audio: {e}")
+        return audio_path, None
+
+
+# ---------- Chunked transcription ----------
+
+def _probe_duration(audio_path: str) -> float:
+    """Return the audio duration in seconds via ffprobe (0.0 if unknown)."""
+    proc = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", audio_path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    try:
+        return float(proc.stdout.decode("utf-8", errors="ignore").strip() or 0.0)
+    except ValueError:
+        return 0.0
+
+
+def _plan_windows(duration: float, window: float, overlap: float) -> List[Tuple[float, float]]:
+    """
+    Split [0, duration] into windows of `window` seconds, each extended by `overlap`
+    seconds into the next one. Returns [(start, length), ...].
+    """
+    if duration <= 0 or duration <= window + overlap:
+        return [(0.0, duration)]
+    windows = []
+    start = 0.0
+    while start < duration:
+        length = min(window + overlap, duration - start)
+        windows.append((start, length))
+        if start + length >= duration:
+            break
+        start += window
+    return windows
+
+
+def _cut_audio_window(audio_path: str, start: float, length: float, out_path: str) -> None:
+    """Copy [start, start + length) of the compact WebM into its own file (no re-encode)."""
+    ffmpeg_cmd = [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y",
+        "-ss", f"{start:.3f}",
+        "-t", f"{length:.3f}",
+        "-i", audio_path,
+        "-c", "copy",
+        out_path,
+    ]
+    proc = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0 or not os.path.exists(out_path):
+        raise RuntimeError(f"ffmpeg window cut failed: {proc.stderr.decode('utf-8', errors='ignore')}")
+
+
+async def _transcribe_window(audio_path: str, index: int, window: Tuple[float, float],
+                             sema: asyncio.Semaphore) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Cut one window out of the audio file and transcribe it. Timestamps are shifted
+    by the window start so they refer to the original audio.
+    """
+    start, length = window
+    window_path = f"{audio_path}.w{index:04d}.webm"
+    async with sema:
+        try:
+            await asyncio.to_thread(_cut_audio_window, audio_path, start, length, window_path)
+            segments, words = await _whisper_transcribe_file(window_path)
+        finally:
+            if os.path.exists(window_path):
+                try:
+                    os.remove(window_path)
+                except Exception as ce:
+                    logger.warning(f"Failed to cleanup window file '{window_path}': {ce}")
+
+    for seg in segments:
+        seg["start"] += start
+        seg["end"] += start
+    for w in words:
+        w["start"] += start
+        w["end"] += start
+    logger.info(f"Window {index} ({start:.0f}s-{start + length:.0f}s) transcribed: {len(segments)} segments")
+    return segments, words
+
+
+def _stitch_window(segments: List[Dict[str, Any]], words: List[Dict[str, Any]],
+                   window: Tuple[float, float], next_start, state: Dict[str, float]
+                   ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Keep the part of a window's transcript that is not covered by its neighbours.
+
+    `state` carries "cut" (where this window's share begins), "seg_end" and "word_end"
+    (end of the last kept segment/word) from the previous window and is updated in place.
+    A window hands over to the next one in the middle of their overlap; if its last
+    segment runs into the window end (i.e. was cut off), it is dropped, wherever it
+    starts, and the next window takes over from that segment's start. A segment
+    longer than the overlap starts before the next window; its head is lost either
+    way, but the next window's copy of the rest is kept instead of a truncated one.
+    """
+    tol = 0.5
+    win_end = window[0] + window[1]
+    cut_to = float("inf") if next_start is None else (next_start + win_end) / 2.0
+    lower = max(state["cut"], state["seg_end"]) - tol
+
+    kept = [seg for seg in segments if lower <= seg["start"] < cut_to]
+    if next_start is not None and kept and kept[-1]["end"] >= win_end - tol:
+        cut_to = kept.pop()["start"]
+
+    word_lower = max(state["cut"] - tol, state["word_end"] - 0.05)
+    kept_words = [w for w in words if word_lower <= w["start"] < cut_to]
+
+    state["cut"] = cut_to
+    if kept:
+        state["seg_end"] = kept[-1]["end"]
+    if kept_words:
+        state["word_end"] = kept_words[-1]["end"]
+    return kept, kept_words
+
+
+async def iter_transcript_windows(audio_path: str, checkpoint=None
+                                  ) -> AsyncGenerator[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]], None]:
+    """
+    Transcribe an audio file as overlapping windows with a bounded pool of Whisper calls.
+
+    Yields (segments, words) per window, in timestamp order, as soon as every earlier
+    window is done. Segments are stitched (offset + overlap dedup) and renumbered.
+    With a VideoCheckpoint, windows it already holds are not transcribed again and
+    every newly transcribed window is saved to it.
+    """
+    duration = await asyncio.to_thread(_probe_duration, audio_path)
+    windows = _plan_windows(duration, TRANSCRIBE_WINDOW_SECONDS, TRANSCRIBE_OVERLAP_SECONDS)
+
+    async def transcribe(index: int, window: Tuple[float, float], call):
+        saved = checkpoint.window(index, window) if checkpoint else None
+        if saved is not None:
+            return saved
+        segments, words = await call()
+        if checkpoint:
+            await asyncio.to_thread(checkpoint.put_window, index, window, segments, words)
+        return segments, words
+
+    if len(windows) == 1:
+        segments, words = await transcribe(0, windows[0], lambda: _whisper_transcribe_file(audio_path))
+        yield segments, words
+        return
+
+    logger.info(f"Chunked transcription: {duration:.0f}s audio in {len(windows)} windows "
+                f"(concurrency={TRANSCRIBE_CONCURRENCY})")
+    sema = asyncio.Semaphore(max(1, TRANSCRIBE_CONCURRENCY))
+    tasks = [asyncio.create_task(transcribe(i, w, lambda i=i, w=w: _transcribe_window(audio_path, i, w, sema)))
+             for i, w in enumerate(windows)]
+    state = {"cut": 0.0, "seg_end": 0.0, "word_end": 0.0}
+    next_id = 0
+    try:
+        for i, task in enumerate(tasks):
+            segments, words = await task
+            next_start = windows[i + 1][0] if i + 1 < len(windows) else None
+            kept, kept_words = _stitch_window(segments, words, windows[i], next_start, state)
+            for seg in kept:
+                seg["id"] = next_id
+                next_id += 1
+            yield kept, kept_words
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+# ---------- Caption fast path ----------
+
+_VTT_TIME_RE = re.compile(r"((?:\d+:)?\d{1,2}:\d{2}\.\d{3})\s+-->\s+((?:\d+:)?\d{1,2}:\d{2}\.\d{3})")
+_VTT_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _vtt_seconds(stamp: str) -> float:
+    parts = [float(p) for p in stamp.split(":")]
+    seconds = 0.0
+    for p in parts:
+        seconds = seconds * 60 + p
+    return seconds
+
+
+def _iter_vtt_cues(body: str) -> Iterator[Dict[str, Any]]:
+    """
+    Parse WebVTT cues into segments {"start", "end", "text"}.
+
+    YouTube auto-captions repeat the previous line at the top of every cue (rolling
+    captions); lines identical to the last emitted one are skipped.
+    """
+    last_line = None
+    lines = body.splitlines()
+    i = 0
+    while i < len(lines):
+        match = _VTT_TIME_RE.search(lines[i])
+        i += 1
+        if not match:
+            continue
+        start, end = _vtt_seconds(match.group(1)), _vtt_seconds(match.group(2))
+        cue_lines = []
+        # cue payload runs until an empty line (YouTube pads cues with " " lines)
+        while i < len(lines) and lines[i] != "":
+            cue_lines.append(lines[i])
+            i += 1
+
+        new_text = []
+        for line in cue_lines:
+            text = html.unescape(_VTT_TAG_RE.sub("", line)).strip()
+            if not text or text == last_line:
+                continue
+            new_text.append(text)
+            last_line = text
+        if new_text:
+            yield {"start": start, "end": end, "text": " ".join(new_text)}
+
+
+def _iter_srv_cues(body: str) -> Iterator[Dict[str, Any]]:
+    """
+    Parse YouTube timedtext XML (srv1 <text start dur> or srv3 <p t d> in ms)
+    into segments {"start", "end", "text"}.
+    """
+    root = ElementTree.fromstring(body)
+    for node in root.iter():
+        if node.tag == "text" and "start" in node.attrib:
+            start = float(node.attrib["start"])
+            end = start + float(node.attrib.get("dur", 0.0))
+        elif node.tag == "p" and "t" in node.attrib:
+            start = int(node.attrib["t"]) / 1000.0
+            end = start + int(node.attrib.get("d", 0)) / 1000.0
+        else:
+            continue
+        text = html.unescape("".join(node.itertext())).replace("\n", " ").strip()
+        if text:
+            yield {"start": start, "end": end, "text": " ".join(text.split())}
+
+
+def _pick_caption_track(info: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Choose the best caption track from yt-dlp metadata.
+
+    Creator subtitles win over auto-generated captions. Auto captions are only used
+    in their original language (YouTube also offers machine translations).
+    Returns ("manual" | "auto", format dict) or None.
+    """
+    langs = [l.strip() for l in CAPTION_LANGUAGES.split(",") if l.strip()]
+    video_lang = (info.get("language") or "").split("-")[0]
+
+    def pick_format(formats):
+        by_ext = {f.get("ext"): f for f in formats or [] if f.get("url")}
+        for ext in CAPTION_FORMATS:
+            if ext in by_ext:
+                return by_ext[ext]
+        return None
+
+    manual = info.get("subtitles") or {}
+    for lang in langs:
+        fmt = pick_format(manual.get(lang))
+        if fmt:
+            return "manual", fmt
+
+    auto = info.get("automatic_captions") or {}
+    for lang in langs:
+        base = lang.split("-")[0]
+        candidates = [f"{lang}-orig"]
+        if not video_lang or video_lang == base:
+            candidates.append(lang)
+        for key in candidates:
+            fmt = pick_format(auto.get(key))
+            if fmt:
+                return "auto", fmt
+    return None
+
+
+def _fetch_caption_track(video_url: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Ask yt-dlp for subtitle metadata (no media download) and fetch the best track.
+
+    Returns (kind, ext, body) or None when the video has no usable track.
+    """
+    ydl_opts = {
+        "skip_download": True,
+        "noplaylist": True,
+        "quiet": True,
+        "no_warnings": True,
+        "writesubtitles": True,
+        "writeautomaticsub": True,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+        picked = _pick_caption_track(info or {})
+        if not picked:
+            return None
+        kind, fmt = picked
+        body = ydl.urlopen(fmt["url"]).read().decode("utf-8", errors="ignore")
+    return kind, fmt.get("ext", ""), body
+
+
+async def iter_caption_sentences(video_url: str, report: Optional[Dict[str, Any]] = None,
+                                 segments_out: Optional[List[Dict[str, Any]]] = None
+                                 ) -> AsyncGenerator[Sentence, None]:
+    """
+    Caption-first fast path: yield Sentence objects built from the video's captions.
+
+    Cues are parsed incrementally and grouped with chunk_caption_cues_into_sentences.
+    Yields nothing if no usable track exists.
+    """
+    track = await asyncio.to_thread(_fetch_caption_track, video_url)
+    if not track:
+        logger.info("No usable caption track; falling back to audio transcription")
+        return
+    kind, ext, body = track
+    cues = _iter_srv_cues(body) if ext.startswith("srv") else _iter_vtt_cues(body)
+    if report is not None:
+        report["caption_kind"] = kind
+        report["caption_format"] = ext
+
+    def recorded(cues):
+        for cue in cues:
+            if segments_out is not None:
+                segments_out.append({"id": len(segments_out), **cue})
+            yield cue
+
+    for s in chunk_caption_cues_into_sentences(recorded(cues)):
+        yield _to_sentence(s)
+
+
 async def transcribe_from_url(video_url: str) -> List[Dict[str, Any]]:
     """
     Full URL -> Transcript (batch).
@@ -231,24 +849,30 @@ async def transcribe_from_url(video_url: str) -> List[Dict[str, Any]]:
     """
     audio_path = None
     try:
+        video_id = extract_video_id(video_url)
+        cached = await asyncio.to_thread(get_transcript, video_id)
+        if cached:
+            logger.info(f"♻️ Transcript cache hit for {video_id}; skipping download and Whisper")
+            return cached["segments"]
+
         logger.info(f"Starting transcription for video: {video_url}")
         audio_path = await download_audio_from_youtube(video_url)
         logger.info(f"Audio ready at: {audio_path}")
+        audio_path, offset_map = await _maybe_trim_non_speech(audio_path)
+
+        segs: List[Dict[str, Any]] = []
+        words: List[Dict[str, Any]] = []
+        if TRANSCRIBE_CHUNKED:
+            async for window_segments, window_words in iter_transcript_windows(audio_path):
+                segs.extend(window_segments)
+                words.extend(window_words)
+        else:
+            segs, words = await _whisper_transcribe_file(audio_path)
+        _remap_to_original(segs, words, offset_map)
 
-        with open(audio_path, "rb") as audio_file:
-            client = openai.OpenAI()
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json",
-                # keep segment and word timings available; we only return segments here,
-                # but word timing can be useful for downstream features/logging.
-                timestamp_granularities=["segment", "word"],
-            )
-
-        segs = getattr(transcript, "segments", None) or transcript.get("segments", [])
         logger.info(f"Transcription completed. Found {len(segs)} segments")
-        return _segments_to_dict_list(segs)
+        await asyncio.to_thread(put_transcript, video_id, segs, words)
+        return segs
 
     except Exception as e:
         logger.error(f"Error in transcribe_from_url: {e}")
@@ -262,42 +886,103 @@ async def transcribe_from_url(video_url: str) -> List[Dict[str, Any]]:
                 logger.warning(f"Failed to cleanup audio file '{audio_path}': {ce}")
 
 
-async def transcribe_from_url_streaming(video_url: str) -> AsyncGenerator[Sentence, None]:
+async def transcribe_from_url_streaming(video_url: str, report: Optional[Dict[str, Any]] = None,
+                                        checkpoint=None) -> AsyncGenerator[Sentence, None]:
     """
     Stream sentences from a YouTube URL as an async generator.
 
     Yields Sentence(start: float, text: str) to match existing consumers.
+    Sources are tried in order: transcript cache, captions (TRANSCRIBE_CAPTIONS_FIRST),
+    then audio download + Whisper. In chunked mode (TRANSCRIBE_CHUNKED) sentences are
+    yielded as soon as each prefix of windows is transcribed.
+
+    If `report` is given it is filled with {"source": "cache" | "captions" | "whisper",
+    "time_to_first_sentence_s", "elapsed_s", "sentences", ...} for the caller's response.
+    A VideoCheckpoint (services/checkpoint.py) lets chunked Whisper transcription
+    resume after an interruption.
     """
+    report = report if report is not None else {}
+    started = time.monotonic()
+    sentence_count = 0
+
+    def track(sent: Sentence) -> Sentence:
+        nonlocal sentence_count
+        sentence_count += 1
+        if sentence_count == 1:
+            report["time_to_first_sentence_s"] = round(time.monotonic() - started, 3)
+        report["sentences"] = sentence_count
+        return sent
+
     audio_path = None
     try:
+        video_id = extract_video_id(video_url)
+        cached = await asyncio.to_thread(get_transcript, video_id)
+        if cached:
+            logger.info(f"♻️ Transcript cache hit for {video_id}; skipping download and Whisper")
+            report["source"] = "cache"
+            report["cached_source"] = cached.get("source", "whisper")
+            # cached captions are raw cues and need the same grouping as the live caption path
+            chunk = (chunk_caption_cues_into_sentences if report["cached_source"] == "captions"
+                     else chunk_segments_into_sentences)
+            for s in chunk(cached["segments"]):
+                yield track(_to_sentence(s))
+            logger.info("Finished streaming all sentences")
+            return
+
+        if TRANSCRIBE_CAPTIONS_FIRST:
+            caption_segments: List[Dict[str, Any]] = []
+            try:
+                async for sent in iter_caption_sentences(video_url, report, caption_segments):
+                    report["source"] = "captions"
+                    yield track(sent)
+            except Exception as e:
+                if sentence_count:
+                    raise
+                logger.warning(f"Caption fast path failed, falling back to audio: {e}")
+            if sentence_count:
+                logger.info(f"📝 Served {sentence_count} sentences from {report.get('caption_kind')} captions")
+                await asyncio.to_thread(put_transcript, video_id, caption_segments, [], "captions")
+                logger.info("Finished streaming all sentences")
+                return
+
+        report["source"] = "whisper"
         logger.info(f"Starting streaming transcription for video: {video_url}")
         audio_path = await download_audio_from_youtube(video_url)
         logger.info(f"Audio downloaded/transcoded to: {audio_path}")
-
-        with open(audio_path, "rb") as audio_file:
-            client = openai.OpenAI()
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json",
-                timestamp_granularities=["segment", "word"],
-            )
-
-        segs = getattr(transcript, "segments", None) or transcript.get("segments", [])
-        logger.info(f"Transcription completed. Found {len(segs)} segments")
-
-        sentences = chunk_segments_into_sentences(segs)  # list of dicts
-        for s in sentences:
-            sent = Sentence(start=float(s["start"]), text=str(s["text"]))
-            logger.info(f"Streaming sentence at {sent.start:.2f}s: {sent.text[:80]!r}")
-            yield sent
-
+        audio_path, offset_map = await _maybe_trim_non_speech(audio_path, report)
+
+        all_segments: List[Dict[str, Any]] = []
+        all_words: List[Dict[str, Any]] = []
+
+        if not TRANSCRIBE_CHUNKED:
+            all_segments, all_words = await _whisper_transcribe_file(audio_path)
+            _remap_to_original(all_segments, all_words, offset_map)
+            logger.info(f"Transcription completed. Found {len(all_segments)} segments")
+            for s in chunk_segments_into_sentences(all_segments):
+                yield track(_to_sentence(s))
+        else:
+            pending: List[Dict[str, Any]] = []
+            async for window_segments, window_words in iter_transcript_windows(audio_path, checkpoint):
+                _remap_to_original(window_segments, window_words, offset_map)
+                all_segments.extend(window_segments)
+                all_words.extend(window_words)
+                sentences, pending = _take_complete_sentences(pending + window_segments)
+                for s in sentences:
+                    yield track(_to_sentence(s))
+
+            # flush the unterminated tail
+            for s in chunk_segments_into_sentences(pending):
+                yield track(_to_sentence(s))
+
+        await asyncio.to_thread(put_transcript, video_id, all_segments, all_words)
         logger.info("Finished streaming all sentences")
 
     except Exception as e:
         logger.error(f"Error in streaming transcription: {e}")
+        report["error"] = str(e)
         return
     finally:
+        report["elapsed_s"] = round(time.monotonic() - started, 3)
         if audio_path and os.path.exists(audio_path):
             try:
                 os.remove(audio_path)
@@ -0,0 +1,41 @@
+"""
+YouTube URL helpers shared by the API and the pipeline services
+"""
+
+import re
+from urllib.parse import urlparse, parse_qs
+
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+
+def extract_video_id(video_url: str) -> str:
+    """
+    Extract the canonical 11-character YouTube video ID from a URL.
+
+    Supports watch?v=, youtu.be/, /shorts/, /embed/, /live/ and /v/ links as well
+    as bare IDs. Returns "unknown" if no ID can be found.
+    """
+    try:
+        url = (video_url or "").strip()
+        if _VIDEO_ID_RE.match(url):
+            return url
+        if "://" not in url:
+            url = "https://" + url
+
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        candidate = ""
+        if host.endswith("youtu.be"):
+            candidate = parsed.path.lstrip("/").split("/")[0]
+        elif "youtube" in host:
+            query_id = parse_qs(parsed.query).get("v", [""])[0]
+            if query_id:
+                candidate = query_id
+            else:
+                parts = [p for p in parsed.path.split("/") if p]
+                if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+                    candidate = parts[1]
+
+        return candidate if _VIDEO_ID_RE.match(candidate) else "unknown"
+    except Exception:
+        return "unknown"
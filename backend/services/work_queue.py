@@ -0,0 +1,411 @@
+"""
+Work Queue - run pipelines in separate worker processes (PIPELINE_MODE=worker)
+
+By default (PIPELINE_MODE=inline) every pipeline runs on the API's event loop.
+In worker mode, new_pipeline() returns a RemotePipeline instead. It puts the run
+into a durable SQLite queue (WORK_QUEUE_PATH) and tails the events that a worker
+process publishes for it, so the REST, SSE, JSONL and job endpoints work the
+same in both modes. Workers are started with `python worker.py`; each process
+runs up to WORKER_RUNS_PER_PROCESS videos on its own event loop and core, so a
+slow video or a blocking yt-dlp/ffmpeg call never stalls the API or other
+workers' streams. The queue relies on SQLite WAL mode and file locks, so
+WORK_QUEUE_PATH must be on a local filesystem and every worker runs on the
+API's host; WAL and flock are not reliable on network filesystems. Spreading
+workers over several hosts needs a network broker behind the functions below.
+
+Tables:
+- pipeline_runs: one row per run (queued/running/completed/failed/cancelled)
+  with the worker's heartbeat. A run whose worker stops heartbeating for
+  WORKER_STALE_S is claimed again by another worker and resumes from its stage
+  checkpoint. Events that were already published are not repeated. After
+  WORKER_MAX_ATTEMPTS lost workers the run is marked failed.
+- pipeline_events: the run's typed events (event.dict()) in order. The
+  consumer deletes them once it is done with the run; workers sweep what is
+  left of runs that finished more than WORK_QUEUE_RETENTION_S ago.
+- pipeline_viewers: the latest playhead of each viewer of a run, forwarded to
+  the worker's scheduler; a viewer's row is deleted when it disconnects.
+- worker_stats: each worker process's provider rate limiter snapshot, so
+  /api/rate-limits can report them from the API process.
+
+A run whose consumer goes away is marked cancelled, and its worker stops it.
+
+Every thread uses its own connection (WAL readers never wait for a writer) and
+async code reaches the database through asyncio.to_thread, so a worker that
+holds the write lock cannot stall the API's event loop.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from services.pipeline import (DoneEvent, ErrorEvent, PipelineEvent, StartEvent, VideoPipeline,
+                               parse_event)
+from services.playhead_scheduler import PlayheadScheduler, register_stream, unregister_stream
+from services.rate_limiter import rate_limit_stats
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "inline").lower()
+WORKER_RUNS_PER_PROCESS = max(1, int(os.getenv("WORKER_RUNS_PER_PROCESS", "2")))
+WORKER_POLL_INTERVAL_S = float(os.getenv("WORKER_POLL_INTERVAL_S", "0.2"))
+WORKER_HEARTBEAT_S = float(os.getenv("WORKER_HEARTBEAT_S", "5"))
+WORKER_STALE_S = float(os.getenv("WORKER_STALE_S", "30"))
+WORKER_MAX_ATTEMPTS = max(1, int(os.getenv("WORKER_MAX_ATTEMPTS", "3")))
+WORK_QUEUE_RETENTION_S = float(os.getenv("WORK_QUEUE_RETENTION_S", "3600"))
+WORK_QUEUE_PATH = os.getenv("WORK_QUEUE_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "work_queue.sqlite"
+)
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+SWEEP_INTERVAL_S = 60.0
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def _create_schema(db: sqlite3.Connection) -> None:
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS pipeline_runs ("
+            " id TEXT PRIMARY KEY, video_url TEXT NOT NULL, params TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'queued'"
+            " CHECK (status IN ('queued', 'running', 'completed', 'failed', 'cancelled')),"
+            " worker TEXT, attempts INTEGER NOT NULL DEFAULT 0, heartbeat_at REAL,"
+            " created_at REAL NOT NULL, finished_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_runs_status ON pipeline_runs(status, created_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_runs_finished ON pipeline_runs(finished_at)")
+        # the primary key is the (run_id, seq) index that consumers tail
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS pipeline_events ("
+            " run_id TEXT NOT NULL, seq INTEGER NOT NULL, event TEXT NOT NULL, PRIMARY KEY (run_id, seq))"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS pipeline_viewers ("
+            " run_id TEXT NOT NULL, viewer TEXT NOT NULL, position REAL NOT NULL, playing INTEGER NOT NULL,"
+            " rate REAL NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (run_id, viewer))"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS worker_stats ("
+            " worker TEXT PRIMARY KEY, rate_limits TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        _schema_ready = True
+
+
+def _conn() -> sqlite3.Connection:
+    """This thread's connection (autocommit; claims use BEGIN IMMEDIATE so they are atomic across processes)."""
+    db = getattr(_local, "db", None)
+    if db is None:
+        os.makedirs(os.path.dirname(WORK_QUEUE_PATH), exist_ok=True)
+        db = sqlite3.connect(WORK_QUEUE_PATH, isolation_level=None, timeout=30)
+        _create_schema(db)
+        _local.db = db
+    return db
+
+
+def _execute(sql: str, params: Tuple = ()) -> list:
+    return _conn().execute(sql, params).fetchall()
+
+
+async def _aexecute(sql: str, params: Tuple = ()) -> list:
+    return await asyncio.to_thread(_execute, sql, params)
+
+
+def _execute_soon(sql: str, params: Tuple = ()) -> None:
+    """Write without waiting: in a thread when called on the event loop, right away otherwise."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _execute(sql, params)
+        return
+    loop.run_in_executor(None, _execute, sql, params).add_done_callback(_log_write_failure)
+
+
+def _log_write_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception():
+        logger.warning(f"Work queue write failed: {future.exception()}")
+
+
+# ---------- API side ----------
+
+def enqueue_run(run_id: str, video_url: str, params: Dict[str, Any]) -> None:
+    _execute("INSERT INTO pipeline_runs (id, video_url, params, created_at) VALUES (?, ?, ?, ?)",
+             (run_id, video_url, json.dumps(params), time.time()))
+    logger.info(f"📤 Queued pipeline run {run_id} for {video_url}")
+
+
+def cancel_run(run_id: str) -> None:
+    _execute("UPDATE pipeline_runs SET status = 'cancelled', finished_at = ?"
+             " WHERE id = ? AND status IN ('queued', 'running')", (time.time(), run_id))
+
+
+def _release_run(run_id: str, finished: bool) -> None:
+    """The consumer is done with the run: cancel it if it still runs, and drop its events."""
+    if not finished:
+        cancel_run(run_id)
+    _execute("DELETE FROM pipeline_events WHERE run_id = ?", (run_id,))
+    _execute("DELETE FROM pipeline_viewers WHERE run_id = ?", (run_id,))
+
+
+def sweep_finished_runs(retention_s: float = WORK_QUEUE_RETENTION_S) -> int:
+    """Delete runs (and their leftover events) that finished more than retention_s ago."""
+    cutoff = time.time() - retention_s
+    finished = "SELECT id FROM pipeline_runs WHERE finished_at < ?"
+    _execute(f"DELETE FROM pipeline_events WHERE run_id IN ({finished})", (cutoff,))
+    _execute(f"DELETE FROM pipeline_viewers WHERE run_id IN ({finished})", (cutoff,))
+    _execute("DELETE FROM worker_stats WHERE updated_at < ?", (cutoff,))
+    return _conn().execute("DELETE FROM pipeline_runs WHERE finished_at < ?", (cutoff,)).rowcount
+
+
+class RemotePlayhead(PlayheadScheduler):
+    """Local playhead estimate for the API side; updates are forwarded to the worker running the stream."""
+
+    def __init__(self, run_id: str):
+        super().__init__(concurrency=1)
+        self.run_id = run_id
+
+    def update_playhead(self, position: float, playing: bool = True, rate: float = 1.0,
+                        viewer: str = "default") -> None:
+        super().update_playhead(position, playing, rate, viewer)
+        state = self.viewer_state(viewer)
+        # written off the event loop; an older update that lands late does not overwrite a newer one
+        _execute_soon("INSERT INTO pipeline_viewers (run_id, viewer, position, playing, rate, updated_at)"
+                      " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (run_id, viewer) DO UPDATE SET"
+                      " position = excluded.position, playing = excluded.playing, rate = excluded.rate,"
+                      " updated_at = excluded.updated_at WHERE excluded.updated_at > pipeline_viewers.updated_at",
+                      (self.run_id, viewer, state["position"], int(state["playing"]), state["rate"], time.time()))
+
+    def remove_viewer(self, viewer: str) -> None:
+        super().remove_viewer(viewer)
+        _execute_soon("DELETE FROM pipeline_viewers WHERE run_id = ? AND viewer = ?", (self.run_id, viewer))
+
+
+class RemotePipeline:
+    """Same interface as VideoPipeline, but the run happens in a worker process."""
+
+    def __init__(self, url: str, max_claims: Optional[int] = None, max_spend_usd: Optional[float] = None,
+                 playhead: bool = False):
+        self.url = url
+        self.params = {"max_claims": max_claims, "max_spend_usd": max_spend_usd}
+        self.run_id = uuid.uuid4().hex  # queued when events() starts
+        self.stream_id = register_stream(RemotePlayhead(self.run_id))[0] if playhead else None
+
+    async def events(self) -> AsyncIterator[PipelineEvent]:
+        seq = 0
+        finished = False
+        drained = False
+        try:
+            await asyncio.to_thread(enqueue_run, self.run_id, self.url, self.params)
+            while True:
+                rows = await _aexecute("SELECT seq, event FROM pipeline_events WHERE run_id = ? AND seq > ?"
+                                       " ORDER BY seq", (self.run_id, seq))
+                for seq, raw in rows:
+                    event = parse_event(json.loads(raw))
+                    if isinstance(event, StartEvent):
+                        event.stream_id = self.stream_id  # playhead updates come in through this process
+                    yield event
+                    if isinstance(event, DoneEvent) or (isinstance(event, ErrorEvent) and event.scope == "pipeline"):
+                        finished = True
+                        return
+                if not rows:
+                    status = await _aexecute("SELECT status FROM pipeline_runs WHERE id = ?", (self.run_id,))
+                    if status and status[0][0] in FINISHED_STATUSES:
+                        if not drained:
+                            drained = True  # its last events may have landed after our read
+                            continue
+                        finished = True
+                        yield ErrorEvent(scope="pipeline", message=f"pipeline run {status[0][0]} without a result")
+                        return
+                    await asyncio.sleep(WORKER_POLL_INTERVAL_S)
+        finally:
+            # not awaited: the consumer may be closing because its task was cancelled
+            asyncio.get_running_loop().run_in_executor(
+                None, _release_run, self.run_id, finished).add_done_callback(_log_write_failure)
+            if self.stream_id:
+                unregister_stream(self.stream_id)
+
+
+def new_pipeline(url: str, max_claims: Optional[int] = None, max_spend_usd: Optional[float] = None,
+                 playhead: bool = False):
+    """A pipeline for this video: in this process, or in a worker when PIPELINE_MODE=worker."""
+    cls = RemotePipeline if PIPELINE_MODE == "worker" else VideoPipeline
+    return cls(url, max_claims, max_spend_usd, playhead=playhead)
+
+
+def work_queue_stats() -> Dict[str, Any]:
+    counts = dict(_execute("SELECT status, COUNT(*) FROM pipeline_runs GROUP BY status"))
+    workers = _execute("SELECT worker, COUNT(*) FROM pipeline_runs WHERE status = 'running'"
+                       " AND heartbeat_at >= ? GROUP BY worker", (time.time() - WORKER_STALE_S,))
+    return {"mode": PIPELINE_MODE, "runs": counts, "active_workers": dict(workers)}
+
+
+def worker_rate_limit_stats() -> Dict[str, Any]:
+    """Latest rate limiter snapshot of every live worker process."""
+    rows = _execute("SELECT worker, rate_limits FROM worker_stats WHERE updated_at >= ? ORDER BY worker",
+                    (time.time() - WORKER_STALE_S,))
+    return {worker: json.loads(raw) for worker, raw in rows}
+
+
+# ---------- worker side ----------
+
+def _claim_run(worker: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+    """Atomically take the oldest queued run, or one whose worker stopped heartbeating."""
+    now = time.time()
+    db = _conn()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        db.execute("UPDATE pipeline_runs SET status = 'failed', finished_at = ?"
+                   " WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                   (now, now - WORKER_STALE_S, WORKER_MAX_ATTEMPTS))
+        row = db.execute(
+            "SELECT id, video_url, params FROM pipeline_runs WHERE status = 'queued'"
+            " OR (status = 'running' AND heartbeat_at < ?) ORDER BY created_at LIMIT 1",
+            (now - WORKER_STALE_S,),
+        ).fetchone()
+        if row:
+            db.execute("UPDATE pipeline_runs SET status = 'running', worker = ?, attempts = attempts + 1,"
+                       " heartbeat_at = ? WHERE id = ?", (worker, now, row[0]))
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return (row[0], row[1], json.loads(row[2])) if row else None
+
+
+def _event_key(event: PipelineEvent) -> Tuple:
+    """Identity of an event within a run, so a resumed run does not publish it twice."""
+    data = event.dict()
+    return (data["type"], data.get("sentence_id"), data.get("index"), data.get("stage"), data.get("claim_id"))
+
+
+class _Publisher:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        rows = _execute("SELECT seq, event FROM pipeline_events WHERE run_id = ? ORDER BY seq", (run_id,))
+        self.seq = rows[-1][0] if rows else 0
+        self.published: Set[Tuple] = {_event_key(parse_event(json.loads(raw))) for _, raw in rows}
+
+    def publish(self, event: PipelineEvent) -> None:
+        key = _event_key(event)
+        if key in self.published and not isinstance(event, ErrorEvent):
+            return
+        self.published.add(key)
+        self.seq += 1
+        _execute("INSERT INTO pipeline_events (run_id, seq, event) VALUES (?, ?, ?)",
+                 (self.run_id, self.seq, json.dumps(event.dict(), ensure_ascii=False)))
+
+
+async def _control(run_id: str, worker: str, pipeline: VideoPipeline, task: asyncio.Task) -> bool:
+    """Heartbeat the run and forward viewer playheads; returns True after stopping a cancelled run."""
+    last_heartbeat = 0.0
+    viewers: Dict[str, float] = {}  # viewer -> updated_at of the playhead last forwarded
+    while not task.done():
+        now = time.time()
+        if now - last_heartbeat >= WORKER_HEARTBEAT_S:
+            status = await _aexecute("SELECT status, worker FROM pipeline_runs WHERE id = ?", (run_id,))
+            if not status or status[0] != ("running", worker):
+                logger.info(f"🛑 Run {run_id} was {status[0][0] if status else 'removed'}; stopping")
+                task.cancel()
+                return True
+            await _aexecute("UPDATE pipeline_runs SET heartbeat_at = ? WHERE id = ?", (now, run_id))
+            last_heartbeat = now
+        rows = await _aexecute("SELECT viewer, position, playing, rate, updated_at FROM pipeline_viewers"
+                               " WHERE run_id = ?", (run_id,))
+        for viewer, position, playing, rate, updated_at in rows:
+            if updated_at > viewers.get(viewer, 0.0):
+                viewers[viewer] = updated_at
+                pipeline.scheduler.update_playhead(position, bool(playing), rate, viewer)
+        for viewer in set(viewers) - {row[0] for row in rows}:
+            del viewers[viewer]
+            pipeline.scheduler.remove_viewer(viewer)
+        await asyncio.sleep(WORKER_POLL_INTERVAL_S)
+    return False
+
+
+async def _execute_run(worker: str, run_id: str, video_url: str, params: Dict[str, Any]) -> None:
+    logger.info(f"🏗️ Worker {worker} running {run_id} for {video_url}")
+    pipeline = VideoPipeline(video_url, params.get("max_claims"), params.get("max_spend_usd"))
+    publisher = await asyncio.to_thread(_Publisher, run_id)
+    outcome = {"status": "failed"}
+
+    async def run():
+        async for event in pipeline.events():
+            await asyncio.to_thread(publisher.publish, event)
+            if isinstance(event, DoneEvent):
+                outcome["status"] = "completed"
+
+    task = asyncio.create_task(run())
+    control = asyncio.create_task(_control(run_id, worker, pipeline, task))
+    try:
+        await task
+    except asyncio.CancelledError:
+        if control.done() and not control.cancelled() and control.result():
+            return  # cancelled by its consumer; already marked in the queue
+        raise  # the worker itself is shutting down; the run is picked up again once stale
+    finally:
+        control.cancel()
+    await _aexecute("UPDATE pipeline_runs SET status = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+                    (outcome["status"], time.time(), run_id))
+    logger.info(f"🏁 Run {run_id} {outcome['status']}")
+
+
+def publish_worker_stats(worker: str) -> None:
+    _execute("INSERT OR REPLACE INTO worker_stats (worker, rate_limits, updated_at) VALUES (?, ?, ?)",
+             (worker, json.dumps(rate_limit_stats()), time.time()))
+
+
+async def _report_stats(worker: str) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(publish_worker_stats, worker)
+        except Exception as e:
+            logger.warning(f"Could not publish worker stats: {e}")
+        await asyncio.sleep(WORKER_HEARTBEAT_S)
+
+
+async def run_worker(name: Optional[str] = None, concurrency: int = WORKER_RUNS_PER_PROCESS) -> None:
+    """Claim and run queued pipelines forever, at most `concurrency` at a time."""
+    worker = name or f"{socket.gethostname()}:{os.getpid()}"
+    slots = asyncio.Semaphore(max(1, concurrency))
+    running: Set[asyncio.Task] = set()
+    last_sweep = 0.0
+    logger.info(f"👷 Worker {worker} polling {WORK_QUEUE_PATH} ({concurrency} runs at a time)")
+    reporter = asyncio.create_task(_report_stats(worker))
+    try:
+        while True:
+            if time.monotonic() - last_sweep >= SWEEP_INTERVAL_S:
+                last_sweep = time.monotonic()
+                swept = await asyncio.to_thread(sweep_finished_runs)
+                if swept:
+                    logger.info(f"🧹 Swept {swept} finished pipeline runs")
+            await slots.acquire()
+            claimed = await asyncio.to_thread(_claim_run, worker)
+            if claimed is None:
+                slots.release()
+                await asyncio.sleep(WORKER_POLL_INTERVAL_S)
+                continue
+            task = asyncio.create_task(_execute_run(worker, *claimed))
+            running.add(task)
+
+            def finished(t: asyncio.Task) -> None:
+                running.discard(t)
+                slots.release()
+
+            task.add_done_callback(finished)
+    finally:
+        reporter.cancel()
+        for task in running:
+            task.cancel()
+        await asyncio.gather(reporter, *running, return_exceptions=True)
@@ -0,0 +1,134 @@
+"""
+Tests for the caption fast path: WebVTT and timedtext parsing, caption track choice and sentence grouping.
+Run from the backend directory: python3 -m pytest tests/test_captions.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import services.transcription_service as transcription_service
+from services.transcription_service import (
+    _iter_srv_cues, _iter_vtt_cues, _pick_caption_track, _vtt_seconds, chunk_caption_cues_into_sentences,
+)
+
+
+def test_vtt_seconds():
+    assert _vtt_seconds("00:01.500") == 1.5
+    assert _vtt_seconds("01:02.250") == 62.25
+    assert _vtt_seconds("01:00:00.000") == 3600.0
+
+
+def test_vtt_cues_basic():
+    body = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.500
+Hello and welcome.
+
+00:00:02.500 --> 00:00:05.000 align:start position:0%
+The Eiffel Tower is 330 metres tall.
+"""
+    assert list(_iter_vtt_cues(body)) == [
+        {"start": 0.0, "end": 2.5, "text": "Hello and welcome."},
+        {"start": 2.5, "end": 5.0, "text": "The Eiffel Tower is 330 metres tall."},
+    ]
+
+
+def test_vtt_rolling_auto_captions_are_not_repeated():
+    # YouTube auto-captions repeat the previous line at the top of every cue, with inline timing tags
+    body = """WEBVTT
+
+00:00:01.000 --> 00:00:03.000 align:start position:0%
+the<00:00:01.500><c> moon</c><00:00:02.000><c> is</c>
+
+
+00:00:03.000 --> 00:00:03.010 align:start position:0%
+the moon is
+
+
+00:00:03.010 --> 00:00:05.000 align:start position:0%
+the moon is
+about<00:00:03.500><c> 384,000</c><00:00:04.000><c> km</c><00:00:04.500><c> away</c>
+"""
+    cues = list(_iter_vtt_cues(body))
+    assert [c["text"] for c in cues] == ["the moon is", "about 384,000 km away"]
+    assert cues[1]["start"] == 3.01
+
+
+def test_vtt_entities_are_unescaped():
+    body = "WEBVTT\n\n00:00.000 --> 00:01.000\nSalt &amp; pepper &gt; sugar\n"
+    assert [c["text"] for c in _iter_vtt_cues(body)] == ["Salt & pepper > sugar"]
+
+
+def test_srv_cues_srv1_and_srv3():
+    srv1 = '<transcript><text start="1.5" dur="2">It&amp;#39;s   raining</text></transcript>'
+    assert list(_iter_srv_cues(srv1)) == [{"start": 1.5, "end": 3.5, "text": "It's raining"}]
+    srv3 = '<timedtext><body><p t="2000" d="1500">Water boils<s> at 100 C</s></p></body></timedtext>'
+    assert list(_iter_srv_cues(srv3)) == [{"start": 2.0, "end": 3.5, "text": "Water boils at 100 C"}]
+
+
+def test_pick_caption_track_prefers_manual_subtitles():
+    info = {
+        "language": "en",
+        "subtitles": {"en": [{"ext": "vtt", "url": "manual"}]},
+        "automatic_captions": {"en": [{"ext": "vtt", "url": "auto"}]},
+    }
+    kind, fmt = _pick_caption_track(info)
+    assert (kind, fmt["url"]) == ("manual", "manual")
+
+
+def test_pick_caption_track_skips_machine_translations():
+    # a Spanish video offers "en" auto captions only as a translation
+    info = {"language": "es", "automatic_captions": {"en": [{"ext": "vtt", "url": "translated"}]}}
+    assert _pick_caption_track(info) is None
+    info["automatic_captions"]["en-orig"] = [{"ext": "vtt", "url": "orig"}]
+    kind, fmt = _pick_caption_track(info)
+    assert (kind, fmt["url"]) == ("auto", "orig")
+
+
+def test_pick_caption_track_none_without_tracks():
+    assert _pick_caption_track({}) is None
+
+
+def _auto_cues(n):
+    # auto captions: six words per cue, no punctuation
+    return [{"id": i, "start": i * 2.0, "end": i * 2.0 + 2.0, "text": f"word{i} and then some more words"}
+            for i in range(n)]
+
+
+def test_caption_cues_are_split_without_punctuation(monkeypatch):
+    monkeypatch.setattr(transcription_service, "CAPTION_MAX_SENTENCE_WORDS", 40)
+    sentences = list(chunk_caption_cues_into_sentences(_auto_cues(50)))
+    assert len(sentences) == 8
+    assert all(len(s["text"].split()) <= 42 for s in sentences)
+    assert sentences[1]["start"] == 14.0
+
+
+def test_caption_cues_close_on_punctuation():
+    cues = [{"start": 0.0, "text": "Hello there."}, {"start": 1.0, "text": "The tower is"},
+            {"start": 2.0, "text": "330 metres tall."}]
+    assert list(chunk_caption_cues_into_sentences(cues)) == [
+        {"start": 0.0, "text": "Hello there."}, {"start": 1.0, "text": "The tower is 330 metres tall."},
+    ]
+
+
+def test_cached_captions_are_grouped_like_live_captions(monkeypatch):
+    monkeypatch.setattr(transcription_service, "CAPTION_MAX_SENTENCE_WORDS", 40)
+    cues = _auto_cues(50)
+    monkeypatch.setattr(transcription_service, "get_transcript",
+                        lambda video_id: {"segments": cues, "words": [], "source": "captions"})
+
+    async def main():
+        report = {}
+        gen = transcription_service.transcribe_from_url_streaming("https://www.youtube.com/watch?v=dQw4w9WgXcQ", report)
+        return [s async for s in gen], report
+
+    sentences, report = asyncio.run(main())
+    assert report["source"] == "cache" and report["cached_source"] == "captions"
+    assert [s.text for s in sentences] == [s["text"] for s in chunk_caption_cues_into_sentences(cues)]
+    assert len(sentences) == 8
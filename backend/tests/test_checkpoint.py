@@ -0,0 +1,127 @@
+"""
+Tests for stage checkpoints: single-run ownership, resuming saved work and malformed records.
+Run from the backend directory: python3 -m pytest tests/test_checkpoint.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+
+import pytest
+
+import services.checkpoint as checkpoint
+import services.pipeline as pipeline
+from models import Claim, ClaimResponse, Sentence
+from services.checkpoint import VideoCheckpoint, open_checkpoint
+from services.pipeline import ErrorEvent, VideoPipeline
+
+fcntl = pytest.importorskip("fcntl")
+
+SENTENCE = Sentence(start=12.0, text="The tower is 330 metres tall.")
+CLAIM = Claim(start=12.0, claim="The tower is 330 metres tall.")
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_ENABLED", True)
+    monkeypatch.setattr(checkpoint, "_held", set())
+    return tmp_path
+
+
+def _response(status="verified"):
+    return ClaimResponse(claim=CLAIM, status=status, written_summary="ok", evidence=[])
+
+
+def _reopened(video_id="vid1"):
+    cp = open_checkpoint(video_id)
+    cp.load()
+    return cp
+
+
+def test_one_run_owns_a_checkpoint_at_a_time(checkpoint_dir):
+    owner = open_checkpoint("vid1")
+    assert owner is not None
+    assert open_checkpoint("vid1") is None  # a second run in this process
+    assert open_checkpoint("vid2") is not None
+    owner.release()
+    assert not (checkpoint_dir / "vid1.lock").exists()
+    assert open_checkpoint("vid1") is not None
+
+
+def test_lock_held_by_another_process_is_respected(checkpoint_dir):
+    # flock locks belong to the open file, so a separate open() stands in for another process
+    fd = os.open(str(checkpoint_dir / "vid1.lock"), os.O_RDWR | os.O_CREAT)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        assert open_checkpoint("vid1") is None
+    finally:
+        os.close(fd)
+    assert open_checkpoint("vid1") is not None
+
+
+def test_disabled_or_unknown_video_has_no_checkpoint(monkeypatch):
+    assert open_checkpoint("unknown") is None
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_ENABLED", False)
+    assert open_checkpoint("vid1") is None
+
+
+def test_saved_work_is_resumed_when_it_matches():
+    first = open_checkpoint("vid1")
+    first.put_window(0, (0.0, 600.0), [{"start": 0.0, "end": 5.0, "text": "hi."}], [])
+    first.put_claims(1, SENTENCE, [CLAIM])
+    first.put_fact_check(1, 0, _response())
+    first.put_fact_check(2, 0, _response(status="skipped"))  # retried, not saved
+    first.release()
+
+    resumed = _reopened()
+    assert resumed.window(0, (0.0, 600.0))[0][0]["text"] == "hi."
+    assert resumed.window(0, (0.0, 500.0)) is None
+    assert resumed.claims(1, SENTENCE) == [CLAIM]
+    assert resumed.claims(1, Sentence(start=12.0, text="Something else.")) is None
+    assert resumed.fact_check(1, 0, CLAIM).status == "verified"
+    assert resumed.fact_check(2, 0, CLAIM) is None
+    assert resumed.report() == {"resumed_windows": 1, "resumed_sentences": 1, "resumed_fact_checks": 1}
+
+
+def test_clear_removes_the_file(checkpoint_dir):
+    cp = open_checkpoint("vid1")
+    cp.put_claims(1, SENTENCE, [CLAIM])
+    cp.clear()
+    assert not (checkpoint_dir / "vid1.jsonl").exists()
+
+
+def test_malformed_records_are_skipped(checkpoint_dir):
+    good = {"kind": "claims", "sentence_id": 1, "start": 12.0, "text": SENTENCE.text, "claims": [CLAIM.dict()]}
+    lines = [
+        json.dumps({"kind": "fact_check", "sentence_id": 1, "response": _response().dict()}),  # no index
+        json.dumps({"kind": "claims", "sentence_id": 2, "start": 1.0, "text": "x", "claims": [{"start": 1.0}]}),
+        json.dumps(["not", "a", "record"]),
+        json.dumps({"kind": "mystery"}),
+        json.dumps(good),
+        '{"kind": "window", "ind',  # torn last line
+    ]
+    (checkpoint_dir / "vid1.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    cp = _reopened()
+    assert cp.claims(1, SENTENCE) == [CLAIM]
+    assert cp.claims(2, Sentence(start=1.0, text="x")) is None
+    assert cp.fact_check(1, 0, CLAIM) is None
+
+
+def test_pipeline_setup_failure_ends_with_a_pipeline_error(monkeypatch):
+    def broken(video_id):
+        raise RuntimeError("checkpoint unavailable")
+
+    monkeypatch.setattr(pipeline, "open_checkpoint", broken)
+
+    async def main():
+        return [event async for event in VideoPipeline("https://www.youtube.com/watch?v=dQw4w9WgXcQ").events()]
+
+    events = asyncio.run(main())
+    assert len(events) == 1
+    assert isinstance(events[0], ErrorEvent)
+    assert events[0].scope == "pipeline" and events[0].message == "checkpoint unavailable"
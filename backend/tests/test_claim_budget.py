@@ -0,0 +1,193 @@
+"""
+Tests for ClaimBudget: admit strong claims, defer weak ones, release or skip them on close().
+Run from the backend directory: python3 -m pytest tests/test_claim_budget.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+
+import services.claim_budget as claim_budget
+from models import CacheInfo, Claim, ClaimResponse
+from services.claim_budget import ClaimBudget, claim_priority_score
+
+STRONG = "In 2023 Germany exported 1.5 trillion dollars of goods, more than France"
+MEDIUM = "The unemployment rate in Spain fell to 11.7 percent in 2023"
+WEAK = "some people like things"
+WEAKER = "it was nice"
+
+
+@pytest.fixture(autouse=True)
+def no_known_verdicts(monkeypatch):
+    async def lookup(claim):
+        return None
+
+    monkeypatch.setattr(claim_budget, "lookup_known_fact_check", lookup)
+    monkeypatch.setattr(claim_budget, "CLAIM_BUDGET_ADMIT_SCORE", 0.5)
+
+
+def _response(claim, cache=None):
+    return ClaimResponse(claim=claim, status="verified", written_summary="ok", evidence=[], cache=cache)
+
+
+def _claim(text, start=0.0):
+    return Claim(start=start, claim=text)
+
+
+def make_fact_check(checked):
+    async def fact_check(claim):
+        checked.append(claim.claim)
+        return _response(claim)
+    return fact_check
+
+
+def test_priority_score_rewards_specific_and_repeated_claims():
+    assert claim_priority_score(STRONG) > claim_priority_score(WEAK)
+    assert claim_priority_score(MEDIUM, frequency=8) > claim_priority_score(MEDIUM)
+    assert 0.0 <= claim_priority_score(WEAKER) <= claim_priority_score(STRONG, frequency=100) <= 1.0
+
+
+def test_limit_is_the_tighter_of_claims_and_spend(monkeypatch):
+    monkeypatch.setattr(claim_budget, "FACT_CHECK_USD_PER_CLAIM", 0.01)
+    assert ClaimBudget(max_claims=10, max_spend_usd=0.05).limit == 5
+    assert ClaimBudget(max_claims=3, max_spend_usd=1.0).limit == 3
+    assert ClaimBudget(max_claims=0, max_spend_usd=0).limit is None
+
+
+def test_unlimited_budget_passes_through():
+    checked = []
+
+    async def main():
+        budget = ClaimBudget(max_claims=0, max_spend_usd=0)
+        return budget, await budget.run(_claim(WEAKER), make_fact_check(checked))
+
+    budget, response = asyncio.run(main())
+    assert not budget.enabled
+    assert checked == [WEAKER]
+    assert response.score is None
+
+
+def test_strong_claim_is_checked_at_once_and_scored():
+    checked = []
+
+    async def main():
+        budget = ClaimBudget(max_claims=2, max_spend_usd=0)
+        budget.observe(_claim(STRONG))
+        return budget, await budget.run(_claim(STRONG), make_fact_check(checked))
+
+    budget, response = asyncio.run(main())
+    assert checked == [STRONG]
+    assert response.status == "verified"
+    assert response.score == claim_priority_score(STRONG)
+    assert budget.stats["checked"] == 1 and budget.stats["deferred"] == 0
+
+
+def test_claim_outside_the_top_k_so_far_is_deferred():
+    checked = []
+
+    async def main():
+        budget = ClaimBudget(max_claims=1, max_spend_usd=0)
+        for text in (STRONG, MEDIUM):
+            budget.observe(_claim(text))
+        medium = asyncio.create_task(budget.run(_claim(MEDIUM), make_fact_check(checked)))
+        await asyncio.sleep(0)
+        deferred = budget.stats["deferred"]
+        strong = await budget.run(_claim(STRONG), make_fact_check(checked))
+        budget.close()
+        return budget, deferred, strong, await medium
+
+    budget, deferred, strong, medium = asyncio.run(main())
+    assert deferred == 1
+    assert checked == [STRONG]
+    assert strong.status == "verified"
+    assert medium.status == "skipped"
+    assert medium.score == claim_priority_score(MEDIUM)
+    assert budget.stats["skipped"] == 1
+
+
+def test_close_spends_the_rest_of_the_budget_on_the_best_deferred_claims():
+    checked = []
+
+    async def main():
+        budget = ClaimBudget(max_claims=2, max_spend_usd=0)
+        tasks = []
+        for text in (WEAKER, WEAK, "The weather is okay today"):
+            budget.observe(_claim(text))
+            tasks.append(asyncio.create_task(budget.run(_claim(text), make_fact_check(checked))))
+        await asyncio.sleep(0)
+        assert checked == []  # all below CLAIM_BUDGET_ADMIT_SCORE
+        budget.close()
+        return budget, await asyncio.gather(*tasks)
+
+    budget, results = asyncio.run(main())
+    assert sorted(checked) == sorted(["The weather is okay today", WEAKER])
+    assert [r.status for r in results] == ["verified", "skipped", "verified"]
+    assert budget.report()["checked"] == 2 and budget.report()["deferred"] == 3
+
+
+def test_claims_after_close_are_checked_until_the_budget_runs_out():
+    checked = []
+
+    async def main():
+        budget = ClaimBudget(max_claims=1, max_spend_usd=0)
+        budget.close()
+        first = await budget.run(_claim(WEAK), make_fact_check(checked))
+        second = await budget.run(_claim(WEAKER), make_fact_check(checked))
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert checked == [WEAK]
+    assert (first.status, second.status) == ("verified", "skipped")
+
+
+def test_known_verdicts_do_not_count_against_the_budget(monkeypatch):
+    cached = CacheInfo(source="exact", similarity=1.0, age_seconds=5.0, matched_claim=STRONG)
+
+    async def lookup(claim):
+        return _response(claim, cache=cached)
+
+    monkeypatch.setattr(claim_budget, "lookup_known_fact_check", lookup)
+    checked = []
+
+    async def main():
+        budget = ClaimBudget(max_claims=1, max_spend_usd=0)
+        return budget, await asyncio.gather(*(budget.run(_claim(t), make_fact_check(checked))
+                                              for t in (STRONG, MEDIUM, WEAK)))
+
+    budget, results = asyncio.run(main())
+    assert checked == []
+    assert all(r.cache is not None and r.score is not None for r in results)
+    assert budget.stats["known"] == 3 and budget.stats["checked"] == 0
+
+
+def test_resumed_fresh_verdicts_use_up_budget():
+    cached = CacheInfo(source="exact", similarity=1.0, age_seconds=5.0, matched_claim=MEDIUM)
+    checked = []
+
+    async def main():
+        budget = ClaimBudget(max_claims=1, max_spend_usd=0)
+        resumed = budget.record_resumed(_claim(STRONG), _response(_claim(STRONG)))
+        budget.record_resumed(_claim(MEDIUM), _response(_claim(MEDIUM), cache=cached))
+        budget.close()
+        return budget, resumed, await budget.run(_claim(WEAK), make_fact_check(checked))
+
+    budget, resumed, after = asyncio.run(main())
+    assert resumed.score == claim_priority_score(STRONG)
+    assert budget.stats["resumed"] == 2
+    assert budget.stats["checked"] == 1 and budget.stats["known"] == 1
+    assert checked == [] and after.status == "skipped"
+
+
+def test_negated_or_renumbered_claims_are_not_counted_as_repeats():
+    budget = ClaimBudget(max_claims=5, max_spend_usd=0)
+    for text in ("Vaccines do cause autism in young children", "Vaccines do not cause autism in young children",
+                 "Unemployment in the region rose to 14 percent last year",
+                 "Unemployment in the region rose to 15 percent last year",
+                 "Unemployment in the region rose to 15 percent last year!"):
+        budget.observe(_claim(text))
+    assert budget._frequency == [1, 1, 1, 2]
@@ -0,0 +1,72 @@
+"""
+Tests for the claim-extraction cache: the in-memory LRU and the SQLite tier behind it.
+Run from the backend directory: python3 -m pytest tests/test_claim_cache.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+import services.claim_cache as claim_cache
+from services.claim_cache import cache_key, get_cached_claims, store_claims
+
+
+@pytest.fixture(autouse=True)
+def cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(claim_cache, "CLAIM_CACHE_PATH", str(tmp_path / "claims.sqlite"))
+    monkeypatch.setattr(claim_cache, "CLAIM_CACHE_ENABLED", True)
+    monkeypatch.setattr(claim_cache, "CLAIM_CACHE_MEMORY_ENTRIES", 2)
+    monkeypatch.setattr(claim_cache, "_db", None)
+    monkeypatch.setattr(claim_cache, "_memory", OrderedDict())
+    monkeypatch.setattr(claim_cache, "_stats", dict.fromkeys(claim_cache._stats, 0))
+
+
+def test_key_ignores_case_and_whitespace_but_not_version():
+    assert cache_key("  Paris is  the capital ", "v1") == cache_key("paris is the capital", "v1")
+    assert cache_key("paris is the capital", "v1") != cache_key("paris is the capital", "v2")
+
+
+def test_memory_then_disk_hits():
+    async def main():
+        await store_claims("Paris is the capital of France", "v1", ["Paris is the capital of France."])
+        memory = await get_cached_claims("paris is the capital of france", "v1")
+        claim_cache._memory.clear()
+        disk = await get_cached_claims("Paris is the capital of France", "v1")
+        again = await get_cached_claims("Paris is the capital of France", "v1")
+        return memory, disk, again
+
+    memory, disk, again = asyncio.run(main())
+    assert memory == disk == again == ["Paris is the capital of France."]
+    stats = claim_cache.cache_stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (2, 1, 0)
+    assert stats["disk_entries"] == 1
+
+
+def test_lru_evicts_oldest_and_empty_results_are_cached():
+    async def main():
+        for i in range(3):
+            await store_claims(f"sentence {i}", "v1", [] if i == 0 else [f"claim {i}"])
+        return await get_cached_claims("sentence 0", "v1"), await get_cached_claims("unknown", "v1")
+
+    first, unknown = asyncio.run(main())
+    assert first == []  # evicted from memory, still on disk
+    assert unknown is None
+    assert claim_cache._stats["disk_hits"] == 1 and claim_cache._stats["misses"] == 1
+    assert len(claim_cache._memory) == 2
+
+
+def test_disabled_cache_stores_nothing(monkeypatch):
+    monkeypatch.setattr(claim_cache, "CLAIM_CACHE_ENABLED", False)
+
+    async def main():
+        await store_claims("sentence", "v1", ["claim"])
+        return await get_cached_claims("sentence", "v1")
+
+    assert asyncio.run(main()) is None
+    assert len(claim_cache._memory) == 0
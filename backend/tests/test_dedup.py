@@ -0,0 +1,162 @@
+"""
+Tests for near-duplicate detection: NearDupIndex, the FactCheckDeduper built on it, and verdict markers.
+Run from the backend directory: python3 -m pytest tests/test_dedup.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from models import Claim, ClaimResponse
+from services.dedup_index import NearDupIndex, shingle_set, token_set, verdict_markers
+from services.fact_checking_service import FactCheckDeduper
+
+
+def test_token_and_shingle_sets():
+    assert token_set("The Moon, the moon!") == frozenset({"the", "moon"})
+    assert shingle_set("a b c") == frozenset({"a b", "b c"})
+    assert shingle_set("one") == frozenset({"one"})
+
+
+def test_query_finds_near_duplicate_above_threshold():
+    index = NearDupIndex(threshold=0.8)
+    index.add("the eiffel tower is 330 metres tall in paris", "eiffel")
+    index.add("water boils at 100 degrees celsius at sea level", "water")
+    match = index.query("the eiffel tower in paris is 330 metres tall")
+    assert match is not None
+    assert match[1] == "eiffel"
+    assert match[2] == 1.0
+
+
+def test_query_rejects_texts_below_threshold():
+    index = NearDupIndex(threshold=0.9)
+    index.add("the eiffel tower is 330 metres tall", "eiffel")
+    assert index.query("the eiffel tower is 300 metres tall") is None
+    assert index.query("bananas are rich in potassium") is None
+
+
+def test_shingles_tell_word_order_apart():
+    by_tokens = NearDupIndex(threshold=0.9)
+    by_shingles = NearDupIndex(threshold=0.9, shingle_size=2)
+    for index in (by_tokens, by_shingles):
+        index.add("dogs chase cats", 1)
+    assert by_tokens.query("cats chase dogs") is not None
+    assert by_shingles.query("cats chase dogs") is None
+
+
+def test_set_value_and_remove():
+    index = NearDupIndex(threshold=0.8)
+    first = index.add("the population of tokyo is 14 million", "old")
+    second = index.add("mount everest is 8849 metres high", "everest")
+    index.set_value(first, "new")
+    assert index.query("the population of tokyo is 14 million")[1] == "new"
+
+    index.remove(first)
+    index.remove(first)  # unknown ids are ignored
+    assert len(index) == 1
+    assert index.query("the population of tokyo is 14 million") is None
+    assert index.query("mount everest is 8849 metres high")[0] == second
+    assert index.add("the population of tokyo is 14 million") not in (first, second)
+
+
+def test_remove_leaves_no_empty_buckets():
+    index = NearDupIndex(threshold=0.8)
+    ids = [index.add(f"claim number {i} about the economy of country {i}") for i in range(20)]
+    for idx in ids:
+        index.remove(idx)
+    assert len(index) == 0
+    assert all(not bucket for bucket in index._buckets)
+
+
+def _response(claim: Claim) -> ClaimResponse:
+    return ClaimResponse(claim=claim, status="verified", written_summary="ok", evidence=[])
+
+
+def test_deduper_reuses_verdict_for_near_duplicates():
+    calls = []
+
+    async def fact_check(claim):
+        calls.append(claim.claim)
+        await asyncio.sleep(0.01)
+        return _response(claim)
+
+    async def main():
+        deduper = FactCheckDeduper()
+        first = Claim(start=1.0, claim="the eiffel tower is 330 metres tall in paris")
+        repeat = Claim(start=50.0, claim="the eiffel tower in paris is 330 metres tall")
+        results = await asyncio.gather(deduper.check(first, fact_check), deduper.check(repeat, fact_check))
+        return deduper, results
+
+    deduper, results = asyncio.run(main())
+    assert len(calls) == 1
+    assert deduper.reused == 1
+    assert results[1].claim.start == 50.0  # the copy carries its own claim
+    assert len(deduper.index) == 1
+
+
+def test_in_flight_only_deduper_forgets_finished_checks():
+    async def fact_check(claim):
+        await asyncio.sleep(0.01)
+        return _response(claim)
+
+    async def main():
+        deduper = FactCheckDeduper(in_flight_only=True)
+        claims = [Claim(start=float(i), claim=f"country {i} exported {i * 7} tonnes of steel in {1990 + i}")
+                  for i in range(10)]
+        await asyncio.gather(*(deduper.check(c, fact_check) for c in claims))
+        await asyncio.sleep(0)
+        return deduper
+
+    assert len(asyncio.run(main()).index) == 0
+
+
+def test_verdict_markers_numbers_and_negations():
+    numbers, negations = verdict_markers("The bridge isn't 1,200 metres long and was never painted in 1990")
+    assert numbers == frozenset({"1,200", "1990"})
+    assert negations == frozenset({"not", "never"})
+
+
+def test_verdict_markers_tell_near_duplicates_apart():
+    # similar enough to match, but a verdict for one does not hold for the other
+    a = "the eiffel tower is 330 metres tall"
+    assert verdict_markers(a) != verdict_markers("the eiffel tower is 300 metres tall")
+    assert verdict_markers(a) != verdict_markers("the eiffel tower is not 330 metres tall")
+    assert verdict_markers(a) == verdict_markers("The Eiffel Tower is 330 metres tall!")
+    assert verdict_markers("it doesn’t rain")[1] == frozenset({"not"})
+
+
+def test_query_accept_skips_rejected_entries():
+    index = NearDupIndex(threshold=0.6)
+    index.add("the eiffel tower is 330 metres tall in paris", "rejected")
+    index.add("the eiffel tower in paris is about 330 metres tall", "accepted")
+    assert index.query("the eiffel tower is 330 metres tall in paris")[1] == "rejected"
+    match = index.query("the eiffel tower is 330 metres tall in paris", accept=lambda v: v == "accepted")
+    assert match[1] == "accepted"
+    assert index.query("the eiffel tower is 330 metres tall", accept=lambda v: False) is None
+
+
+def test_deduper_keeps_negations_and_numbers_apart():
+    calls = []
+
+    async def fact_check(claim):
+        calls.append(claim.claim)
+        await asyncio.sleep(0.01)
+        return _response(claim)
+
+    async def main():
+        deduper = FactCheckDeduper()
+        claims = [
+            Claim(start=1.0, claim="Vaccines do cause autism in young children"),
+            Claim(start=2.0, claim="Vaccines do not cause autism in young children"),
+            Claim(start=3.0, claim="Unemployment in the region rose to 14 percent last year"),
+            Claim(start=4.0, claim="Unemployment in the region rose to 15 percent last year"),
+        ]
+        await asyncio.gather(*(deduper.check(c, fact_check) for c in claims))
+        return deduper
+
+    deduper = asyncio.run(main())
+    assert len(calls) == 4
+    assert deduper.reused == 0
@@ -0,0 +1,84 @@
+"""
+Tests for the evidence cache: exact and similar hits, verdict markers and expiry.
+Run from the backend directory: python3 -m pytest tests/test_evidence_cache.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import services.evidence_cache as evidence_cache
+from models import Claim, ClaimResponse, ClaimWithAllEvidence
+from services.evidence_cache import get_cached_fact_check, store_fact_check
+
+TOWER = "the eiffel tower in paris is 330 metres tall and was built in 1889"
+
+
+@pytest.fixture(autouse=True)
+def cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(evidence_cache, "EVIDENCE_CACHE_PATH", str(tmp_path / "evidence.sqlite"))
+    monkeypatch.setattr(evidence_cache, "EVIDENCE_CACHE_ENABLED", True)
+    monkeypatch.setattr(evidence_cache, "EVIDENCE_CACHE_TTL_HOURS", 24.0)
+    monkeypatch.setattr(evidence_cache, "EVIDENCE_CACHE_SIMILARITY", 0.6)
+    monkeypatch.setattr(evidence_cache, "_db", None)
+    monkeypatch.setattr(evidence_cache, "_index", None)
+    monkeypatch.setattr(evidence_cache, "_index_ids", {})
+    monkeypatch.setattr(evidence_cache, "_stats", dict.fromkeys(evidence_cache._stats, 0))
+
+
+def _store(text, status="verified", age_s=0.0, monkeypatch=None):
+    claim = Claim(start=1.0, claim=text)
+    evidence = ClaimWithAllEvidence(start=1.0, claim=claim, summary="evidence", evidence=[])
+    response = ClaimResponse(claim=claim, status=status, written_summary=f"{status}: {text}", evidence=[])
+    if age_s:
+        monkeypatch.setattr(evidence_cache, "time", SimpleNamespace(time=lambda: time.time() - age_s))
+    store_fact_check(evidence, response)
+    if age_s:
+        monkeypatch.setattr(evidence_cache, "time", time)
+
+
+def _lookup(text):
+    cached = get_cached_fact_check(Claim(start=50.0, claim=text))
+    return cached[1] if cached else None
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    _store(TOWER)
+    hit = _lookup("The Eiffel Tower in Paris is 330 metres tall, and was built in 1889!")
+    assert hit.cache.source == "exact" and hit.claim.start == 50.0
+
+
+def test_similar_hit_needs_the_same_numbers():
+    _store(TOWER)
+    assert _lookup("the eiffel tower in paris is 330 metres tall and it was built in 1889").cache.source == "similar"
+    assert _lookup("the eiffel tower in paris is 300 metres tall and it was built in 1889") is None
+
+
+def test_expired_exact_entry_is_dropped(monkeypatch):
+    _store(TOWER, age_s=2 * 86400, monkeypatch=monkeypatch)
+    assert _lookup(TOWER) is None
+    assert evidence_cache._stats["expired"] == 1
+    assert len(evidence_cache._index) == 0
+    assert evidence_cache.cache_stats()["entries"] == 0
+
+
+def test_expired_best_match_does_not_hide_a_fresh_one(monkeypatch):
+    query = "the eiffel tower in paris is 330 metres tall and it was built in 1889"
+    _store(TOWER, status="false", age_s=2 * 86400, monkeypatch=monkeypatch)  # closest, but expired
+    _store("the eiffel tower in paris is 330 metres tall it was built in 1889 for the fair", status="verified")
+    hit = _lookup(query)
+    assert hit is not None and hit.status == "verified"
+    assert len(evidence_cache._index) == 1  # the expired entry was evicted
+
+
+def test_restore_refreshes_the_timestamp(monkeypatch):
+    _store(TOWER, status="false", age_s=2 * 86400, monkeypatch=monkeypatch)
+    _store(TOWER, status="verified")
+    assert _lookup("the eiffel tower in paris is 330 metres tall and it was built in 1889").status == "verified"
+    assert len(evidence_cache._index) == 1
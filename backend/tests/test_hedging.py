@@ -0,0 +1,118 @@
+"""
+Tests for latency-budgeted extraction: LatencyTracker, hedged_call and batch retries.
+Run from the backend directory: python3 -m pytest tests/test_hedging.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import services.claim_service as claim_service
+from models import Sentence
+from services.hedging import LatencyTracker, hedged_call
+
+
+def attempt(result=None, delay=0.0, error=None, log=None, name=""):
+    async def run():
+        if log is not None:
+            log.append(name)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+    return run
+
+
+def test_tracker_uses_initial_estimate_until_observed():
+    tracker = LatencyTracker(initial_seconds=2.0, min_hedge_seconds=0.5)
+    assert tracker.p95("runpod") == 2.0
+    tracker.observe("runpod", 0.1)
+    assert tracker.p95("runpod") == pytest.approx(0.1)
+    assert tracker.hedge_delay("runpod") == 0.5  # never hedge sooner than min_hedge_seconds
+
+
+def test_tracker_p95_grows_with_variance():
+    steady, jittery = LatencyTracker(), LatencyTracker()
+    for _ in range(20):
+        steady.observe("e", 1.0)
+    for i in range(20):
+        jittery.observe("e", 0.5 if i % 2 else 1.5)
+    assert steady.p95("e") == pytest.approx(1.0)
+    assert jittery.p95("e") > 1.5
+    assert steady.snapshot()["endpoints"]["e"]["samples"] == 20
+
+
+def test_fast_primary_is_not_hedged():
+    tracker = LatencyTracker(initial_seconds=0.2, min_hedge_seconds=0.05)
+    log = []
+    result = asyncio.run(hedged_call([("a", attempt("A", 0.01, log=log, name="a")),
+                                      ("b", attempt("B", 0.01, log=log, name="b"))], 1.0, tracker))
+    assert result == "A"
+    assert log == ["a"]
+    assert tracker.counters["hedges"] == 0
+
+
+def test_slow_primary_is_hedged_and_backup_wins():
+    tracker = LatencyTracker(initial_seconds=0.05, min_hedge_seconds=0.05)
+    result = asyncio.run(hedged_call([("a", attempt("A", 1.0)), ("b", attempt("B", 0.01))], 2.0, tracker))
+    assert result == "B"
+    assert tracker.counters["hedges"] == 1
+    assert tracker.counters["hedge_wins"] == 1
+
+
+def test_failed_primary_launches_backup_at_once():
+    tracker = LatencyTracker(initial_seconds=5.0)
+    started = time.monotonic()
+    result = asyncio.run(hedged_call([("a", attempt(error=RuntimeError("down"))), ("b", attempt("B", 0.01))],
+                                     2.0, tracker))
+    assert result == "B"
+    assert time.monotonic() - started < 1.0
+
+
+def test_every_attempt_failing_raises_last_error():
+    tracker = LatencyTracker()
+    with pytest.raises(ValueError):
+        asyncio.run(hedged_call([("a", attempt(error=RuntimeError("a"))), ("b", attempt(error=ValueError("b")))],
+                                1.0, tracker))
+
+
+def test_budget_exhausted_raises_timeout_and_cancels_attempts():
+    tracker = LatencyTracker(initial_seconds=0.05, min_hedge_seconds=0.05)
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(hedged_call([("a", attempt("A", 5.0)), ("b", attempt("B", 5.0))], 0.2, tracker))
+    assert time.monotonic() - started < 1.0
+    assert tracker.counters["budget_exhausted"] == 1
+
+
+def test_batch_retries_missing_sentences_within_the_batch_budget(monkeypatch):
+    monkeypatch.setattr(claim_service, "CLAIM_BATCH_LATENCY_BUDGET_S", 0.6)
+    monkeypatch.setattr(claim_service, "CLAIM_LATENCY_BUDGET_S", 0.5)
+    singles = []
+
+    async def runpod(request, endpoint, budget):
+        if endpoint == "runpod-batch":
+            await asyncio.sleep(0.3)
+            content = json.dumps({"results": [{"index": 0, "claims": ["Paris is the capital of France"]}]})
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        singles.append(budget)
+        await asyncio.wait_for(asyncio.sleep(10), budget)
+
+    monkeypatch.setattr(claim_service, "_runpod_hedged", runpod)
+    sentences = [Sentence(start=float(i), text=f"Paris is the capital of France, part {i}") for i in range(4)]
+    started = time.monotonic()
+    out = asyncio.run(claim_service.extract_claims_batch(sentences))
+    elapsed = time.monotonic() - started
+
+    assert [c.claim for c in out[0]] == ["Paris is the capital of France."]  # filter_claims adds the full stop
+    assert all(isinstance(r, Exception) for r in out[1:])
+    assert len(singles) == 3 and all(b <= 0.3 + 0.05 for b in singles)  # what was left of the batch budget
+    assert elapsed < 0.6 + 0.2
@@ -0,0 +1,91 @@
+"""
+Tests for background jobs: submission, result storage and final status.
+Run from the backend directory: python3 -m pytest tests/test_jobs.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+
+import services.jobs as jobs
+from models import Claim, ClaimResponse
+from services.pipeline import DoneEvent, ErrorEvent, FactCheckEvent
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DB_PATH", str(tmp_path / "jobs.sqlite"))
+    monkeypatch.setattr(jobs, "_db", None)
+    monkeypatch.setattr(jobs, "_queue", None)
+
+
+def fake_pipeline(monkeypatch, events):
+    class Pipeline:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def events(self):
+            for event in events:
+                yield event
+
+    monkeypatch.setattr(jobs, "new_pipeline", Pipeline)
+
+
+def _fact_check(start):
+    claim = Claim(start=start, claim=f"claim at {start}")
+    response = ClaimResponse(claim=claim, status="verified", written_summary="ok", evidence=[])
+    return FactCheckEvent(claim_id=f"c{start}", sentence_id=int(start), index=0, response=response)
+
+
+def _done():
+    return DoneEvent(transcript={"source": "captions"}, prefilter={}, budget={}, scheduler={})
+
+
+def _run(monkeypatch, events):
+    fake_pipeline(monkeypatch, events)
+
+    async def main():
+        job = await jobs.submit_job(URL)
+        await jobs._run_job(job["id"])
+        return jobs.get_job(job["id"])
+
+    return asyncio.run(main())
+
+
+def test_identical_active_job_is_reused():
+    async def main():
+        first = await jobs.submit_job(URL, max_claims=5)
+        again = await jobs.submit_job(URL, max_claims=5)
+        other = await jobs.submit_job(URL, max_claims=6)
+        return first, again, other
+
+    first, again, other = asyncio.run(main())
+    assert first["id"] == again["id"] != other["id"]
+    assert first["status"] == "queued"
+
+
+def test_completed_job_has_results_and_summary(monkeypatch):
+    job = _run(monkeypatch, [_fact_check(20.0), _fact_check(5.0), _done()])
+    assert job["status"] == "completed" and job["progress"] == 100
+    assert [r["claim"]["start"] for r in job["result"]["claim_responses"]] == [5.0, 20.0]
+    assert job["result"]["transcript"] == {"source": "captions"}
+
+
+def test_pipeline_error_fails_the_job(monkeypatch):
+    job = _run(monkeypatch, [_fact_check(1.0), ErrorEvent(scope="pipeline", message="download failed")])
+    assert job["status"] == "failed"
+    assert job["error_message"] == "download failed"
+    assert len(job["result"]["claim_responses"]) == 1  # partial results stay available
+
+
+def test_run_without_done_event_fails(monkeypatch):
+    job = _run(monkeypatch, [_fact_check(1.0)])
+    assert job["status"] == "failed"
+    assert job["error_message"] == "pipeline ended without a result"
@@ -0,0 +1,68 @@
+"""
+Tests for the cross-video knowledge base: ingest, search, age limits and reuse rules.
+Run from the backend directory: python3 -m pytest tests/test_knowledge_base.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+
+import pytest
+
+import services.evidence_cache as evidence_cache
+import services.fact_checking_service as fact_checking_service
+import services.knowledge_base as knowledge_base
+from models import Claim, ClaimResponse
+from services.knowledge_base import ingest_fact_check, lookup_fact_check, search_fact_checks
+
+CLAIM = "The unemployment rate in Spain fell to 11.7 percent in 2023"
+
+
+@pytest.fixture(autouse=True)
+def knowledge_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_base, "KNOWLEDGE_BASE_PATH", str(tmp_path / "knowledge.sqlite"))
+    monkeypatch.setattr(knowledge_base, "_db", None)
+    monkeypatch.setattr(knowledge_base, "KNOWLEDGE_BASE_MAX_AGE_DAYS", 0.0)
+    monkeypatch.setattr(evidence_cache, "EVIDENCE_CACHE_ENABLED", False)
+
+
+def _response(text, status="verified", summary="Official statistics agree."):
+    return ClaimResponse(claim=Claim(start=12.0, claim=text), status=status, written_summary=summary, evidence=[])
+
+
+def test_ingest_skips_duplicates_errors_and_skipped_claims():
+    assert ingest_fact_check(_response(CLAIM), "video1")
+    assert not ingest_fact_check(_response(CLAIM), "video1")
+    assert not ingest_fact_check(_response(CLAIM, status="skipped"), "video2")
+    assert not ingest_fact_check(_response(CLAIM, status="inconclusive",
+                                           summary="Could not fact-check this claim due to technical error."), "video3")
+    assert [r["video_id"] for r in search_fact_checks(CLAIM)] == ["video1"]
+
+
+def test_lookup_reuses_matching_verdicts_only():
+    ingest_fact_check(_response(CLAIM), "video1")
+    hit = lookup_fact_check(Claim(start=3.0, claim="the unemployment rate in Spain fell to 11.7 percent in 2023!"))
+    assert hit.status == "verified"
+    assert hit.cache.source == "knowledge_base" and hit.cache.video_id == "video1"
+    assert hit.claim.start == 3.0
+    assert lookup_fact_check(Claim(start=0.0, claim=CLAIM.replace("11.7", "12.7"))) is None
+
+
+def test_lookup_respects_max_age():
+    ingest_fact_check(_response(CLAIM), "video1", created_at=time.time() - 3 * 86400)
+    assert lookup_fact_check(Claim(start=0.0, claim=CLAIM)) is not None
+    assert lookup_fact_check(Claim(start=0.0, claim=CLAIM), max_age_s=86400) is None
+    assert search_fact_checks(CLAIM)  # still searchable
+
+
+def test_fact_check_lookup_does_not_outlive_the_evidence_cache_ttl(monkeypatch):
+    monkeypatch.setattr(fact_checking_service, "EVIDENCE_CACHE_TTL_HOURS", 24.0)
+    ingest_fact_check(_response(CLAIM), "old", created_at=time.time() - 2 * 86400)
+    assert asyncio.run(fact_checking_service.lookup_known_fact_check(Claim(start=0.0, claim=CLAIM))) is None
+    ingest_fact_check(_response(CLAIM), "fresh")
+    known = asyncio.run(fact_checking_service.lookup_known_fact_check(Claim(start=0.0, claim=CLAIM)))
+    assert known.cache.video_id == "fresh"
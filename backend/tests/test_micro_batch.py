@@ -0,0 +1,111 @@
+"""
+Tests for MicroBatcher: size and time based flushes, per-item errors, cancelled callers.
+Run from the backend directory: python3 -m pytest tests/test_micro_batch.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+
+from services.micro_batch import MicroBatcher
+
+
+def make_batcher(max_size=3, max_wait=0.05, fail_on=None):
+    calls = []
+
+    async def process(items):
+        calls.append(list(items))
+        await asyncio.sleep(0)
+        return [ValueError(item) if item == fail_on else item * 10 for item in items]
+
+    return MicroBatcher(process, max_size=max_size, max_wait=max_wait, name="test"), calls
+
+
+def test_full_batch_flushes_without_waiting():
+    async def main():
+        batcher, calls = make_batcher(max_size=3, max_wait=10.0)
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), 1.0)
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert results == [0, 10, 20]
+    assert calls == [[0, 1, 2]]
+
+
+def test_partial_batch_flushes_after_max_wait():
+    async def main():
+        batcher, calls = make_batcher(max_size=10, max_wait=0.05)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        return results, calls, loop.time() - started
+
+    results, calls, elapsed = asyncio.run(main())
+    assert results == [10, 20]
+    assert calls == [[1, 2]]
+    assert 0.04 <= elapsed < 1.0
+
+
+def test_overflow_is_split_into_batches_of_max_size():
+    async def main():
+        batcher, calls = make_batcher(max_size=2, max_wait=0.01)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert results == [0, 10, 20, 30, 40]
+    assert sorted(len(c) for c in calls) == [1, 2, 2]
+
+
+def test_exception_in_a_slot_fails_only_that_item():
+    async def main():
+        batcher, _ = make_batcher(max_size=3, fail_on=1)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert results[0] == 0 and results[2] == 20
+    assert isinstance(results[1], ValueError)
+
+
+def test_batch_failure_fails_every_item():
+    async def main():
+        async def process(items):
+            raise RuntimeError("provider down")
+
+        batcher = MicroBatcher(process, max_size=2, max_wait=0.01)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_wrong_result_count_is_an_error():
+    async def main():
+        async def process(items):
+            return items[:1]
+
+        batcher = MicroBatcher(process, max_size=2, max_wait=0.01)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_cancelled_caller_is_left_out_of_the_batch():
+    async def main():
+        batcher, calls = make_batcher(max_size=10, max_wait=0.05)
+        gone = asyncio.create_task(batcher.submit(1))
+        kept = asyncio.create_task(batcher.submit(2))
+        await asyncio.sleep(0)
+        gone.cancel()
+        result = await kept
+        with pytest.raises(asyncio.CancelledError):
+            await gone
+        return result, calls
+
+    result, calls = asyncio.run(main())
+    assert result == 20
+    assert calls == [[2]]
@@ -0,0 +1,144 @@
+"""
+Tests for PlayheadScheduler: claims are admitted nearest-ahead of the viewers' playheads.
+Run from the backend directory: python3 -m pytest tests/test_playhead_scheduler.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import services.playhead_scheduler as playhead_scheduler
+from models import Claim
+from services.playhead_scheduler import PlayheadScheduler, get_stream_scheduler, register_stream, unregister_stream
+
+
+def run_order(starts, viewers=None, concurrency=1):
+    """Queue claims behind a blocker, apply viewer playheads (paused), then record the order they run in."""
+    order = []
+
+    async def main():
+        scheduler = PlayheadScheduler(concurrency)
+        gate = asyncio.Event()
+
+        async def blocker(claim):
+            await gate.wait()
+
+        async def fact_check(claim):
+            order.append(claim.start)
+
+        blocked = [asyncio.create_task(scheduler.run(Claim(start=-1.0, claim="blocker"), blocker))
+                   for _ in range(concurrency)]
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(scheduler.run(Claim(start=s, claim=f"claim at {s}"), fact_check))
+                 for s in starts]
+        await asyncio.sleep(0)
+        for viewer, position in (viewers or {}).items():
+            scheduler.update_playhead(position, playing=False, viewer=viewer)
+        gate.set()
+        await asyncio.gather(*blocked, *tasks)
+        return scheduler
+
+    return order, asyncio.run(main())
+
+
+def test_timeline_order_without_playhead_updates():
+    order, scheduler = run_order([30.0, 10.0, 20.0])
+    assert order == [10.0, 20.0, 30.0]
+    assert scheduler.report()["viewers"] == 0
+
+
+def test_nearest_claim_ahead_of_the_playhead_goes_first(monkeypatch):
+    monkeypatch.setattr(playhead_scheduler, "PLAYHEAD_BEHIND_GRACE_SECONDS", 5.0)
+    order, _ = run_order([10.0, 48.0, 62.0, 55.0, 30.0, 90.0], viewers={"v": 50.0})
+    # ahead by distance, then just behind within the grace window, then the rest in timeline order
+    assert order == [55.0, 62.0, 90.0, 48.0, 10.0, 30.0]
+
+
+def test_every_viewer_gets_the_claims_just_ahead_of_it(monkeypatch):
+    monkeypatch.setattr(playhead_scheduler, "PLAYHEAD_BEHIND_GRACE_SECONDS", 5.0)
+    order, scheduler = run_order([5.0, 36.0, 75.0, 110.0], viewers={"a": 30.0, "b": 70.0})
+    assert order == [75.0, 36.0, 110.0, 5.0]
+    assert sorted(scheduler.playheads()) == [30.0, 70.0]
+    assert scheduler.playhead() == 30.0
+    assert scheduler.playhead("b") == 70.0
+
+
+def test_paused_and_playing_playhead_estimates():
+    scheduler = PlayheadScheduler(1)
+    assert scheduler.playheads() == [0.0]
+    scheduler.update_playhead(40.0, playing=False, viewer="paused")
+    scheduler.update_playhead(40.0, playing=True, rate=2.0, viewer="playing")
+    scheduler._viewers["playing"]["updated"] -= 5.0
+    assert scheduler.playhead("paused") == 40.0
+    assert 49.9 < scheduler.playhead("playing") < 50.5
+
+
+def test_removed_viewer_no_longer_steers_priority():
+    scheduler = PlayheadScheduler(1)
+    scheduler.update_playhead(100.0, playing=False, viewer="a")
+    scheduler.update_playhead(10.0, playing=False, viewer="b")
+    scheduler.remove_viewer("a")
+    scheduler.remove_viewer("missing")
+    assert scheduler.playheads() == [10.0]
+
+
+def test_unregister_stream_drops_its_viewer():
+    scheduler = PlayheadScheduler(1)
+    stream_id, _ = register_stream(scheduler)
+    assert get_stream_scheduler(stream_id) is scheduler
+    scheduler.update_playhead(20.0, playing=False, viewer=stream_id)
+    unregister_stream(stream_id)
+    assert get_stream_scheduler(stream_id) is None
+    assert scheduler.viewer_state(stream_id) is None
+
+
+def test_concurrency_limit_is_respected():
+    async def main():
+        scheduler = PlayheadScheduler(2)
+        active, peak = 0, 0
+
+        async def fact_check(claim):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        await asyncio.gather(*(scheduler.run(Claim(start=float(i), claim=str(i)), fact_check) for i in range(6)))
+        return scheduler, peak
+
+    scheduler, peak = asyncio.run(main())
+    assert peak == 2
+    report = scheduler.report()
+    assert report["scheduled"] == 6 and report["waiting"] == 0
+    assert report["ready_in_time"] + report["late"] == 6
+
+
+def test_cancelled_waiter_does_not_hold_a_slot():
+    async def main():
+        scheduler = PlayheadScheduler(1)
+        gate = asyncio.Event()
+        ran = []
+
+        async def blocker(claim):
+            await gate.wait()
+
+        async def fact_check(claim):
+            ran.append(claim.start)
+
+        first = asyncio.create_task(scheduler.run(Claim(start=0.0, claim="a"), blocker))
+        await asyncio.sleep(0)
+        gone = asyncio.create_task(scheduler.run(Claim(start=1.0, claim="b"), fact_check))
+        kept = asyncio.create_task(scheduler.run(Claim(start=2.0, claim="c"), fact_check))
+        await asyncio.sleep(0)
+        gone.cancel()
+        gate.set()
+        await asyncio.gather(first, kept)
+        return ran, scheduler
+
+    ran, scheduler = asyncio.run(main())
+    assert ran == [2.0]
+    assert scheduler._active == 0
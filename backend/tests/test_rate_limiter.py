@@ -0,0 +1,136 @@
+"""
+Tests for the provider rate limiter: token buckets, per-video fairness and retries.
+Run from the backend directory: python3 -m pytest tests/test_rate_limiter.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import services.rate_limiter as rate_limiter
+from services.rate_limiter import ProviderLimiter, TokenBucket, _retry_info, rate_limit_key, rate_limited
+
+
+def test_bucket_starts_full_and_refills(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_BURST_SECONDS", 10.0)
+    bucket = TokenBucket(per_minute=60)  # 1 per second, 10 in the bucket
+    assert bucket.capacity == 10.0
+    assert bucket.wait_time(10) == 0.0
+    bucket.take(10)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_bucket_oversized_request_waits_for_a_full_bucket(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_BURST_SECONDS", 10.0)
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(5)
+    assert bucket.wait_time(1000) == pytest.approx(5.0, abs=0.05)
+
+
+def test_bucket_refund_and_unlimited(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_BURST_SECONDS", 10.0)
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(8)
+    bucket.take(-3)  # the call used fewer tokens than estimated
+    assert bucket.level == pytest.approx(5.0, abs=0.05)
+    unlimited = TokenBucket(per_minute=0)
+    assert unlimited.unlimited and unlimited.wait_time(10 ** 6) == 0.0
+
+
+def test_waiting_videos_are_served_round_robin(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_BURST_SECONDS", 0.05)
+    served = []
+
+    async def call(limiter, video, n):
+        rate_limit_key.set(video)
+        await limiter.acquire()
+        served.append(f"{video}{n}")
+
+    async def main():
+        limiter = ProviderLimiter("test", rpm=1200, tpm=0)  # one request per 50ms, no burst
+        tasks = [asyncio.create_task(call(limiter, "a", i)) for i in range(5)]
+        tasks += [asyncio.create_task(call(limiter, "b", i)) for i in range(2)]
+        await asyncio.gather(*tasks)
+        return limiter
+
+    limiter = asyncio.run(main())
+    # video b does not wait behind all of a's queued calls
+    assert served == ["a0", "b0", "a1", "b1", "a2", "a3", "a4"]
+    assert limiter.stats["served"] == 7
+    assert limiter.stats["waited"] >= 5
+
+
+def test_pause_delays_the_next_request():
+    async def main():
+        limiter = ProviderLimiter("test", rpm=0, tpm=0)
+        limiter.pause(0.2)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await limiter.acquire()
+        return loop.time() - started
+
+    assert asyncio.run(main()) >= 0.18
+
+
+def _status_error(status, headers=None):
+    request = httpx.Request("POST", "https://example.invalid")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def test_retry_info():
+    assert _retry_info(_status_error(429, {"retry-after": "3"})) == (429, 3.0)
+    assert _retry_info(_status_error(503, {"retry-after-ms": "250"})) == (503, 0.25)
+    assert _retry_info(_status_error(500)) == (500, None)
+    assert _retry_info(_status_error(400)) == (None, None)
+    assert _retry_info(ValueError("not an HTTP error")) == (None, None)
+
+
+def test_rate_limited_retries_then_succeeds(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_BACKOFF_BASE_S", 0.01)
+    monkeypatch.setattr(rate_limiter, "PROVIDER_LIMITS", {"flaky": (0.0, 0.0)})
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _status_error(503)
+        return SimpleNamespace(usage=None, value="ok")
+
+    result = asyncio.run(rate_limited("flaky", call))
+    assert result.value == "ok"
+    assert len(attempts) == 3
+    assert rate_limiter.get_limiter("flaky").stats["retries"] == 2
+
+
+def test_rate_limited_does_not_retry_client_errors(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise _status_error(400)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(rate_limited("broken", call))
+    assert len(attempts) == 1
+
+
+def test_process_share_splits_every_limit(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "PROVIDER_LIMITS", {"openai": (600.0, 60000.0)})
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(rate_limiter, "_limit_share", 1.0)
+    assert rate_limiter.get_limiter("openai").requests.rate == pytest.approx(10.0)
+    rate_limiter.set_process_share(4)
+    limiter = rate_limiter.get_limiter("openai")
+    assert limiter.requests.rate == pytest.approx(2.5)
+    assert limiter.tokens.rate == pytest.approx(250.0)
+    assert rate_limiter.rate_limit_stats()["openai"]["share"] == 0.25
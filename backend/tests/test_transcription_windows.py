@@ -0,0 +1,102 @@
+"""
+Tests for chunked transcription: window planning and stitching of overlapping windows.
+Run from the backend directory: python3 -m pytest tests/test_transcription_windows.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.transcription_service import _plan_windows, _stitch_window
+
+
+def seg(start, end, text=None):
+    return {"start": start, "end": end, "text": text or f"{start:g}-{end:g}"}
+
+
+def word(start, end):
+    return {"start": start, "end": end, "word": f"w{start:g}"}
+
+
+def stitch(windows_output, windows):
+    """Run _stitch_window over every window like iter_transcript_windows does."""
+    state = {"cut": 0.0, "seg_end": 0.0, "word_end": 0.0}
+    segments, words = [], []
+    for i, (segs, ws) in enumerate(windows_output):
+        next_start = windows[i + 1][0] if i + 1 < len(windows) else None
+        kept, kept_words = _stitch_window(segs, ws, windows[i], next_start, state)
+        segments.extend(kept)
+        words.extend(kept_words)
+    return segments, words
+
+
+def test_plan_windows_short_audio_is_one_window():
+    assert _plan_windows(100.0, 120.0, 4.0) == [(0.0, 100.0)]
+    assert _plan_windows(124.0, 120.0, 4.0) == [(0.0, 124.0)]
+    assert _plan_windows(0.0, 120.0, 4.0) == [(0.0, 0.0)]
+
+
+def test_plan_windows_overlap_and_tail():
+    assert _plan_windows(300.0, 120.0, 4.0) == [(0.0, 124.0), (120.0, 124.0), (240.0, 60.0)]
+
+
+def test_plan_windows_cover_the_whole_audio():
+    windows = _plan_windows(1000.0, 120.0, 4.0)
+    assert windows[0][0] == 0.0
+    assert windows[-1][0] + windows[-1][1] == 1000.0
+    for (start, length), (next_start, _) in zip(windows, windows[1:]):
+        assert next_start == start + 120.0
+        assert start + length == next_start + 4.0
+
+
+def test_stitch_overlap_is_not_duplicated():
+    windows = [(0.0, 124.0), (120.0, 60.0)]
+    out = [
+        ([seg(0, 60), seg(60, 119), seg(121, 123)], []),
+        ([seg(121, 123), seg(123, 150), seg(150, 180)], []),
+    ]
+    segments, _ = stitch(out, windows)
+    assert [(s["start"], s["end"]) for s in segments] == [(0, 60), (60, 119), (121, 123), (123, 150), (150, 180)]
+
+
+def test_stitch_cut_off_segment_in_overlap_comes_from_next_window():
+    windows = [(0.0, 124.0), (120.0, 60.0)]
+    out = [
+        ([seg(0, 100), seg(100, 121), seg(121, 124)], []),
+        ([seg(121, 126), seg(126, 180)], []),
+    ]
+    segments, _ = stitch(out, windows)
+    assert [(s["start"], s["end"]) for s in segments] == [(0, 100), (100, 121), (121, 126), (126, 180)]
+
+
+def test_stitch_segment_longer_than_overlap_is_not_truncated():
+    # speech from 115s runs across the 120s window start and the 124s window end
+    windows = [(0.0, 124.0), (120.0, 124.0), (240.0, 60.0)]
+    out = [
+        ([seg(0, 115), seg(115, 124)], [word(110, 114), word(116, 123)]),
+        ([seg(120, 128), seg(128, 236), seg(236, 244)], [word(121, 127), word(237, 243)]),
+        ([seg(240, 250), seg(250, 300)], [word(241, 249)]),
+    ]
+    segments, words = stitch(out, windows)
+    assert [(s["start"], s["end"]) for s in segments] == [(0, 115), (120, 128), (128, 236), (240, 250), (250, 300)]
+    assert [w["start"] for w in words] == [110, 121, 241]
+
+
+def test_stitch_segments_are_in_order_without_gaps_at_boundaries():
+    windows = _plan_windows(600.0, 120.0, 4.0)
+    out = []
+    for start, length in windows:
+        # every window sees speech in 10s segments aligned to its own start, cut at its end
+        segs, t = [], start
+        while t < start + length:
+            segs.append(seg(t, min(t + 10.0, start + length)))
+            t += 10.0
+        out.append((segs, []))
+    segments, _ = stitch(out, windows)
+    starts = [s["start"] for s in segments]
+    assert starts == sorted(starts)
+    for prev, cur in zip(segments, segments[1:]):
+        assert cur["start"] - prev["end"] <= 4.0  # at most the overlap is lost at a boundary
+    assert segments[-1]["end"] == 600.0
+    assert all(s["end"] - s["start"] == 10.0 or s is segments[-1] for s in segments)
@@ -0,0 +1,62 @@
+"""
+Tests for non-speech trimming: speech intervals and the trimmed -> original time map.
+Run from the backend directory: python3 -m pytest tests/test_vad_offsets.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from services.transcription_service import _build_offset_map, _remap_to_original, _speech_intervals, to_original_time
+
+
+def test_speech_intervals_invert_silences_with_padding():
+    silences = [(10.0, 20.0), (50.0, 52.0)]
+    assert _speech_intervals(silences, 60.0, 0.5) == [(0.0, 10.5), (19.5, 50.5), (51.5, 60.0)]
+
+
+def test_speech_intervals_no_padding_at_file_edges():
+    silences = [(0.0, 5.0), (55.0, 60.0)]
+    assert _speech_intervals(silences, 60.0, 0.5) == [(4.5, 55.5)]
+
+
+def test_speech_intervals_short_silence_is_kept():
+    # a silence shorter than twice the padding removes nothing
+    assert _speech_intervals([(10.0, 10.6)], 30.0, 0.5) == [(0.0, 30.0)]
+
+
+def test_build_offset_map():
+    intervals = [(0.0, 10.0), (20.0, 50.0), (55.0, 60.0)]
+    assert _build_offset_map(intervals) == [(0.0, 0.0, 10.0), (10.0, 20.0, 30.0), (40.0, 55.0, 5.0)]
+
+
+def test_to_original_time():
+    offset_map = _build_offset_map([(0.0, 10.0), (20.0, 50.0), (55.0, 60.0)])
+    assert to_original_time(5.0, offset_map) == 5.0
+    assert to_original_time(15.0, offset_map) == 25.0
+    assert to_original_time(42.0, offset_map) == 57.0
+    # past the end of the trimmed audio clamps to the end of the last interval
+    assert to_original_time(100.0, offset_map) == 60.0
+
+
+def test_to_original_time_boundary_start_and_end():
+    offset_map = _build_offset_map([(0.0, 10.0), (20.0, 50.0)])
+    # trimmed 10.0 is where the second interval starts: a start maps forward, an end stays in the first
+    assert to_original_time(10.0, offset_map) == 20.0
+    assert to_original_time(10.0, offset_map, is_end=True) == 10.0
+
+
+def test_to_original_time_without_map():
+    assert to_original_time(12.5, []) == 12.5
+
+
+def test_remap_to_original_in_place():
+    offset_map = _build_offset_map([(0.0, 10.0), (20.0, 50.0)])
+    segments = [{"start": 2.0, "end": 10.0}, {"start": 10.0, "end": 14.0}]
+    words = [{"start": 11.0, "end": 11.5}]
+    _remap_to_original(segments, words, offset_map)
+    assert segments == [{"start": 2.0, "end": 10.0}, {"start": 20.0, "end": 24.0}]
+    assert words == [{"start": pytest.approx(21.0), "end": pytest.approx(21.5)}]
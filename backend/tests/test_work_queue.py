@@ -0,0 +1,112 @@
+"""
+Tests for the worker queue: claiming runs, stale-run takeover, publishing on resume and worker stats.
+Run from the backend directory: python3 -m pytest tests/test_work_queue.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+import time
+
+import pytest
+
+import services.rate_limiter as rate_limiter
+import services.work_queue as work_queue
+from models import Sentence
+from services.pipeline import ErrorEvent, SentenceEvent, StageEvent
+from services.work_queue import _claim_run, _execute, _Publisher, enqueue_run
+
+
+@pytest.fixture(autouse=True)
+def queue_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(work_queue, "WORK_QUEUE_PATH", str(tmp_path / "work_queue.sqlite"))
+    monkeypatch.setattr(work_queue, "_local", threading.local())
+    monkeypatch.setattr(work_queue, "_schema_ready", False)
+    monkeypatch.setattr(work_queue, "WORKER_STALE_S", 30.0)
+    monkeypatch.setattr(work_queue, "WORKER_MAX_ATTEMPTS", 2)
+
+
+def _run(run_id):
+    return _execute("SELECT status, worker, attempts FROM pipeline_runs WHERE id = ?", (run_id,))[0]
+
+
+def _go_stale(run_id):
+    _execute("UPDATE pipeline_runs SET heartbeat_at = ? WHERE id = ?", (time.time() - 60, run_id))
+
+
+def test_runs_are_claimed_oldest_first_and_once():
+    enqueue_run("first", "https://youtu.be/a", {"max_claims": 3})
+    time.sleep(0.01)
+    enqueue_run("second", "https://youtu.be/b", {})
+    assert _claim_run("w1") == ("first", "https://youtu.be/a", {"max_claims": 3})
+    assert _claim_run("w2")[0] == "second"
+    assert _claim_run("w3") is None
+    assert _run("first") == ("running", "w1", 1)
+
+
+def test_cancelled_and_live_runs_are_not_claimed():
+    enqueue_run("cancelled", "https://youtu.be/a", {})
+    work_queue.cancel_run("cancelled")
+    enqueue_run("live", "https://youtu.be/b", {})
+    assert _claim_run("w1")[0] == "live"
+    assert _claim_run("w2") is None  # w1 is still heartbeating
+
+
+def test_stale_run_is_taken_over_by_another_worker():
+    enqueue_run("run", "https://youtu.be/a", {})
+    _claim_run("w1")
+    _go_stale("run")
+    assert _claim_run("w2")[0] == "run"
+    assert _run("run") == ("running", "w2", 2)
+
+
+def test_run_fails_after_max_attempts():
+    enqueue_run("run", "https://youtu.be/a", {})
+    _claim_run("w1")
+    _go_stale("run")
+    _claim_run("w2")
+    _go_stale("run")
+    assert _claim_run("w3") is None
+    assert _run("run")[0] == "failed"
+
+
+def _sentence(i):
+    return SentenceEvent(sentence_id=i, sentence=Sentence(start=float(i), text=f"sentence {i}"))
+
+
+def _published(run_id):
+    return [(seq, json.loads(raw)) for seq, raw in
+            _execute("SELECT seq, event FROM pipeline_events WHERE run_id = ? ORDER BY seq", (run_id,))]
+
+
+def test_resumed_run_does_not_republish_events():
+    first = _Publisher("run")
+    for i in range(2):
+        first.publish(_sentence(i))
+    first.publish(ErrorEvent(scope="fact_check", message="timeout"))
+
+    resumed = _Publisher("run")  # a second worker took the run over
+    assert resumed.seq == 3
+    for i in range(3):
+        resumed.publish(_sentence(i))
+    resumed.publish(ErrorEvent(scope="fact_check", message="timeout"))  # errors are always new
+    resumed.publish(StageEvent(stage="transcription", sentences=3, claims=0))
+
+    events = _published("run")
+    assert [seq for seq, _ in events] == [1, 2, 3, 4, 5, 6]
+    assert [(e["type"], e.get("sentence_id")) for _, e in events] == [
+        ("sentence", 0), ("sentence", 1), ("error", None), ("sentence", 2), ("error", None), ("stage", None)]
+
+
+def test_worker_stats_round_trip(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    work_queue.publish_worker_stats("host:1")
+    _execute("INSERT INTO worker_stats (worker, rate_limits, updated_at) VALUES (?, ?, ?)",
+             ("host:gone", "{}", time.time() - 600))
+    stats = work_queue.worker_rate_limit_stats()
+    assert list(stats) == ["host:1"]
+    assert set(stats["host:1"]) == set(rate_limiter.PROVIDER_LIMITS)
@@ -0,0 +1,97 @@
+"""
+YouTube Fact-Checker pipeline worker
+Runs queued videos outside the API process (see services/work_queue.py)
+
+Start the API with PIPELINE_MODE=worker, then start workers on the same host
+(WORK_QUEUE_PATH must be on a local filesystem):
+
+    python worker.py                  # WORKER_PROCESSES processes (default: one per core)
+    python worker.py --processes 4
+
+Each process has its own event loop and provider connection pools and runs up
+to WORKER_RUNS_PER_PROCESS videos at a time. The provider rate limits
+(<PROVIDER>_RPM / _TPM) are split evenly across the processes.
+"""
+
+# Load environment variables first
+from dotenv import load_dotenv
+import os
+load_dotenv()
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+import sys
+
+from services.providers import init_providers, close_providers
+from services.rate_limiter import set_process_share
+from services.work_queue import WORK_QUEUE_PATH, run_worker
+
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "0"))  # 0 = one per CPU core
+
+
+def _setup_logging() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s',
+        stream=sys.stdout,
+        force=True,
+    )
+
+
+async def _serve() -> None:
+    await init_providers()
+    try:
+        await run_worker()
+    finally:
+        await close_providers()
+
+
+def _stop(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def _process_main(processes: int = 1) -> None:
+    _setup_logging()
+    set_process_share(processes)
+    # SIGTERM from the parent stops this process like Ctrl+C
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run fact-checking pipeline workers")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES or os.cpu_count() or 1,
+                        help="worker processes (default: WORKER_PROCESSES or one per CPU core)")
+    args = parser.parse_args()
+    _setup_logging()
+    logger = logging.getLogger("worker")
+
+    if args.processes <= 1:
+        logger.info(f"👷 Starting 1 worker process on {WORK_QUEUE_PATH}")
+        _process_main()
+        return
+
+    logger.info(f"👷 Starting {args.processes} worker processes on {WORK_QUEUE_PATH}")
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_process_main, args=(args.processes,), name=f"worker-{i}") for i in range(args.processes)]
+    for p in processes:
+        p.start()
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
+        logger.info("🛑 Stopping worker processes")
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()